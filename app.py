@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
 from wolframclient.evaluation import WolframLanguageSession
 from wolframclient.language import wl
 
@@ -7,9 +7,14 @@ import requests
 import random   
 import json     
 import logging
+import atexit
+import math
 import re
+import time
 import uuid
-from threading import Lock
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from threading import Condition, Event, Lock, Thread
 from pathlib import Path
 
 try:
@@ -28,10 +33,21 @@ from google import genai
 
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 
-# Crear carpeta de audios si no existe
-AUDIO_FOLDER = Path('static/audio')
+# Las rutas de datos relativas se resuelven contra el directorio de la app, no
+# contra el directorio desde el que se lanzó el proceso
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def data_path(path):
+    """Ruta absoluta de `path` (relativa a BASE_DIR si no es absoluta)."""
+    return os.path.join(BASE_DIR, path)
+
+
+# Crear carpeta de audios si no existe (la misma que sirve /static/audio)
+AUDIO_FOLDER = Path(data_path('static/audio'))
 AUDIO_FOLDER.mkdir(parents=True, exist_ok=True)
 
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -59,6 +75,7 @@ ELEVENLABS_API_KEY = os.environ.get("ELEVENLABS_API_KEY")
 
 # C. Configuración de OpenRouter
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
 
 # Modo de desarrollo: si se activa, el endpoint devuelve rutas mock sin necesitar Wolfram
 DEV_MOCK = os.environ.get("DEV_MOCK", "0") == "1"
@@ -72,140 +89,159 @@ DEV_MOCK = os.environ.get("DEV_MOCK", "0") == "1"
 # 2. CONEXIÓN AL MOTOR DE WOLFRAM (usando implementación Python puro)
 # ===================================================================
 
-from math import radians, cos, sin, asin, sqrt
+import numpy as np
+
+from services.cache import TTLCache
+from services.conflict_store import ConflictStore
+from services.geocode_cache import NEGATIVE, GeocodeCache, normalize_address
+from services.cpa import DEFAULT_HORIZON_S, predict_conflicts
+from services.flight_table import NUMERIC_COLUMNS, TEXT_COLUMNS, FlightTable
+from services.geodesy import haversine_many
+from services.http_client import get_session
+from services.opensky_api import opensky_limiter
+from services.rate_limit import RateLimitExceeded
+from services.route_solver import DEFAULT_TIER, EXACT_LIMIT_POINTS, EXACT_MAX_POINTS, TIERS, RouteSolver, solve_multistart
+from services.singleflight import upstream_calls
+from services.spatial_index import GridIndex
+from services.track_store import CHUNK_ROWS, QueryTooLarge, TrackStore
+from services.zone_index import ZoneIndex
+
+# Hasta este número de puntos (origen + restricciones + destino) se usa el
+# solver exacto de Held–Karp; por encima, la heurística de búsqueda local
+ROUTE_EXACT_MAX_POINTS = int(os.environ.get("ROUTE_EXACT_MAX_POINTS", EXACT_MAX_POINTS))
+if ROUTE_EXACT_MAX_POINTS > EXACT_LIMIT_POINTS:
+    # Held–Karp crece como 2^n: un valor alto bloquearía la petición y agotaría la memoria
+    logger.warning("ROUTE_EXACT_MAX_POINTS=%d excede el límite de %d; se usa %d",
+                   ROUTE_EXACT_MAX_POINTS, EXACT_LIMIT_POINTS, EXACT_LIMIT_POINTS)
+    ROUTE_EXACT_MAX_POINTS = EXACT_LIMIT_POINTS
+# Tope del `time_budget_ms` que puede pedir un cliente en /api/optimize-route
+ROUTE_MAX_BUDGET_MS = float(os.environ.get("ROUTE_MAX_BUDGET_MS", "10000"))
+
+# Caché de rutas calculadas (LRU + TTL). Las coordenadas se redondean a
+# ROUTE_CACHE_DECIMALS decimales (5 ≈ 1 m) para formar la clave.
+ROUTE_CACHE_SIZE = int(os.environ.get("ROUTE_CACHE_SIZE", "256"))
+ROUTE_CACHE_TTL = float(os.environ.get("ROUTE_CACHE_TTL", "600"))
+ROUTE_CACHE_DECIMALS = 5
+route_cache = TTLCache(maxsize=ROUTE_CACHE_SIZE, ttl=ROUTE_CACHE_TTL)
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
     Calcula la distancia entre dos puntos en km usando la fórmula haversine
-    (aproximación de la distancia geodésica)
+    (aproximación de la distancia geodésica).
+    Envoltorio escalar sobre `services.geodesy.haversine_many`.
     """
-    # Convertir a radianes
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    
-    # Diferencias
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    
-    # Fórmula haversine
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    
-    # Radio de la Tierra en km
-    km = 6371 * c
-    return km
+    return float(haversine_many(lat1, lon1, lat2, lon2))
 
 
-def find_shortest_tour(points):
+def find_shortest_tour(points, tier=DEFAULT_TIER, time_budget_ms=None, workers=None):
     """
-    Implementación simplificada del algoritmo del viajante de comercio (TSP)
-    usando una heurística greedy + 2-opt.
+    Algoritmo del viajante de comercio (TSP) como trayecto abierto desde el
+    primer punto: construcción greedy + búsqueda local del nivel `tier`
+    (2opt, oropt, 3opt o lk; ver `services.route_solver.RouteSolver`).
+    Si se indica `time_budget_ms`, retorna la mejor ruta hallada al agotarse.
+    Con `workers` se usa el multi-arranque paralelo (`solve_multistart`).
     
     Retorna [distancia_total, ruta_optimizada]
     """
     if not points or len(points) <= 1:
         return [0, points]
-    
-    n = len(points)
-    
-    # 1. Heurística greedy: comenzar desde el primer punto
-    tour = [0]  # Comenzar en el punto 0
-    unvisited = set(range(1, n))
-    
-    while unvisited:
-        current = tour[-1]
-        nearest = min(unvisited, key=lambda j: haversine_distance(
-            points[current][0], points[current][1],
-            points[j][0], points[j][1]
-        ))
-        tour.append(nearest)
-        unvisited.remove(nearest)
-    
-    # 2. Calcular distancia total
-    total_distance = 0
-    # Distancia como TRAYECTO (one-way): sumar solo aristas consecutivas sin volver al origen
-    for i in range(len(tour) - 1):
-        current = tour[i]
-        next_point = tour[i + 1]
-        total_distance += haversine_distance(
-            points[current][0], points[current][1],
-            points[next_point][0], points[next_point][1]
-        )
-    
-    # 3. Aplicar mejora 2-opt (opcional, pero mejora significativamente)
-    improved = True
-    iterations = 0
-    max_iterations = 100
-    
-    while improved and iterations < max_iterations:
-        improved = False
-        iterations += 1
-        
-        for i in range(n - 1):
-            for j in range(i + 2, n):
-                if j - i == 1:
-                    continue
-                
-                # Calcular el cambio de distancia si invertimos el segmento
-                curr_dist = (
-                    haversine_distance(points[tour[i]][0], points[tour[i]][1],
-                                      points[tour[i+1]][0], points[tour[i+1]][1]) +
-                    haversine_distance(points[tour[j]][0], points[tour[j]][1],
-                                      points[tour[(j+1) % n]][0], points[tour[(j+1) % n]][1])
-                )
-                
-                new_dist = (
-                    haversine_distance(points[tour[i]][0], points[tour[i]][1],
-                                      points[tour[j]][0], points[tour[j]][1]) +
-                    haversine_distance(points[tour[i+1]][0], points[tour[i+1]][1],
-                                      points[tour[(j+1) % n]][0], points[tour[(j+1) % n]][1])
-                )
-                
-                # Si es mejor, hacer el cambio
-                if new_dist < curr_dist:
-                    tour[i+1:j+1] = reversed(tour[i+1:j+1])
-                    # Actualizamos total_distance localmente (se recalculará exactamente al final)
-                    total_distance = total_distance - curr_dist + new_dist
-                    improved = True
-                    break
-            if improved:
-                break
-    
+
+    if workers:
+        distancia, tour = solve_multistart(points, workers=workers, time_budget_ms=time_budget_ms, tier=tier)
+        return [distancia, [points[i] for i in tour]]
+
+    solver = RouteSolver(points)
+    tour = solver.solve(tier=tier, time_budget_ms=time_budget_ms)
+
     # Convertir índices a coordenadas reales
     ruta_optimizada = [points[i] for i in tour]
+    return [solver.path_length(tour), ruta_optimizada]
+
+
+def find_shortest_path(points, tier=DEFAULT_TIER, time_budget_ms=None, exact=False, workers=None):
+    """
+    Igual que `find_shortest_tour` pero con ambos extremos fijos: la ruta
+    empieza en el primer punto (origen) y termina en el último (destino).
+    Los movimientos se evalúan sobre el trayecto abierto, sin arista de cierre.
+    Con `exact=True` se resuelve de forma óptima con Held–Karp; con `workers`,
+    con el multi-arranque paralelo.
+    
+    Retorna [distancia_total, ruta_optimizada]
+    """
+    if not points or len(points) <= 1:
+        return [0, points]
+
+    if workers and not exact:
+        distancia, tour = solve_multistart(points, workers=workers, time_budget_ms=time_budget_ms, tier=tier, fixed_end=True)
+        return [distancia, [points[i] for i in tour]]
+
+    solver = RouteSolver(points, fixed_end=True)
+    if exact:
+        tour = solver.solve_exact()
+    else:
+        tour = solver.solve(tier=tier, time_budget_ms=time_budget_ms)
+
+    ruta_optimizada = [points[i] for i in tour]
+    return [solver.path_length(tour), ruta_optimizada]
+
 
-    # Recalcular distancia exacta como suma de segmentos consecutivos (one-way)
-    total_distance = 0
-    for i in range(len(tour) - 1):
-        a = tour[i]
-        b = tour[i + 1]
-        total_distance += haversine_distance(points[a][0], points[a][1], points[b][0], points[b][1])
+def route_cache_key(origen, destino, restricciones, tier=DEFAULT_TIER, time_budget_ms=None, workers=None):
+    """
+    Clave canónica de una solicitud de ruta: coordenadas redondeadas y las
+    restricciones ordenadas (su orden de entrada no cambia la ruta óptima).
+    El presupuesto y los workers también forman parte: una ruta recortada por
+    un presupuesto bajo no debe servirse a quien pidió más tiempo.
+    """
+    def canon(p):
+        return (round(float(p[0]), ROUTE_CACHE_DECIMALS), round(float(p[1]), ROUTE_CACHE_DECIMALS))
 
-    return [total_distance, ruta_optimizada]
+    return (canon(origen), canon(destino), tuple(sorted(canon(p) for p in restricciones)), tier, time_budget_ms, workers)
 
 
-def optimize_route_wolfram(origen, destino, restricciones):
+def optimize_route_wolfram(origen, destino, restricciones, tier=DEFAULT_TIER, time_budget_ms=None, workers=None):
     """
     Simula OptimizeRoute de Wolfram usando Python puro.
-    Retorna un diccionario con el resultado.
+    Hasta `ROUTE_EXACT_MAX_POINTS` puntos usa Held–Karp (óptimo); por encima,
+    la heurística con `tier` y `time_budget_ms` (multi-arranque si `workers`).
+    Los resultados se guardan en `route_cache`; un acierto no ejecuta el solver.
+    Retorna un diccionario con el resultado, el motor usado y su duración.
     """
     try:
+        cache_key = route_cache_key(origen, destino, restricciones, tier, time_budget_ms, workers)
+        cached = route_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Ruta servida desde caché (%d puntos)", len(restricciones) + 2)
+            return dict(cached, Cache=True)
+
         # Construir lista de puntos: origen + restricciones + destino
         puntos_de_control = [origen] + restricciones + [destino]
         
         logger.info("Calculando ruta óptima para %d puntos", len(puntos_de_control))
         
-        # Encontrar la ruta más corta
-        distancia_total, ruta_final = find_shortest_tour(puntos_de_control)
+        # Encontrar la ruta más corta con origen y destino fijos
+        exact = len(puntos_de_control) <= ROUTE_EXACT_MAX_POINTS
+        if exact:
+            motor = "held-karp"
+        else:
+            motor = f"{tier}-multistart" if workers else tier
+        inicio = time.perf_counter()
+        distancia_total, ruta_final = find_shortest_path(puntos_de_control, tier=tier, time_budget_ms=time_budget_ms, exact=exact, workers=workers)
+        tiempo_ms = (time.perf_counter() - inicio) * 1000
         
-        logger.info("Ruta calculada: %.2f km", distancia_total)
+        logger.info("Ruta calculada: %.2f km (motor=%s, %.2f ms)", distancia_total, motor, tiempo_ms)
         
         # Retornar resultado en formato compatible
-        return {
+        resultado = {
             "Status": "Optimizado con Éxito",
             "RutaTotalKM": round(distancia_total, 2),
             "RutaOptimizada": ruta_final,
+            "Motor": motor,
+            "TiempoMs": round(tiempo_ms, 3),
+            "Cache": False,
             "Mensaje": "Ruta calculada con éxito. Listo para el análisis de IA."
         }
+        route_cache.set(cache_key, resultado)
+        return dict(resultado)
         
     except Exception as e:
         logger.error("ERROR calculando ruta: %s", e)
@@ -216,21 +252,148 @@ def optimize_route_wolfram(origen, destino, restricciones):
 # 3. SISTEMA DE MONITOREO OPENSKY (Simulador + API Real)
 # ===================================================================
 
+# Intervalo (s) del sondeo en segundo plano de OpenSky
+OPENSKY_POLL_INTERVAL = float(os.environ.get("OPENSKY_POLL_INTERVAL", "10"))
+# Parsear /states/all de forma incremental (recomendado con OPENSKY_BOUNDS amplios)
+OPENSKY_STREAM = os.environ.get("OPENSKY_STREAM", "1") == "1"
+# Versiones hacia atrás para las que `/api/vuelos?since=` aún puede responder con un delta
+FLIGHT_DELTA_HISTORY = int(os.environ.get("FLIGHT_DELTA_HISTORY", "60"))
+# Época de esta ejecución: las versiones se reinician con el proceso, así que
+# viajan como "<época>-<versión>" y un `since` de otra ejecución no se confunde
+FLIGHT_VERSION_EPOCH = uuid.uuid4().hex[:12]
+# Separación mínima (km, 3D) entre dos vuelos antes de reportar conflicto
+CONFLICT_DISTANCE_KM = 5.0
+# Horizonte (s) de la predicción de conflictos por punto de máximo acercamiento
+CONFLICT_HORIZON_S = float(os.environ.get("CONFLICT_HORIZON_S", DEFAULT_HORIZON_S))
+# Memoria de conflictos activos: TTL (s), histéresis en ciclos y tamaño máximo
+CONFLICT_STORE_TTL = float(os.environ.get("CONFLICT_STORE_TTL", "3600"))
+CONFLICT_ENTER_TICKS = int(os.environ.get("CONFLICT_ENTER_TICKS", "1"))
+CONFLICT_EXIT_TICKS = int(os.environ.get("CONFLICT_EXIT_TICKS", "3"))
+CONFLICT_STORE_MAXSIZE = int(os.environ.get("CONFLICT_STORE_MAXSIZE", "10000"))
+# Archivo JSON opcional con las zonas de restricción (círculos y/o polígonos, ver services/zone_index.py)
+CONFLICT_ZONES_PATH = os.environ.get("CONFLICT_ZONES_PATH")
+# Segundos que un vuelo ausente de la respuesta de OpenSky se conserva en la tabla
+FLIGHT_STALE_S = float(os.environ.get("FLIGHT_STALE_S", "0"))
+
+# Histórico de posiciones en disco (services/track_store.py). Con TRACK_STORE_RECORD=1
+# cada sondeo real de OpenSky se agrega al almacén; las trayectorias se ingieren con
+# POST /api/tracks/ingest y se consultan con GET /api/tracks sin gastar créditos.
+TRACK_STORE_PATH = data_path(os.environ.get("TRACK_STORE_PATH", "data/tracks"))
+TRACK_STORE_RECORD = os.environ.get("TRACK_STORE_RECORD", "0") == "1"
+TRACK_STORE_CHUNK_ROWS = int(os.environ.get("TRACK_STORE_CHUNK_ROWS", CHUNK_ROWS))
+TRACK_STORE_FLUSH_S = float(os.environ.get("TRACK_STORE_FLUSH_S", "300"))
+_track_store = None
+_track_store_lock = Lock()
+
+
+def get_track_store():
+    """Almacén de trayectorias, creado (y su directorio escaneado) en el primer uso."""
+    global _track_store
+    with _track_store_lock:
+        if _track_store is None:
+            _track_store = TrackStore(TRACK_STORE_PATH, chunk_rows=TRACK_STORE_CHUNK_ROWS,
+                                      flush_interval_s=TRACK_STORE_FLUSH_S)
+            # El búfer pendiente se vuelca al terminar el proceso
+            atexit.register(_track_store.flush)
+        return _track_store
+
+
+
+def _parse_opensky_bounds(value):
+    """Bboxes de OPENSKY_BOUNDS (``lat_min,lon_min,lat_max,lon_max``, varios
+    separados por ';') en el orden de OpenSkyApi: (lat_min, lat_max, lon_min, lon_max).
+    Las entradas mal formadas se ignoran; si no queda ninguna se usa el bbox por defecto."""
+    bboxes = []
+    for part in value.split(";"):
+        bounds = part.split(",")
+        if len(bounds) != 4:
+            continue
+        try:
+            lat_min, lon_min, lat_max, lon_max = (float(b) for b in bounds)
+        except ValueError:
+            continue
+        bboxes.append((lat_min, lat_max, lon_min, lon_max))
+    return bboxes or [(18.0, 21.0, -100.0, -98.0)]
+
+
 class FlightMonitor:
-    """Sistema de monitoreo de tráfico aéreo con detección de conflictos."""
+    """Sistema de monitoreo de tráfico aéreo con detección de conflictos.
+
+    Un hilo en segundo plano (`start_polling`) consulta OpenSky cada
+    `poll_interval` segundos, detecta conflictos y publica el resultado en
+    una instantánea compartida (`snapshot`). Los endpoints solo leen esa
+    instantánea, así la carga hacia OpenSky no depende del número de clientes.
+    Cada instantánea incluye además el diff respecto a la anterior, que los
+    clientes suscritos (`wait_for_update`) reciben por push.
+
+    `version` solo avanza cuando algo cambió (vuelos, conflictos o alertas), y
+    cada vuelo guarda la versión en la que cambió por última vez; con eso
+    `delta_since` responde qué cambió desde una versión dada.
+
+    El estado de vuelos vive en una tabla columnar (`self.table`, ver
+    services/flight_table.py) que se actualiza en sitio por icao24; cada
+    instantánea publica una copia de esa tabla.
+    """
     
-    def __init__(self):
-        self.flights = []
-        self.conflict_zones = [
+    def __init__(self, poll_interval=OPENSKY_POLL_INTERVAL):
+        self.table = FlightTable()
+        self.known_conflicts = ConflictStore(
+            ttl=CONFLICT_STORE_TTL,
+            enter_ticks=CONFLICT_ENTER_TICKS,
+            exit_ticks=CONFLICT_EXIT_TICKS,
+            maxsize=CONFLICT_STORE_MAXSIZE,
+        )
+        self.set_conflict_zones([
             {"lat": 19.5, "lon": -99.5, "radius": 15, "name": "CDMX Centro"},
             {"lat": 19.4, "lon": -99.3, "radius": 10, "name": "Zona Este"}
-        ]
-        self.known_conflicts = set()
+        ])
+        if CONFLICT_ZONES_PATH:
+            self.load_conflict_zones(CONFLICT_ZONES_PATH)
+        self.poll_interval = poll_interval
+        # Cliente OpenSky persistente: conserva el estado de rate-limit entre sondeos
+        self._client = None
+        self._async_client = None
+        self._snapshot = {
+            "table": FlightTable(), "conflicts": [], "predicted": [], "alerts": [], "updated_at": None,
+            "tick": 0, "version": 0, "tombstones": (),
+        }
+        self._poll_lock = Lock()
+        self._start_lock = Lock()
+        self._update_cond = Condition()
+        self._poll_thread = None
+        self._stop_event = Event()
         self._generate_mock_flights()
     
+    def set_conflict_zones(self, zones):
+        """Reemplaza las zonas de restricción y reconstruye su índice espacial."""
+        self._zone_index = ZoneIndex(zones)
+        self.conflict_zones = zones
+        # Las claves vuelo-zona usan el índice de la zona, que deja de ser válido
+        self.known_conflicts.clear()
+
+    def load_conflict_zones(self, path):
+        """Carga masiva de zonas desde un archivo JSON (lista de zonas)."""
+        try:
+            with open(path, encoding="utf-8") as fh:
+                zones = json.load(fh)
+            self.set_conflict_zones(zones)
+            logger.info("Zonas de restricción: %d cargadas de %s", len(zones), path)
+        except (OSError, ValueError) as e:
+            logger.error("No se pudieron cargar las zonas de %s: %s", path, e)
+
+    @property
+    def flights(self):
+        """Vuelos actuales como lista de dicts (compatibilidad; usar `table`)."""
+        return self.table.to_records()
+
+    def _upsert_records(self, records, version=0):
+        """Inserta/actualiza en la tabla una lista de dicts de vuelo."""
+        columns = {name: [r.get(name) for r in records] for name in NUMERIC_COLUMNS + TEXT_COLUMNS}
+        return self.table.upsert_many([r.get('icao24') for r in records], version=version, **columns)
+
     def _generate_mock_flights(self):
         """Genera vuelos simulados para demo."""
-        self.flights = [
+        self._upsert_records([
             {
                 "icao24": "a0a1b2c3",
                 "callsign": "AM456",
@@ -279,145 +442,336 @@ class FlightMonitor:
                 "origin": "CDMX",
                 "destination": "TOLUCA"
             }
-        ]
+        ])
     
-    def fetch_opensky_data(self):
+    def opensky_client(self):
+        """Cliente OpenSky persistente (credenciales OPENSKY_CLIENT_ID/SECRET)."""
+        if self._client is None:
+            from services.opensky_api import OpenSkyApi
+            self._client = OpenSkyApi(username=os.environ.get("OPENSKY_CLIENT_ID"), password=os.environ.get("OPENSKY_CLIENT_SECRET"))
+        return self._client
+
+    def opensky_async_client(self):
+        """Cliente asyncio sobre `opensky_client` (misma sesión y estado de rate-limit)."""
+        if self._async_client is None:
+            from services.opensky_async import AsyncOpenSkyApi
+            self._async_client = AsyncOpenSkyApi(api=self.opensky_client())
+        return self._async_client
+
+    def fetch_opensky_data(self, version=None):
         """Fetch real OpenSky data (usa OpenSky API si hay credenciales; si no, simula).
 
+        Actualiza `self.table` en sitio; las filas nuevas o modificadas quedan
+        marcadas con `version` (por defecto, la siguiente a la instantánea actual).
+
         Intento de comportamiento:
         1. Si existen `OPENSKY_CLIENT_ID` y `OPENSKY_CLIENT_SECRET` en el entorno,
            intenta llamar a `services.opensky_api.get_flights(...)` con el bounding box
-           definido en `OPENSKY_BOUNDS` o el por defecto.
+           definido en `OPENSKY_BOUNDS` o el por defecto (con varios bboxes, en paralelo).
         2. Si falla la llamada real por cualquier motivo, cae al modo simulación
            (movimiento aleatorio de vuelos mock) para mantener la demo funcional.
         """
+        version = self._snapshot["version"] + 1 if version is None else version
         try:
             # Si están disponibles las credenciales, intentar fetch real
             if os.environ.get("OPENSKY_CLIENT_ID") and os.environ.get("OPENSKY_CLIENT_SECRET"):
                 try:
                     # Use the OpenSkyApi class from the bundled client library
-                    from services.opensky_api import OpenSkyApi
-
-                    # OPENSKY_BOUNDS esperado: lat_min,lon_min,lat_max,lon_max
-                    bounds = os.environ.get("OPENSKY_BOUNDS", "18.0,-100.0,21.0,-98.0").split(",")
-                    if len(bounds) == 4:
-                        lat_min = float(bounds[0])
-                        lon_min = float(bounds[1])
-                        lat_max = float(bounds[2])
-                        lon_max = float(bounds[3])
+                    from services.opensky_api import OpenSkyStates
+
+                    # OPENSKY_BOUNDS esperado: lat_min,lon_min,lat_max,lon_max (varios separados por ';')
+                    bboxes = _parse_opensky_bounds(os.environ.get("OPENSKY_BOUNDS", "18.0,-100.0,21.0,-98.0"))
+
+                    client = self.opensky_client()
+
+                    bbox = bboxes[0]
+                    if len(bboxes) > 1:
+                        # Varios bboxes: se consultan en paralelo y se unen las filas (sin duplicar icao24)
+                        async_client = self.opensky_async_client()
+                        results = async_client.run(async_client.get_states_many(
+                            bboxes, time_secs=0, stream=True, raw=True, return_exceptions=True))
+                        if all(isinstance(rows, RateLimitExceeded) for rows in results):
+                            raise results[0]
+                        merged = {}
+                        for box, rows in zip(bboxes, results):
+                            if isinstance(rows, Exception) or rows is None:
+                                logger.warning("OpenSky: bbox %s sin datos (%s)", box, rows)
+                                continue
+                            merged.update((row[0], row) for row in rows)
+                        states_obj = OpenSkyStates({"states": list(merged.values())}) if merged else None
+                    elif OPENSKY_STREAM:
+                        # Parseo incremental: no se retiene el cuerpo completo de la respuesta
+                        rows = client.get_states(time_secs=0, bbox=bbox, stream=True, raw=True)
+                        states_obj = OpenSkyStates({"states": list(rows)}) if rows is not None else None
                     else:
-                        lat_min, lon_min, lat_max, lon_max = 18.0, -100.0, 21.0, -98.0
-
-                    client = OpenSkyApi(username=os.environ.get("OPENSKY_CLIENT_ID"), password=os.environ.get("OPENSKY_CLIENT_SECRET"))
-
-                    # Note: OpenSkyApi.get_states expects bbox as (min_lat, max_lat, min_lon, max_lon)
-                    states_obj = client.get_states(time_secs=0, bbox=(lat_min, lat_max, lon_min, lon_max))
-
-                    flights = []
-                    if states_obj and getattr(states_obj, 'states', None):
-                        for sv in states_obj.states:
+                        states_obj = client.get_states(time_secs=0, bbox=bbox)
+
+                    # Columnas decodificadas directamente de la respuesta (sin StateVector ni dicts)
+                    cols = states_obj.to_arrays([
+                        "icao24", "callsign", "origin_country", "time_position", "last_contact", "longitude",
+                        "latitude", "baro_altitude", "geo_altitude", "on_ground", "velocity", "true_track",
+                    ]) if states_obj else {}
+                    icao24s = cols["icao24"].tolist() if cols else []
+
+                    if icao24s:
+                        now = time.time()
+                        n = len(icao24s)
+                        geo_alt = cols["geo_altitude"]
+                        alt = np.where(np.isnan(geo_alt) | (geo_alt == 0), cols["baro_altitude"], geo_alt)
+                        # velocity from OpenSky is m/s; keep as-is or convert as needed
+                        self.table.upsert_many(
+                            icao24s, version=version, now=now,
+                            callsign=cols["callsign"], lat=cols["latitude"], lon=cols["longitude"],
+                            alt=alt, velocity=cols["velocity"], heading=cols["true_track"],
+                            type=["desconocido"] * n, origin=cols["origin_country"], destination=[None] * n,
+                        )
+                        if TRACK_STORE_RECORD:
+                            # Un fallo del histórico (disco lleno, permisos...) no debe tumbar los datos reales
                             try:
-                                lat = getattr(sv, 'latitude', None)
-                                lon = getattr(sv, 'longitude', None)
-                                alt = getattr(sv, 'geo_altitude', None) or getattr(sv, 'baro_altitude', None)
-                                velocity = getattr(sv, 'velocity', None)
-                                # velocity from OpenSky is m/s; keep as-is or convert as needed
-                                flights.append({
-                                    "icao24": getattr(sv, 'icao24', None),
-                                    "callsign": getattr(sv, 'callsign', None),
-                                    "lat": lat,
-                                    "lon": lon,
-                                    "alt": alt,
-                                    "velocity": velocity,
-                                    "heading": getattr(sv, 'true_track', None),
-                                    "type": "desconocido",
-                                    "origin": getattr(sv, 'origin_country', None),
-                                    "destination": None,
-                                })
-                            except Exception:
-                                continue
-
-                    if flights:
-                        self.flights = flights
-                        logger.info("OpenSky: fetched %d flights", len(self.flights))
-                        return self.flights
+                                position_time = cols["time_position"]
+                                get_track_store().append(
+                                    icao24s,
+                                    np.where(np.isnan(position_time), cols["last_contact"], position_time),
+                                    cols["latitude"], cols["longitude"], alts=alt,
+                                    velocities=cols["velocity"], headings=cols["true_track"], on_ground=cols["on_ground"],
+                                )
+                            except Exception as e:
+                                logger.warning("Track store: no se pudo grabar el sondeo: %s", e)
+                        # Los vuelos que ya no reporta OpenSky (ni los simulados) se descartan
+                        self.table.drop_stale(now - FLIGHT_STALE_S)
+                        logger.info("OpenSky: fetched %d flights", n)
+                        return self.table
+                except RateLimitExceeded as e:
+                    # Sin turno en el limitador: se conservan los últimos datos reales (no es un cielo vacío)
+                    logger.warning("OpenSky: %s; se conservan los datos del sondeo anterior", e)
+                    return self.table
                 except Exception as e:
                     logger.warning("OpenSky real fetch failed, falling back to mock: %s", e)
 
             # Fallback: simulación local (mantener comportamiento anterior)
-            for flight in self.flights:
-                # Simular movimiento
-                flight["lat"] += random.uniform(-0.02, 0.02)
-                flight["lon"] += random.uniform(-0.02, 0.02)
-                # Ajustar altitud con un pequeño delta
-                try:
-                    flight["alt"] = (flight.get("alt") or 3000) + random.randint(-100, 100)
-                except Exception:
-                    flight["alt"] = flight.get("alt", 3000)
-
-            logger.info(f"Monitoreo (mock): {len(self.flights)} vuelos activos en CDMX")
-            return self.flights
+            table = self.table
+            n = len(table)
+            # Simular movimiento y ajustar altitud con un pequeño delta
+            alt = table.column("alt")
+            table.update_rows(
+                np.arange(n), version=version,
+                lat=table.column("lat") + np.random.uniform(-0.02, 0.02, n),
+                lon=table.column("lon") + np.random.uniform(-0.02, 0.02, n),
+                alt=np.where(np.isnan(alt), 3000, alt) + np.random.randint(-100, 101, n),
+            )
+
+            logger.info(f"Monitoreo (mock): {n} vuelos activos en CDMX")
+            return self.table
         except Exception as e:
             logger.error("Error fetching OpenSky (general): %s", e)
-            return []
+            return self.table
     
+    def poll_once(self):
+        """Un ciclo de ingesta: actualiza vuelos, detecta conflictos y publica la instantánea."""
+        with self._poll_lock:
+            prev = self._snapshot
+            pending = prev["version"] + 1
+            self.fetch_opensky_data(version=pending)
+            conflicts, alerts = self.detect_conflicts()
+            table = self.table.copy()
+            predicted = self.predicted_conflicts(table)
+            tick = prev["tick"] + 1
+            added, moved, removed = self._diff_flights(prev["table"], table, pending)
+
+            changed = (len(added) or len(moved) or removed or alerts or conflicts != prev["conflicts"]
+                       or predicted != prev["predicted"])
+            # Sin cambios no se marcó ninguna fila con `pending`, así que la versión se conserva
+            version = pending if changed else prev["version"]
+            # Bajas recientes; las anteriores a la ventana de historial se descartan
+            tombstones = tuple(
+                entry for entry in prev["tombstones"] if entry[0] > version - FLIGHT_DELTA_HISTORY
+            ) + tuple((version, icao) for icao in removed)
+
+            snapshot = {
+                "table": table,
+                "conflicts": conflicts,
+                "predicted": predicted,
+                "alerts": alerts,
+                "updated_at": time.time(),
+                "tick": tick,
+                "version": version,
+                "tombstones": tombstones,
+                # Filas de `table` añadidas/modificadas en este ciclo e icao24 eliminados
+                "diff": {
+                    "tick": tick,
+                    "added": added,
+                    "moved": moved,
+                    "removed": removed,
+                },
+            }
+        with self._update_cond:
+            self._snapshot = snapshot
+            self._update_cond.notify_all()
+        return snapshot
+
+    @staticmethod
+    def _diff_flights(old_table, new_table, version):
+        """Filas añadidas y modificadas en `version`, e icao24 eliminados."""
+        stamped = np.nonzero(new_table.version[:len(new_table)] == version)[0]
+        is_new = np.array([new_table.icao24[row] not in old_table for row in stamped], dtype=bool)
+        removed = [icao for icao in old_table.index if icao not in new_table]
+        return stamped[is_new], stamped[~is_new], removed
+
+    def delta_since(self, since, snapshot=None):
+        """Filas cambiadas/añadidas e icao24 eliminados desde la versión `since`.
+
+        Retorna ``(rows, removed)`` o ``None`` si `since` queda fuera de la
+        ventana de historial y hace falta el estado completo. Las versiones de
+        otra ejecución se descartan antes, en `_parse_since`.
+        """
+        snapshot = snapshot or self._snapshot
+        version = snapshot["version"]
+        if since > version or since < version - FLIGHT_DELTA_HISTORY:
+            return None
+        table = snapshot["table"]
+        rows = np.nonzero(table.version[:len(table)] > since)[0]
+        removed = [icao for v, icao in snapshot["tombstones"] if v > since and icao not in table]
+        return rows, removed
+
+    def wait_for_update(self, tick, timeout=None):
+        """Bloquea hasta que haya una instantánea posterior a `tick` (o vence `timeout`)."""
+        with self._update_cond:
+            self._update_cond.wait_for(lambda: self._snapshot["tick"] > tick, timeout=timeout)
+            return self._snapshot
+
+    def snapshot(self):
+        """Última instantánea publicada (no se modifica: cada ciclo crea una nueva)."""
+        return self._snapshot
+
+    def start_polling(self):
+        """Arranca el hilo de sondeo (idempotente). El primer ciclo es síncrono
+        para que la primera lectura ya tenga datos."""
+        if self._poll_thread is not None:
+            return
+        with self._start_lock:
+            if self._poll_thread is not None:
+                return
+            self._stop_event.clear()
+            if self._snapshot["tick"] == 0:
+                self.poll_once()
+            self._poll_thread = Thread(target=self._poll_loop, name="opensky-poller", daemon=True)
+            self._poll_thread.start()
+        logger.info("Sondeo OpenSky en segundo plano cada %.1fs", self.poll_interval)
+
+    def stop_polling(self):
+        with self._start_lock:
+            self._stop_event.set()
+            self._poll_thread = None
+
+    def _poll_loop(self):
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error("Error en el sondeo de OpenSky: %s", e)
+
     def detect_conflicts(self):
         """Detecta conflictos entre vuelos y zonas de restricción."""
         conflicts = []
         alerts = []
         
+        table = self.table
+        if not len(table):
+            return conflicts, alerts
+
+        lats = table.column('lat')
+        lons = table.column('lon')
+        alts = table.column('alt')
+        icao24 = table.column('icao24')
+        callsign = table.column('callsign')
+
         # 1. Conflictos entre vuelos (proximidad)
-        for i in range(len(self.flights)):
-            for j in range(i + 1, len(self.flights)):
-                f1, f2 = self.flights[i], self.flights[j]
-                
-                # Calcular distancia 3D (lat, lon, altitud)
-                dist_horizontal = haversine_distance(
-                    f1['lat'], f1['lon'],
-                    f2['lat'], f2['lon']
-                )
-                dist_vertical = abs(f1['alt'] - f2['alt']) / 1000  # convertir a km
-                dist_3d = (dist_horizontal**2 + dist_vertical**2)**0.5
-                
-                # Si están a menos de 5 km en 3D, es un conflicto
-                if dist_3d < 5:
-                    conflict_id = f"{f1['icao24']}-{f2['icao24']}"
-                    if conflict_id not in self.known_conflicts:
-                        self.known_conflicts.add(conflict_id)
-                        conflicts.append({
-                            "type": "proximitad",
-                            "flight1": f1['callsign'],
-                            "flight2": f2['callsign'],
-                            "distance_km": round(dist_3d, 2),
-                            "severity": "crítica" if dist_3d < 2 else "alta"
-                        })
-                        alerts.append({
-                            "title": "⚠️ Conflicto de Proximidad",
-                            "message": f"{f1['callsign']} y {f2['callsign']} a {dist_3d:.1f} km",
-                            "severity": "danger"
-                        })
-        
+        # La rejilla solo devuelve pares en celdas vecinas; la distancia 3D nunca
+        # es menor que la horizontal, así que ningún conflicto queda fuera
+        pair_i, pair_j, dist_horizontal = GridIndex(lats, lons, CONFLICT_DISTANCE_KM).pairs_within()
+        dist_vertical = np.abs(alts[pair_i] - alts[pair_j]) / 1000  # convertir a km
+        dist_3d = np.sqrt(dist_horizontal**2 + dist_vertical**2)
+
+        # Si están a menos de 5 km en 3D, es un conflicto
+        store = self.known_conflicts
+        close = dist_3d < CONFLICT_DISTANCE_KM
+        pair_hits = [
+            (store.pair_key(icao24[i], icao24[j]), i, j, float(d))
+            for i, j, d in zip(pair_i[close], pair_j[close], dist_3d[close])
+        ]
+
         # 2. Conflictos en zonas de restricción
-        for flight in self.flights:
-            for zone in self.conflict_zones:
-                dist = haversine_distance(
-                    flight['lat'], flight['lon'],
-                    zone['lat'], zone['lon']
-                )
-                
-                if dist < zone['radius']:
-                    zone_id = f"{flight['icao24']}-{zone['name']}"
-                    if zone_id not in self.known_conflicts:
-                        self.known_conflicts.add(zone_id)
-                        severity_level = "crítica" if dist < zone['radius']/2 else "alta"
-                        alerts.append({
-                            "title": f"⚡ Zona Restringida: {zone['name']}",
-                            "message": f"{flight['callsign']} en zona de restricción",
-                            "severity": "warning" if severity_level == "alta" else "danger"
-                        })
+        if self._zone_index.zones is not self.conflict_zones:
+            # Alguien reasignó `conflict_zones` directamente
+            self.set_conflict_zones(self.conflict_zones)
+        zone_hits = []
+        if self.conflict_zones:
+            # Cada vuelo solo se prueba contra las zonas de su celda
+            zone_hits = [
+                (store.zone_key(icao24[i], k), i, k, float(dist))
+                for i, k, dist in zip(*self._zone_index.query(lats, lons))
+            ]
+
+        # Solo alertan los conflictos que acaban de entrar (con histéresis de salida)
+        entered = store.update([hit[0] for hit in pair_hits] + [hit[0] for hit in zone_hits])
+
+        for key, i, j, d in pair_hits:
+            if key not in entered:
+                continue
+            conflicts.append({
+                "type": "proximitad",
+                "flight1": callsign[i],
+                "flight2": callsign[j],
+                "distance_km": round(d, 2),
+                "severity": "crítica" if d < 2 else "alta"
+            })
+            alerts.append({
+                "title": "⚠️ Conflicto de Proximidad",
+                "message": f"{callsign[i]} y {callsign[j]} a {d:.1f} km",
+                "severity": "danger"
+            })
+
+        zone_radius = self._zone_index.radius
+        for key, i, k, dist in zone_hits:
+            if key not in entered:
+                continue
+            zone = self.conflict_zones[k]
+            severity_level = "crítica" if dist < zone_radius[k]/2 else "alta"
+            alerts.append({
+                "title": f"⚡ Zona Restringida: {zone['name']}",
+                "message": f"{callsign[i]} en zona de restricción",
+                "severity": "warning" if severity_level == "alta" else "danger"
+            })
         
         return conflicts, alerts
 
+    @staticmethod
+    def predicted_conflicts(table, horizon_s=None):
+        """Conflictos previstos dentro de `horizon_s` segundos proyectando rumbo y
+        velocidad (m/s) de cada vuelo de `table`; ordenados por tiempo hasta el conflicto."""
+        horizon_s = CONFLICT_HORIZON_S if horizon_s is None else horizon_s
+        if len(table) < 2:
+            return []
+
+        found = predict_conflicts(
+            table.column('lat'), table.column('lon'), table.column('alt'),
+            table.column('velocity'), table.column('heading'),
+            separation_km=CONFLICT_DISTANCE_KM, horizon_s=horizon_s,
+        )
+        callsign = table.column('callsign')
+        predicted = []
+        for i, j, t_in, t_cpa, d_cpa in zip(found["i"], found["j"], found["t_conflict_s"],
+                                            found["t_cpa_s"], found["d_cpa_km"]):
+            predicted.append({
+                "flight1": callsign[i],
+                "flight2": callsign[j],
+                "time_to_conflict_s": round(float(t_in), 1),
+                "time_to_cpa_s": round(float(t_cpa), 1),
+                "min_distance_km": round(float(d_cpa), 2),
+                "severity": "crítica" if t_in < 60 else "alta" if t_in < 180 else "media",
+            })
+        return predicted
+
 
 # Instancia global del monitor
 flight_monitor = FlightMonitor()
@@ -464,6 +818,12 @@ def call_gemini_analysis(route_data_str):
             "Formatea tu respuesta en un solo bloque de texto claro y profesional."
         )
     
+    # Solicitudes idénticas simultáneas (p. ej. varios dashboards) comparten una sola llamada
+    return upstream_calls.do(("openrouter-analysis", prompt_text), _gemini_analysis_remote, prompt_text)
+
+
+def _gemini_analysis_remote(prompt_text):
+    """Llamada a OpenRouter detrás de `call_gemini_analysis`."""
     try:
         headers = {
             "Authorization": f"Bearer {OPENROUTER_API_KEY}",
@@ -477,7 +837,7 @@ def call_gemini_analysis(route_data_str):
             ]
         }
 
-        response = requests.post(OPENROUTER_URL, headers=headers, json=payload, timeout=15)
+        response = get_session(OPENROUTER_URL).post(OPENROUTER_URL, headers=headers, json=payload, timeout=15)
         response.raise_for_status()
 
         # Defensive access: ensure expected structure
@@ -493,9 +853,42 @@ def call_gemini_analysis(route_data_str):
         return "Error en la llamada a OpenRouter: No se pudo obtener el análisis."
 
 
+# Caché persistente de geocodificación (SQLite, se precarga al iniciar)
+GEOCODE_CACHE_PATH = data_path(os.environ.get("GEOCODE_CACHE_PATH", "data/geocode_cache.sqlite3"))
+GEOCODE_CACHE_TTL = float(os.environ.get("GEOCODE_CACHE_TTL", str(30 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL = float(os.environ.get("GEOCODE_NEGATIVE_TTL", "600"))
+geocode_cache = GeocodeCache(GEOCODE_CACHE_PATH, ttl=GEOCODE_CACHE_TTL, negative_ttl=GEOCODE_NEGATIVE_TTL)
+
+
 def call_geocode_address(address):
     """
-    Usa OpenRouter / Gemini para convertir una dirección libre a coordenadas (lat, lon).
+    Convierte una dirección libre a coordenadas (lat, lon) pasando primero por
+    la caché persistente `geocode_cache` (clave normalizada: sin mayúsculas,
+    acentos ni espacios repetidos). Los fallos también se cachean con un TTL
+    corto para no repetir llamadas que ya sabemos que fallan. Si la misma
+    dirección ya se está resolviendo en otro hilo, se espera ese resultado.
+    Devuelve un tuple (lat, lon) como floats o None si falla.
+    """
+    cached = geocode_cache.get(address)
+    if cached is NEGATIVE:
+        return None
+    if cached is not None:
+        return cached
+
+    def resolve():
+        coords = _geocode_address_remote(address)
+        # Sin clave no hubo intento real: no registrar el fallo
+        if coords is not None or OPENROUTER_API_KEY:
+            geocode_cache.set(address, coords)
+        return coords
+
+    return upstream_calls.do(("geocode", normalize_address(address)), resolve)
+
+
+def _geocode_address_remote(address):
+    """
+    Usa OpenRouter / Gemini para convertir una dirección libre a coordenadas (lat, lon),
+    con Nominatim como respaldo.
     Devuelve un tuple (lat, lon) como floats o None si falla.
     """
     if not OPENROUTER_API_KEY:
@@ -521,7 +914,7 @@ def call_geocode_address(address):
                 "messages": [{"role": "user", "content": prompt}]
             }
 
-            resp = requests.post(OPENROUTER_URL, headers=headers, json=payload, timeout=15)
+            resp = get_session(OPENROUTER_URL).post(OPENROUTER_URL, headers=headers, json=payload, timeout=15)
             resp.raise_for_status()
 
             # OpenRouter devuelve JSON con choices[...] -> message.content
@@ -559,10 +952,9 @@ def call_geocode_address(address):
 
     # Si OpenRouter falla o no hay clave, usar Nominatim (OpenStreetMap) como fallback
     try:
-        nominatim_url = "https://nominatim.openstreetmap.org/search"
         params = { 'q': address, 'format': 'json', 'limit': 1 }
         headers = { 'User-Agent': 'TakeYouOff/1.0 (+https://example.org)' }
-        r = requests.get(nominatim_url, params=params, headers=headers, timeout=8)
+        r = get_session(NOMINATIM_URL).get(NOMINATIM_URL, params=params, headers=headers, timeout=8)
         r.raise_for_status()
         results = r.json()
         if results and isinstance(results, list) and len(results) > 0:
@@ -577,6 +969,172 @@ def call_geocode_address(address):
     return None
 
 
+# Resolución concurrente de direcciones: un pool de hilos compartido y un
+# plazo global por solicitud
+GEOCODE_MAX_WORKERS = int(os.environ.get("GEOCODE_MAX_WORKERS", "8"))
+GEOCODE_DEADLINE_S = float(os.environ.get("GEOCODE_DEADLINE_S", "20"))
+# Fracción del plazo que puede consumir el lote; el resto queda para las direcciones sueltas
+GEOCODE_BATCH_SHARE = min(1.0, max(0.0, float(os.environ.get("GEOCODE_BATCH_SHARE", "0.5"))))
+_geocode_executor = ThreadPoolExecutor(max_workers=GEOCODE_MAX_WORKERS, thread_name_prefix="geocode")
+
+
+def _parse_coords(val):
+    """Convierte [lat, lon], (lat, lon) o {'lat':.., 'lon':..} a [lat, lon]; None si no aplica."""
+    try:
+        if isinstance(val, (list, tuple)) and len(val) == 2:
+            return [float(val[0]), float(val[1])]
+    except Exception:
+        pass
+    try:
+        if isinstance(val, dict) and 'lat' in val and 'lon' in val:
+            return [float(val['lat']), float(val['lon'])]
+    except Exception:
+        pass
+    return None
+
+
+def _valid_latlon(lat, lon):
+    """True si lat/lon son números dentro de rango WGS-84."""
+    if isinstance(lat, bool) or isinstance(lon, bool):
+        return False
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return False
+    return -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def call_geocode_batch(addresses, timeout=30):
+    """
+    Geocodifica varias direcciones con UNA sola llamada a OpenRouter / Gemini,
+    pidiendo un arreglo JSON con un elemento por dirección (en el mismo orden).
+    Las direcciones ya presentes en `geocode_cache` no se envían.
+
+    Devuelve un dict {direccion: (lat, lon)} solo con las direcciones resueltas
+    y validadas; las que falten deben resolverse individualmente.
+    """
+    results = {}
+    to_query = []
+    for address in addresses:
+        cached = geocode_cache.get(address)
+        if cached is not None and cached is not NEGATIVE:
+            results[address] = cached
+        elif cached is None:
+            to_query.append(address)
+
+    if not to_query or not OPENROUTER_API_KEY:
+        return results
+
+    listado = "\n".join(f"{i}. {a}" for i, a in enumerate(to_query))
+    prompt = (
+        "Devuelve SOLO un arreglo JSON válido con un elemento por dirección, en el mismo orden.\n"
+        "Cada elemento es un objeto con las claves 'i' (índice), 'lat' y 'lon' (valores numéricos), "
+        "o `null` si no puedes geocodificar esa dirección.\n"
+        "Respuesta ejemplo: ```[{\"i\": 0, \"lat\": 19.4326, \"lon\": -99.1332}, null]```\n"
+        f"Direcciones a geocodificar:\n{listado}"
+    )
+
+    try:
+        headers = {
+            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "model": "google/gemini-2.5-pro",
+            "messages": [{"role": "user", "content": prompt}]
+        }
+
+        resp = get_session(OPENROUTER_URL).post(OPENROUTER_URL, headers=headers, json=payload, timeout=timeout)
+        resp.raise_for_status()
+
+        data = resp.json()
+        content = data['choices'][0]['message'].get('content', '') or ''
+        m = re.search(r"\[.*\]", content, re.DOTALL)
+        parsed = json.loads(m.group(0)) if m else None
+    except (requests.exceptions.RequestException, ValueError, KeyError, IndexError, TypeError) as e:
+        logger.warning("Geocodificación por lote falló (%d direcciones): %s", len(to_query), e)
+        return results
+
+    if not isinstance(parsed, list):
+        logger.warning("Geocodificación por lote: respuesta sin arreglo JSON.")
+        return results
+
+    for pos, item in enumerate(parsed):
+        if not isinstance(item, dict):
+            continue
+        idx = item.get('i', pos)
+        if isinstance(idx, bool) or not isinstance(idx, int) or not 0 <= idx < len(to_query):
+            continue
+        if not _valid_latlon(item.get('lat'), item.get('lon')):
+            continue
+        address = to_query[idx]
+        coords = (float(item['lat']), float(item['lon']))
+        results[address] = coords
+        geocode_cache.set(address, coords)
+
+    logger.info("Geocodificación por lote: %d/%d direcciones resueltas", len(results), len(addresses))
+    return results
+
+
+def resolve_locations(values, deadline_s=None):
+    """
+    Resuelve una lista de ubicaciones (coordenadas o direcciones) a [lat, lon].
+
+    Las coordenadas se convierten directamente. Las direcciones distintas
+    (cada una una sola vez, aunque se repitan con otras mayúsculas, acentos o
+    espacios) se envían primero en un único prompt por lote
+    (`call_geocode_batch`), que solo dispone de `GEOCODE_BATCH_SHARE` del plazo;
+    las que ese lote no resuelve se geocodifican individualmente, en paralelo
+    en el pool compartido, con lo que quede del plazo global `deadline_s`. Lo
+    que no termina a tiempo se devuelve como None (y sigue llenando la caché
+    en segundo plano).
+
+    Retorna una lista alineada con `values` con [lat, lon] o None.
+    """
+    deadline_s = GEOCODE_DEADLINE_S if deadline_s is None else deadline_s
+    deadline_at = time.monotonic() + deadline_s
+    resolved = [_parse_coords(v) for v in values]
+
+    # Clave normalizada -> primera forma en que aparece la dirección
+    keys = {}
+    for val, coords in zip(values, resolved):
+        if coords is None and isinstance(val, str) and val.strip():
+            keys.setdefault(normalize_address(val), val.strip())
+    addresses = list(keys.values())
+
+    if not addresses:
+        return resolved
+
+    results = {}
+    if len(addresses) > 1:
+        batch_s = deadline_s * GEOCODE_BATCH_SHARE
+        batch = _geocode_executor.submit(call_geocode_batch, addresses, timeout=max(batch_s, 0.1))
+        done, _ = wait([batch], timeout=batch_s)
+        if batch in done and batch.exception() is None:
+            results.update(batch.result())
+        else:
+            logger.warning("Geocodificación por lote no terminó a tiempo; se resuelve por dirección.")
+
+    pending = {
+        address: _geocode_executor.submit(call_geocode_address, address)
+        for address in addresses if address not in results
+    }
+    if pending:
+        done, not_done = wait(pending.values(), timeout=max(0.0, deadline_at - time.monotonic()))
+        if not_done:
+            logger.warning("Geocodificación: %d direcciones excedieron el plazo de %.1fs", len(not_done), deadline_s)
+        for address, future in pending.items():
+            if future in done and future.exception() is None and future.result():
+                results[address] = future.result()
+
+    for k, val in enumerate(values):
+        if resolved[k] is None and isinstance(val, str) and val.strip():
+            coords = results.get(keys[normalize_address(val)])
+            resolved[k] = [coords[0], coords[1]] if coords else None
+
+    return resolved
+
+
 # --- ElevenLabs API (Voz de Alerta) ---
 def call_elevenlabs_alert(message, save_to_file=False):
     """
@@ -655,29 +1213,28 @@ def optimize_route():
     destino_list = data.get('destino')
     restricciones = data.get('restricciones', [])
 
-    # Helper para convertir input variado (coords list/dict o dirección string) a [lat, lon]
-    def resolve_location(val):
-        # Si ya es lista/tupla con números
+    # Nivel de búsqueda local y presupuesto de tiempo opcionales
+    tier = data.get('tier') or DEFAULT_TIER
+    if tier not in TIERS:
+        return jsonify({"error": f"'tier' inválido. Opciones: {', '.join(TIERS)}."}), 400
+    time_budget_ms = data.get('time_budget_ms')
+    if time_budget_ms is not None:
         try:
-            if isinstance(val, (list, tuple)) and len(val) == 2:
-                return [float(val[0]), float(val[1])]
-        except Exception:
-            pass
-
-        # Si es dict {'lat':.., 'lon':..}
+            time_budget_ms = float(time_budget_ms)
+            if not math.isfinite(time_budget_ms) or time_budget_ms <= 0:
+                raise ValueError
+        except (ValueError, TypeError):
+            return jsonify({"error": "'time_budget_ms' debe ser un número positivo."}), 400
+        time_budget_ms = min(time_budget_ms, ROUTE_MAX_BUDGET_MS)
+    # Número de procesos para el multi-arranque paralelo (opcional)
+    workers = data.get('workers')
+    if workers is not None:
         try:
-            if isinstance(val, dict) and 'lat' in val and 'lon' in val:
-                return [float(val['lat']), float(val['lon'])]
-        except Exception:
-            pass
-
-        # Si es string, intentar geocodificar usando Gemini/OpenRouter
-        if isinstance(val, str) and val.strip():
-            coords = call_geocode_address(val.strip())
-            if coords:
-                return [coords[0], coords[1]]
-
-        return None
+            workers = int(workers)
+            if workers < 1:
+                raise ValueError
+        except (ValueError, TypeError):
+            return jsonify({"error": "'workers' debe ser un entero positivo."}), 400
 
     if DEV_MOCK:
         # Validación básica
@@ -711,9 +1268,12 @@ def optimize_route():
             except Exception:
                 return False
 
-        # Intentar resolver orígenes/destinos que pueden ser coordenadas o direcciones
-        origen_coords = resolve_location(origen_list)
-        destino_coords = resolve_location(destino_list)
+        # Resolver origen, destino y restricciones (coordenadas o direcciones)
+        # en un solo lote concurrente
+        restricciones_in = list(restricciones) if isinstance(restricciones, (list, tuple)) else []
+        origen_coords, destino_coords, *restricciones_coords = resolve_locations(
+            [origen_list, destino_list] + restricciones_in
+        )
 
         if not origen_coords or not destino_coords:
             return jsonify({"error": "No se pudieron resolver 'origen' o 'destino' a coordenadas válidas. Pueden ser listas [lat, lon] o direcciones."}), 400
@@ -721,15 +1281,9 @@ def optimize_route():
         # --- 5.1 LLAMADA AL MOTOR WOLFRAM (usando wolframscript) ---
         logger.info("Llamando a optimize_route_wolfram...")
 
-        # Resolver restricciones: pueden ser listas de coordenadas o direcciones
-        resolved_restrictions = []
-        if isinstance(restricciones, (list, tuple)):
-            for r in restricciones:
-                rc = resolve_location(r)
-                if rc:
-                    resolved_restrictions.append(rc)
+        resolved_restrictions = [rc for rc in restricciones_coords if rc]
         # Llamar al solver con coordenadas resueltas
-        wolfram_result = optimize_route_wolfram(origen_coords, destino_coords, resolved_restrictions)
+        wolfram_result = optimize_route_wolfram(origen_coords, destino_coords, resolved_restrictions, tier=tier, time_budget_ms=time_budget_ms, workers=workers)
         
         if wolfram_result is None:
             return jsonify({"error": "Motor Wolfram no respondió. Contacte al Modelador."}), 503
@@ -813,6 +1367,9 @@ def optimize_route():
             "analisis_ia_texto": gemini_analysis,
             "audio_alert_url": audio_alert_url,
             "audio_alert_data": audio_alert_data,
+            "motor_ruta": wolfram_result_dict.get('Motor'),
+            "tiempo_ruta_ms": wolfram_result_dict.get('TiempoMs'),
+            "ruta_en_cache": wolfram_result_dict.get('Cache', False),
             "analisis_simulacion": {"riesgo_alto": round(10 + len(restricciones) * 5 + ruta_km / 100), "riesgo_exito": round(90 - len(restricciones) * 5 - ruta_km / 100)} 
         })
 
@@ -826,38 +1383,394 @@ def health():
     return jsonify({"status": "ok", "dev_mock": DEV_MOCK})
 
 
+@app.route('/api/cache-stats', methods=['GET'])
+def cache_stats():
+    """Contadores de aciertos/fallos de las cachés del backend."""
+    return jsonify({
+        "status": "ok",
+        "route_cache": route_cache.stats(),
+        "geocode_cache": geocode_cache.stats(),
+        "conflict_store": flight_monitor.known_conflicts.stats(),
+        "opensky_rate_limit": opensky_limiter.stats(),
+        "upstream_singleflight": upstream_calls.stats(),
+        "track_store": _track_store.stats() if _track_store is not None else None
+    })
+
+
 # ===================================================================
 # 6. NUEVOS ENDPOINTS PARA OPTI-RUTA SKY (OpenSky Monitoring)
 # ===================================================================
 
+# Respuestas serializadas de /api/vuelos por (versión, since): el JSON de una
+# versión se codifica una sola vez aunque la consulten muchos dashboards
+vuelos_response_cache = TTLCache(maxsize=64, ttl=max(OPENSKY_POLL_INTERVAL * FLIGHT_DELTA_HISTORY, 60))
+
+
+def _version_token(version):
+    """Versión pública (ETag y campo `version`): época de la ejecución + contador."""
+    return f"{FLIGHT_VERSION_EPOCH}-{version}"
+
+
+def _parse_since(value):
+    """Versión local de un `since` recibido; None si es de otra ejecución.
+
+    Lanza ValueError si no tiene la forma ``<época>-<versión>`` (o un entero).
+    """
+    epoch, _, number = value.strip().rpartition("-")
+    number = int(number)
+    if epoch != FLIGHT_VERSION_EPOCH:
+        return None
+    return number
+
+
+def _dumps_with_raw(dumps, payload, **raw_json):
+    """Serializa `payload` con `dumps` y le agrega campos cuyo valor ya es JSON
+    (p. ej. los vuelos generados por `FlightTable.to_json`)."""
+    body = dumps(payload)
+    extra = ", ".join(f'"{key}": {value}' for key, value in raw_json.items())
+    if not extra:
+        return body
+    return body[:-1] + (", " if payload else "") + extra + "}"
+
+
 @app.route('/api/vuelos', methods=['GET'])
 def get_vuelos():
     """
     Endpoint de monitoreo OpenSky.
     Retorna vuelos activos en CDMX y detecta conflictos.
     Integración con el frontend para monitoreo en tiempo real.
+
+    Con `?since=<version>` responde solo los vuelos cambiados/añadidos y los
+    eliminados desde esa versión. La versión (``<época>-<contador>``) viaja en
+    el ETag, de modo que `If-None-Match` obtiene un 304 si no hubo cambios; una
+    versión de otra ejecución del servidor recibe el estado completo.
     """
+    since = request.args.get('since')
+    if since is not None:
+        try:
+            since = _parse_since(since)
+        except ValueError:
+            return jsonify({"error": "since debe ser una versión devuelta por este endpoint"}), 400
+
     try:
-        # Actualizar datos de vuelos
-        flight_monitor.fetch_opensky_data()
-        
-        # Detectar conflictos
-        conflicts, alerts = flight_monitor.detect_conflicts()
-        
+        # Los datos los actualiza el sondeo en segundo plano; aquí solo se leen
+        flight_monitor.start_polling()
+        snapshot = flight_monitor.snapshot()
+        version = snapshot["version"]
+        etag = _version_token(version)
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        cache_key = (snapshot["tick"], since)
+        body = vuelos_response_cache.get(cache_key)
+        if body is None:
+            delta = flight_monitor.delta_since(since, snapshot) if since is not None else None
+            payload = {
+                "status": "ok",
+                "version": etag,
+                "conflictos": snapshot["conflicts"],
+                "conflictos_previstos": snapshot["predicted"],
+                "alerts": snapshot["alerts"],
+                "total_vuelos": len(snapshot["table"]),
+                "total_conflictos": len(snapshot["conflicts"]),
+                "actualizado": snapshot["updated_at"]
+            }
+            # Los vuelos se serializan desde las columnas de la tabla
+            if delta is None:
+                payload["delta"] = False
+                rows = None
+            else:
+                rows, removed = delta
+                payload.update({"delta": True, "since": _version_token(since), "eliminados": removed})
+            body = _dumps_with_raw(app.json.dumps, payload, vuelos=snapshot["table"].to_json(rows))
+            vuelos_response_cache.set(cache_key, body)
+
+        response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+    
+    except Exception as e:
+        logger.error(f"Error en endpoint vuelos: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/predicted-conflicts', methods=['GET'])
+def get_predicted_conflicts():
+    """
+    Conflictos previstos (punto de máximo acercamiento) sobre la última
+    instantánea, ordenados por tiempo hasta el conflicto.
+    `?horizon_s=` permite recalcularlos con otro horizonte.
+    """
+    horizon_s = request.args.get('horizon_s')
+    if horizon_s is not None:
+        try:
+            horizon_s = float(horizon_s)
+            if not 0 < horizon_s <= 3600:
+                raise ValueError
+        except ValueError:
+            return jsonify({"error": "horizon_s debe ser un número entre 0 y 3600"}), 400
+
+    try:
+        flight_monitor.start_polling()
+        snapshot = flight_monitor.snapshot()
+        if horizon_s is None:
+            horizon_s = CONFLICT_HORIZON_S
+            predicted = snapshot["predicted"]
+        else:
+            predicted = flight_monitor.predicted_conflicts(snapshot["table"], horizon_s)
         return jsonify({
             "status": "ok",
-            "vuelos": flight_monitor.flights,
-            "conflictos": conflicts,
-            "alerts": alerts,
-            "total_vuelos": len(flight_monitor.flights),
-            "total_conflictos": len(conflicts)
+            "horizon_s": horizon_s,
+            "conflictos_previstos": predicted,
+            "total": len(predicted),
+            "actualizado": snapshot["updated_at"]
         })
-    
     except Exception as e:
-        logger.error(f"Error en endpoint vuelos: {e}")
+        logger.error(f"Error en endpoint conflictos previstos: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/airports/traffic', methods=['GET'])
+def get_airport_traffic():
+    """
+    Llegadas y salidas de varios aeropuertos en la ventana de las últimas
+    `hours` horas. Las consultas a OpenSky (dos por aeropuerto) se hacen en
+    paralelo con el cliente asyncio. `?airports=MMMX,MMUN` (códigos ICAO).
+    """
+    airports = [a.strip().upper() for a in request.args.get('airports', '').split(',') if a.strip()]
+    if not airports:
+        return jsonify({"error": "airports es requerido (códigos ICAO separados por coma)"}), 400
+    if len(airports) > 50:
+        return jsonify({"error": "máximo 50 aeropuertos por consulta"}), 400
+    try:
+        hours = float(request.args.get('hours', '2'))
+        if not 0 < hours <= 168:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "hours debe ser un número entre 0 y 168"}), 400
+    if not (os.environ.get("OPENSKY_CLIENT_ID") and os.environ.get("OPENSKY_CLIENT_SECRET")):
+        return jsonify({"error": "OpenSky requiere OPENSKY_CLIENT_ID y OPENSKY_CLIENT_SECRET para este endpoint"}), 503
+
+    try:
+        end = int(time.time())
+        begin = end - int(hours * 3600)
+        client = flight_monitor.opensky_async_client()
+        started = time.perf_counter()
+        traffic = client.run(client.get_airport_traffic(airports, begin, end))
+
+        def serialize(result):
+            if isinstance(result, Exception):
+                return {"error": str(result)}
+            return [flight.to_dict() for flight in result or []]
+
+        return jsonify({
+            "status": "ok",
+            "begin": begin,
+            "end": end,
+            "aeropuertos": {
+                airport: {kind: serialize(result) for kind, result in entry.items()}
+                for airport, entry in traffic.items()
+            },
+            "tiempo_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+    except Exception as e:
+        logger.error(f"Error en endpoint tráfico de aeropuertos: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+# Límites de las consultas e ingestas del histórico de trayectorias
+TRACK_QUERY_MAX_ROWS = 200000
+TRACK_INGEST_MAX_TRACKS = 50
+
+
+def _parse_epoch(value, name):
+    """Entero Unix (s) de un parámetro opcional; ValueError con mensaje si no lo es."""
+    if value is None or value == '':
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} debe ser un tiempo Unix en segundos")
+
+
+@app.route('/api/tracks', methods=['GET'])
+def get_tracks():
+    """
+    Posiciones históricas del almacén local (no consume créditos de OpenSky).
+    Filtros: `?icao24=a1b2c3,...` y/o ventana `?begin=&end=` (Unix s); al menos uno.
+    Cada aeronave trae sus puntos como [time, lat, lon, alt, velocity, heading, on_ground].
+    """
+    icao24 = [i.strip().lower() for i in request.args.get('icao24', '').split(',') if i.strip()] or None
+    try:
+        begin = _parse_epoch(request.args.get('begin'), 'begin')
+        end = _parse_epoch(request.args.get('end'), 'end')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if icao24 is None and begin is None and end is None:
+        return jsonify({"error": "se requiere icao24 o una ventana begin/end"}), 400
+
+    try:
+        started = time.perf_counter()
+        try:
+            cols = get_track_store().query(begin=begin, end=end, icao24=icao24, max_rows=TRACK_QUERY_MAX_ROWS)
+        except QueryTooLarge as e:
+            return jsonify({"error": f"{e}; acota la ventana o las aeronaves"}), 400
+        rows = len(cols["time"])
+
+        values = [cols["time"].tolist()] + [
+            [None if v != v else v for v in cols[name].tolist()]
+            for name in ("lat", "lon", "alt", "velocity", "heading")
+        ] + [cols["on_ground"].tolist()]
+        tracks = {}
+        for icao, point in zip(cols["icao24"].tolist(), zip(*values)):
+            tracks.setdefault(icao, []).append(point)
+        return jsonify({
+            "status": "ok",
+            "campos": ["time", "lat", "lon", "alt", "velocity", "heading", "on_ground"],
+            "trayectorias": tracks,
+            "total_puntos": rows,
+            "tiempo_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+    except Exception as e:
+        logger.error(f"Error en endpoint histórico de trayectorias: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/tracks/ingest', methods=['POST'])
+def ingest_tracks():
+    """
+    Descarga trayectorias de OpenSky y las guarda en el almacén local.
+
+    Body JSON, una de dos formas:
+    - `{"icao24": ["a1b2c3", ...], "time": 0}`: trayectoria de cada aeronave en ese instante (0 = en vuelo).
+    - `{"begin": t0, "end": t1}`: vuelos del intervalo (máx. 2 h) y la trayectoria de cada uno.
+    Las trayectorias (hasta TRACK_INGEST_MAX_TRACKS) se piden en paralelo.
+    """
+    data = request.get_json(silent=True) or {}
+    if not (os.environ.get("OPENSKY_CLIENT_ID") and os.environ.get("OPENSKY_CLIENT_SECRET")):
+        return jsonify({"error": "OpenSky requiere OPENSKY_CLIENT_ID y OPENSKY_CLIENT_SECRET para este endpoint"}), 503
+
+    try:
+        client = flight_monitor.opensky_async_client()
+        flights = None
+        if data.get('icao24'):
+            icao24s = data['icao24'] if isinstance(data['icao24'], list) else [data['icao24']]
+            t = _parse_epoch(data.get('time'), 'time') or 0
+            targets = [(str(i).strip().lower(), t) for i in icao24s]
+        else:
+            begin = _parse_epoch(data.get('begin'), 'begin')
+            end = _parse_epoch(data.get('end'), 'end')
+            if begin is None or end is None:
+                return jsonify({"error": "se requiere icao24 o begin y end"}), 400
+            flights = client.run(client.call("get_flights_from_interval", begin, end)) or []
+            targets = [(f.icao24, f.firstSeen) for f in flights]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RateLimitExceeded as e:
+        return jsonify({"error": str(e), "retry_after_s": round(e.wait_s, 1)}), 429
+
+    try:
+        targets = list(dict.fromkeys(targets))[:TRACK_INGEST_MAX_TRACKS]
+        started = time.perf_counter()
+        tracks = client.run(client.gather(
+            [("get_track_by_aircraft", {"icao24": icao, "t": t}) for icao, t in targets],
+            return_exceptions=True,
+        ))
+        rows = ingested = 0
+        errors = {}
+        for (icao, _), track in zip(targets, tracks):
+            if isinstance(track, Exception):
+                errors[icao] = str(track)
+            elif track is not None:
+                rows += get_track_store().append_track(track)
+                ingested += 1
+        # Sin flush: el buffer se vuelca por chunk_rows/flush_interval_s y no deja chunks diminutos
+        return jsonify({
+            "status": "ok",
+            "vuelos": len(flights) if flights is not None else None,
+            "trayectorias": ingested,
+            "filas": rows,
+            "errores": errors,
+            "almacen": get_track_store().stats(),
+            "tiempo_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+    except Exception as e:
+        logger.error(f"Error en endpoint ingesta de trayectorias: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+# Intervalo (s) de los comentarios keep-alive del stream SSE
+SSE_KEEPALIVE_S = float(os.environ.get("SSE_KEEPALIVE_S", "15"))
+
+
+def _sse_event(event, data, event_id=None):
+    """Serializa un evento Server-Sent Events (`data` ya en JSON)."""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {data}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _sse_payload(snapshot, kind):
+    """JSON del evento `snapshot` o `diff` de una instantánea; se genera una
+    sola vez por ciclo y se comparte entre todos los clientes conectados."""
+    cache_key = ("sse", kind, snapshot["tick"])
+    data = vuelos_response_cache.get(cache_key)
+    if data is not None:
+        return data
+
+    dumps = partial(json.dumps, ensure_ascii=False)
+    table = snapshot["table"]
+    payload = {"epoch": FLIGHT_VERSION_EPOCH, "tick": snapshot["tick"],
+               "conflictos": snapshot["conflicts"], "alerts": snapshot["alerts"]}
+    if kind == "snapshot":
+        data = _dumps_with_raw(dumps, payload, vuelos=table.to_json())
+    else:
+        diff = snapshot["diff"]
+        payload["removed"] = diff["removed"]
+        data = _dumps_with_raw(dumps, payload, added=table.to_json(diff["added"]), moved=table.to_json(diff["moved"]))
+    vuelos_response_cache.set(cache_key, data)
+    return data
+
+
+@app.route('/api/vuelos/stream', methods=['GET'])
+def stream_vuelos():
+    """
+    Stream Server-Sent Events del monitoreo OpenSky.
+    Envía primero un evento `snapshot` con el estado completo y después un
+    evento `diff` por cada ciclo de sondeo (vuelos añadidos, movidos y
+    eliminados + conflictos/alertas nuevos). Si el cliente se atrasa más de
+    un ciclo, recibe de nuevo un `snapshot` completo.
+    """
+    flight_monitor.start_polling()
+
+    def events():
+        snapshot = flight_monitor.snapshot()
+        tick = snapshot["tick"]
+        yield _sse_event("snapshot", _sse_payload(snapshot, "snapshot"), tick)
+        while True:
+            snapshot = flight_monitor.wait_for_update(tick, timeout=SSE_KEEPALIVE_S)
+            if snapshot["tick"] == tick:
+                yield ": keepalive\n\n"
+                continue
+            if snapshot["tick"] == tick + 1:
+                yield _sse_event("diff", _sse_payload(snapshot, "diff"), snapshot["tick"])
+            else:
+                yield _sse_event("snapshot", _sse_payload(snapshot, "snapshot"), snapshot["tick"])
+            tick = snapshot["tick"]
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.route('/api/conflict-analysis', methods=['POST'])
 def analyze_conflict():
     """
@@ -932,32 +1845,14 @@ def emergency_route():
         if not flight_position or not destination:
             return jsonify({"error": "flight_position y destination requeridos"}), 400
 
-        # Resolver posibles direcciones a coordenadas
-        def _resolve(val):
-            try:
-                if isinstance(val, (list, tuple)) and len(val) == 2:
-                    return [float(val[0]), float(val[1])]
-            except Exception:
-                pass
-            if isinstance(val, str):
-                coords = call_geocode_address(val)
-                if coords:
-                    return [coords[0], coords[1]]
-            return None
-
-        fp_coords = _resolve(flight_position)
-        dst_coords = _resolve(destination)
+        # Resolver posibles direcciones a coordenadas (en paralelo)
+        zones_in = list(restricted_zones) if isinstance(restricted_zones, (list, tuple)) else []
+        fp_coords, dst_coords, *zones_coords = resolve_locations([flight_position, destination] + zones_in)
 
         if not fp_coords or not dst_coords:
             return jsonify({"error": "No se pudieron resolver flight_position o destination a coordenadas válidas."}), 400
 
-        # Resolver restricciones si hay
-        resolved_restrictions = []
-        if isinstance(restricted_zones, (list, tuple)):
-            for r in restricted_zones:
-                rc = _resolve(r)
-                if rc:
-                    resolved_restrictions.append(rc)
+        resolved_restrictions = [rc for rc in zones_coords if rc]
 
         # Usar el mismo solver que optimize-route
         result = optimize_route_wolfram(fp_coords, dst_coords, resolved_restrictions)
@@ -973,6 +1868,8 @@ def emergency_route():
             "status": "success",
             "emergency_route": result['RutaOptimizada'],
             "total_km": result['RutaTotalKM'],
+            "engine": result['Motor'],
+            "engine_ms": result['TiempoMs'],
             "audio_alert": None,
             "audio_alert_data": audio_data,
             "timestamp": str(__import__('datetime').datetime.now())
@@ -987,12 +1884,16 @@ def emergency_route():
 def get_statistics():
     """Estadísticas del sistema para dashboard."""
     try:
-        total_flights = len(flight_monitor.flights)
-        cargo_flights = len([f for f in flight_monitor.flights if f['type'] == 'carga'])
+        # Igual que /api/vuelos: solo la instantánea publicada, nunca la tabla en edición
+        flight_monitor.start_polling()
+        table = flight_monitor.snapshot()["table"]
+        total_flights = len(table)
+        cargo_flights = int(np.count_nonzero(table.column('type') == 'carga'))
         passenger_flights = total_flights - cargo_flights
         
-        # Calcular altitud promedio
-        avg_alt = sum(f['alt'] for f in flight_monitor.flights) / total_flights if total_flights > 0 else 0
+        # Calcular altitud promedio (sobre la columna, ignorando altitudes ausentes)
+        alts = table.column('alt')
+        avg_alt = float(np.nanmean(alts)) if np.isfinite(alts).any() else 0
         
         return jsonify({
             "status": "ok",
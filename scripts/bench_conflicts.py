@@ -0,0 +1,59 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root is on sys.path so `import services` works when running this script
+proj_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(proj_root))
+
+from services.cpa import DEFAULT_HORIZON_S, predict_conflicts
+from services.geodesy import pairwise_distance_matrix
+from services.spatial_index import GridIndex
+
+SIZES = [10, 100, 1000, 5000, 10000]
+# La matriz densa n×n deja de caber en memoria razonable por encima de esto
+DENSE_MAX = 5000
+THRESHOLD_KM = 5.0
+REPEATS = 3
+
+rng = np.random.default_rng(42)
+
+
+def best_of(fn):
+    elapsed = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed.append((time.perf_counter() - t0) * 1000)
+    return result, min(elapsed)
+
+
+print(f"{'n':>6} {'pairs':>8} {'grid ms':>9} {'dense ms':>9} {'cpa':>6} {'cpa ms':>9}")
+for n in SIZES:
+    # Tráfico repartido sobre el bbox de México (aprox. la densidad de un país completo)
+    lats = rng.uniform(14.0, 33.0, n)
+    lons = rng.uniform(-118.0, -86.0, n)
+    alts = rng.uniform(3000.0, 12000.0, n)
+    velocities = rng.uniform(100.0, 250.0, n)  # m/s
+    headings = rng.uniform(0.0, 360.0, n)
+
+    (i, _, _), grid_ms = best_of(lambda: GridIndex(lats, lons, THRESHOLD_KM).pairs_within())
+
+    dense = "-"
+    if n <= DENSE_MAX:
+        def dense_pairs():
+            d = pairwise_distance_matrix(np.column_stack((lats, lons)))
+            return np.nonzero(np.triu(d < THRESHOLD_KM, k=1))
+
+        (di, _), dense_ms = best_of(dense_pairs)
+        assert len(di) == len(i), "la rejilla debe encontrar los mismos pares"
+        dense = f"{dense_ms:.2f}"
+
+    predicted, cpa_ms = best_of(lambda: predict_conflicts(
+        lats, lons, alts, velocities, headings, THRESHOLD_KM, DEFAULT_HORIZON_S))
+
+    print(f"{n:>6} {len(i):>8} {grid_ms:>9.2f} {dense:>9} {len(predicted['i']):>6} {cpa_ms:>9.2f}")
+
+print('\nBenchmark finished.')
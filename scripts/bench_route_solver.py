@@ -0,0 +1,44 @@
+import random
+import sys
+import time
+from pathlib import Path
+
+# Ensure project root is on sys.path so `import services` works when running this script
+proj_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(proj_root))
+
+from services.route_solver import EXACT_MAX_POINTS, TIERS, RouteSolver
+
+SIZES = [10, 50, 100, 200, 500]
+BUDGETS_MS = [None, 50]
+REPEATS = 3
+
+random.seed(42)
+
+print(f"{'n':>5} {'tier':>6} {'budget':>7} {'km':>10} {'vs greedy':>10} {'ms':>9}")
+for n in SIZES:
+    # Puntos aleatorios en la zona CDMX / Bajío
+    points = [[random.uniform(18.0, 21.0), random.uniform(-100.0, -98.0)] for _ in range(n)]
+    solver = RouteSolver(points)
+    greedy_km = solver.path_length(solver.nearest_neighbor_tour(0))
+
+    for tier in TIERS:
+        for budget in BUDGETS_MS:
+            elapsed = []
+            for _ in range(REPEATS):
+                t0 = time.perf_counter()
+                tour = solver.solve(tier=tier, time_budget_ms=budget)
+                elapsed.append((time.perf_counter() - t0) * 1000)
+            km = solver.path_length(tour)
+            print(f"{n:>5} {tier:>6} {str(budget or '-'):>7} {km:>10.2f} "
+                  f"{100 * (km - greedy_km) / greedy_km:>9.1f}% {min(elapsed):>9.2f}")
+
+    if n <= EXACT_MAX_POINTS:
+        t0 = time.perf_counter()
+        tour = solver.solve_exact()
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        km = solver.path_length(tour)
+        print(f"{n:>5} {'exact':>6} {'-':>7} {km:>10.2f} "
+              f"{100 * (km - greedy_km) / greedy_km:>9.1f}% {elapsed_ms:>9.2f}")
+
+print('\nBenchmark finished.')
@@ -0,0 +1,66 @@
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root is on sys.path so `import services` works when running this script
+proj_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(proj_root))
+
+from services.track_store import TrackStore
+
+AIRCRAFT = 5000
+TICKS = 200          # sondeos de 10 s (≈ 33 min de tráfico)
+CHUNK_ROWS = 1 << 18
+T0 = 1_700_000_000
+
+rng = np.random.default_rng(42)
+icao24s = [f"{0x0d0000 + k:06x}" for k in range(AIRCRAFT)]
+lats = rng.uniform(14.0, 33.0, AIRCRAFT)
+lons = rng.uniform(-118.0, -86.0, AIRCRAFT)
+alts = rng.uniform(3000.0, 12000.0, AIRCRAFT)
+velocities = rng.uniform(100.0, 250.0, AIRCRAFT)
+headings = rng.uniform(0.0, 360.0, AIRCRAFT)
+step_lat = velocities * 10 * np.cos(np.radians(headings)) / 111_195.0
+step_lon = velocities * 10 * np.sin(np.radians(headings)) / 111_195.0
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - t0) * 1000
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    store = TrackStore(tmp, chunk_rows=CHUNK_ROWS, flush_interval_s=float("inf"))
+
+    t0 = time.perf_counter()
+    for tick in range(TICKS):
+        store.append(icao24s, np.full(AIRCRAFT, T0 + 10 * tick), lats + tick * step_lat, lons + tick * step_lon,
+                     alts=alts, velocities=velocities, headings=headings)
+    store.flush()
+    ingest_s = time.perf_counter() - t0
+    stats = store.stats()
+    print(f"ingesta: {stats['rows']} filas en {ingest_s:.2f} s ({stats['rows'] / ingest_s:,.0f} filas/s), "
+          f"{stats['chunks']} chunks")
+    print(f"disco: {stats['bytes_per_row']} bytes/fila (sin codificar: {stats['raw_bytes_per_row']})")
+
+    reopened = TrackStore(tmp)
+    queries = [
+        ("1 aeronave, todo el rango", dict(icao24=icao24s[1234])),
+        ("10 aeronaves, 5 min", dict(icao24=icao24s[:10], begin=T0 + 600, end=T0 + 900)),
+        ("todas, 1 min", dict(begin=T0 + 1200, end=T0 + 1260)),
+        ("todas, todo el rango", dict()),
+    ]
+    print(f"{'consulta':<28} {'filas':>9} {'ms':>9}")
+    for name, kwargs in queries:
+        cols, ms = timed(lambda: reopened.query(**kwargs))
+        print(f"{name:<28} {len(cols['time']):>9} {ms:>9.2f}")
+
+    cols = reopened.query(icao24=icao24s[0])
+    err = np.abs(cols["lat"] - (lats[0] + np.arange(TICKS) * step_lat[0])).max()
+    assert err < 1e-5, "la cuantización debe conservar ~1 m de precisión"
+
+print('\nBenchmark finished.')
@@ -0,0 +1,186 @@
+"""
+Memoria acotada de conflictos activos (vuelo-vuelo y vuelo-zona).
+Archivo: services/conflict_store.py
+
+Sustituye al conjunto de cadenas ``"icao-icao"`` que solo crecía. Cada
+conflicto se identifica con una clave entera compacta y pasa por una
+histéresis de entrada/salida contada en ciclos de sondeo:
+
+* entra (y genera alerta) tras ``enter_ticks`` observaciones seguidas;
+* sale tras ``exit_ticks`` ciclos seguidos sin observarse, de modo que un par
+  que vuelve a entrar en conflicto horas después vuelve a alertar;
+* un conflicto que persiste más de ``ttl`` segundos vuelve a alertar (un
+  recordatorio por cada ``ttl`` seguido en conflicto);
+* las entradas no vistas en ``ttl`` segundos expiran en la siguiente operación
+  aunque no se hayan contado ``exit_ticks`` ciclos (p. ej. si el sondeo se
+  detuvo) y el total se limita a ``maxsize`` (LRU).
+
+Los identificadores internados de icao24 no hexadecimales se liberan junto
+con las entradas que los usaban.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Los icao24 reales son direcciones de 24 bits; los identificadores internados
+# (p. ej. vuelos simulados) se numeran a partir de aquí para no colisionar
+_INTERNED_BASE = 1 << 24
+_ZONE_FLAG = 1 << 31
+
+
+class ConflictStore:
+    """Conjunto de conflictos activos con histéresis, TTL y tamaño máximo.
+
+    :param float ttl: segundos sin observarse tras los que una entrada expira,
+        y segundos en conflicto continuo tras los que se repite la alerta.
+    :param int enter_ticks: observaciones seguidas necesarias para activar.
+    :param int exit_ticks: ciclos seguidos sin observarse para desactivar.
+    :param int maxsize: máximo de entradas; se desalojan las menos recientes.
+    """
+
+    def __init__(self, ttl=3600.0, enter_ticks=1, exit_ticks=3, maxsize=10000):
+        self.ttl = ttl
+        self.enter_ticks = max(1, enter_ticks)
+        self.exit_ticks = max(1, exit_ticks)
+        self.maxsize = maxsize
+        # clave -> [observaciones seguidas, ciclos sin observar, activo, último visto, última alerta]
+        # (en orden de último visto: las más antiguas al principio)
+        self._entries = OrderedDict()
+        self._interned = {}
+        self._next_interned = _INTERNED_BASE
+        self._lock = threading.Lock()
+        self.inserts = 0
+        self.entered = 0
+        self.exited = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.reminders = 0
+
+    def flight_id(self, icao24):
+        """Entero compacto de un icao24 (su valor hexadecimal si es válido)."""
+        icao24 = str(icao24)
+        # int(x, 16) también acepta "-1", "0x1f", "a_b" o espacios: chocarían con icao24 reales
+        if re.fullmatch(r"[0-9a-fA-F]{1,6}", icao24):
+            return int(icao24, 16)
+        with self._lock:
+            ident = self._interned.get(icao24)
+            if ident is None:
+                ident = self._interned[icao24] = self._next_interned
+                self._next_interned += 1
+            return ident
+
+    def pair_key(self, icao1, icao2):
+        """Clave de un conflicto entre dos vuelos (independiente del orden)."""
+        a, b = self.flight_id(icao1), self.flight_id(icao2)
+        if a > b:
+            a, b = b, a
+        return (a << 32) | b
+
+    def zone_key(self, icao24, zone_idx):
+        """Clave de un vuelo dentro de la zona ``zone_idx``."""
+        return (self.flight_id(icao24) << 32) | _ZONE_FLAG | int(zone_idx)
+
+    def update(self, keys, now=None):
+        """Registra los conflictos observados en un ciclo.
+
+        :param keys: claves observadas en este ciclo.
+        :return: set de claves que deben alertar: las que acaban de entrar y
+            las activas que llevan ``ttl`` segundos sin repetir la alerta.
+        """
+        now = time.monotonic() if now is None else now
+        keys = set(keys)
+        entered = set()
+        with self._lock:
+            self._expire_locked(now)
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = [0, 0, False, now, None]
+                    self.inserts += 1
+                else:
+                    self._entries.move_to_end(key)
+                entry[0] += 1
+                entry[1] = 0
+                entry[3] = now
+                if not entry[2] and entry[0] >= self.enter_ticks:
+                    entry[2] = True
+                    entry[4] = now
+                    self.entered += 1
+                    entered.add(key)
+                elif entry[2] and entry[4] <= now - self.ttl:
+                    entry[4] = now
+                    self.reminders += 1
+                    entered.add(key)
+
+            for key, entry in list(self._entries.items()):
+                if key in keys:
+                    continue
+                entry[0] = 0
+                entry[1] += 1
+                if entry[1] >= self.exit_ticks:
+                    del self._entries[key]
+                    self.exited += entry[2]
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._prune_interned_locked()
+        return entered
+
+    def _expire_locked(self, now):
+        # El orden del OrderedDict es el de último visto: basta mirar el principio
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[3] > now - self.ttl:
+                break
+            del self._entries[key]
+            self.expirations += 1
+
+    def _prune_interned_locked(self):
+        # Cada entrada usa como mucho dos identificadores: se reconstruye solo
+        # cuando los internados superan con holgura a los que pueden estar en uso
+        if len(self._interned) <= 2 * len(self._entries) + 1024:
+            return
+        live = set()
+        for key in self._entries:
+            live.add(key >> 32)
+            if not key & _ZONE_FLAG:
+                live.add(key & 0xFFFFFFFF)
+        self._interned = {name: ident for name, ident in self._interned.items() if ident in live}
+
+    def __contains__(self, key):
+        with self._lock:
+            self._expire_locked(time.monotonic())
+            entry = self._entries.get(key)
+            return entry is not None and entry[2]
+
+    def __len__(self):
+        with self._lock:
+            self._expire_locked(time.monotonic())
+            return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._interned.clear()
+
+    def stats(self):
+        """Contadores de uso para monitoreo."""
+        with self._lock:
+            self._expire_locked(time.monotonic())
+            return {
+                "size": len(self._entries),
+                "interned": len(self._interned),
+                "active": sum(1 for entry in self._entries.values() if entry[2]),
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl,
+                "enter_ticks": self.enter_ticks,
+                "exit_ticks": self.exit_ticks,
+                "entered": self.entered,
+                "exited": self.exited,
+                "expirations": self.expirations,
+                "reminders": self.reminders,
+                "evictions": self.evictions,
+                "eviction_rate": round(self.evictions / self.inserts, 4) if self.inserts else 0.0,
+            }
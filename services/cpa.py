@@ -0,0 +1,97 @@
+"""
+Predicción de conflictos por punto de máximo acercamiento (CPA).
+Archivo: services/cpa.py
+
+Cada aeronave se proyecta en línea recta con su rumbo y velocidad actuales
+(altitud constante) durante un horizonte de tiempo. Para cada par candidato se
+calcula, en un plano local equirectangular centrado en el par, el instante y la
+distancia de mínima separación y el instante en que la separación 3D cae por
+debajo del umbral. Los candidatos salen de la rejilla de `spatial_index`: solo
+pares que, a velocidad máxima de cierre, pueden acercarse dentro del horizonte.
+"""
+import numpy as np
+
+from services.spatial_index import KM_PER_DEG_LAT, GridIndex
+
+# Horizonte de predicción por defecto (s)
+DEFAULT_HORIZON_S = 300.0
+
+
+def predict_conflicts(lats, lons, alts, velocities, headings, separation_km, horizon_s=DEFAULT_HORIZON_S):
+    """Pares que perderán la separación mínima dentro de `horizon_s`.
+
+    :param lats, lons: posición en grados.
+    :param alts: altitud en metros.
+    :param velocities: velocidad sobre el suelo en m/s (la unidad de OpenSky).
+    :param headings: rumbo verdadero en grados (0 = norte, sentido horario).
+        Velocidad o rumbo ausentes (NaN) se tratan como aeronave detenida.
+    :param float separation_km: separación 3D mínima.
+    :param float horizon_s: horizonte de proyección en segundos.
+    :return: dict de arrays ``i, j, t_conflict_s, t_cpa_s, d_cpa_km`` ordenados
+        por tiempo hasta el conflicto (0 si ya están en conflicto).
+    """
+    lats = np.asarray(lats, dtype=float).ravel()
+    lons = np.asarray(lons, dtype=float).ravel()
+    alts = np.asarray(alts, dtype=float).ravel()
+    speed = np.nan_to_num(np.asarray(velocities, dtype=float).ravel()) / 1000.0  # km/s
+    heading = np.radians(np.nan_to_num(np.asarray(headings, dtype=float).ravel()))
+    # Velocidad en el plano local (km/s): x hacia el este, y hacia el norte
+    vel_x = speed * np.sin(heading)
+    vel_y = speed * np.cos(heading)
+
+    # Prefiltro: distancia actual alcanzable con la velocidad de cierre máxima
+    max_speed = float(np.max(np.abs(speed), initial=0.0))
+    index = GridIndex(lats, lons, separation_km + 2 * max_speed * horizon_s)
+    # Arrays sobre los puntos válidos del índice (los bloques usan esas posiciones)
+    alts, speed, vel_x, vel_y = (arr[index.ids] for arr in (alts, speed, vel_x, vel_y))
+
+    found = {key: [] for key in ("i", "j", "t_conflict_s", "t_cpa_s", "d_cpa_km")}
+    for a, b in index.candidate_blocks():
+        dz = np.abs(alts[a] - alts[b]) / 1000.0
+        keep = dz < separation_km  # NaN de altitud también queda fuera
+        a, b, dz = a[keep], b[keep], dz[keep]
+
+        # Plano local por par (km)
+        km_per_deg_lon = KM_PER_DEG_LAT * np.cos(np.radians((index.lats[a] + index.lats[b]) / 2))
+        px = (index.lons[b] - index.lons[a]) * km_per_deg_lon
+        py = (index.lats[b] - index.lats[a]) * KM_PER_DEG_LAT
+        c = px * px + py * py
+        # Alcance propio del par: descarta los que no pueden acercarse a tiempo
+        reach = separation_km + (speed[a] + speed[b]) * horizon_s
+        keep = c < reach * reach
+        a, b, dz, px, py, c = a[keep], b[keep], dz[keep], px[keep], py[keep], c[keep]
+
+        vx = vel_x[b] - vel_x[a]
+        vy = vel_y[b] - vel_y[a]
+        # |p + v t|^2 = qa t^2 + 2 qb t + c
+        qa = vx * vx + vy * vy
+        qb = px * vx + py * vy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_cpa = np.where(qa > 0, np.clip(-qb / qa, 0.0, horizon_s), 0.0)
+        d_cpa2 = np.maximum(qa * t_cpa**2 + 2 * qb * t_cpa + c, 0.0)
+
+        # Separación horizontal que, sumada a la vertical, da el umbral 3D
+        sep_h2 = separation_km**2 - dz**2
+        hit = d_cpa2 < sep_h2
+        if not hit.any():
+            continue
+        qa, qb, c, sep_h2 = qa[hit], qb[hit], c[hit], sep_h2[hit]
+        # Primer instante en que |p + v t|^2 = sep_h2 (raíz menor de la cuadrática)
+        disc = np.maximum(qb * qb - qa * (c - sep_h2), 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_in = np.where(c < sep_h2, 0.0, (-qb - np.sqrt(disc)) / qa)
+
+        i, j = index.to_original(a[hit], b[hit])
+        found["i"].append(i)
+        found["j"].append(j)
+        found["t_conflict_s"].append(t_in)
+        found["t_cpa_s"].append(t_cpa[hit])
+        found["d_cpa_km"].append(np.sqrt(d_cpa2[hit] + dz[hit] ** 2))
+
+    if not found["i"]:
+        empty = np.empty(0)
+        return {"i": empty.astype(np.int64), "j": empty.astype(np.int64),
+                "t_conflict_s": empty, "t_cpa_s": empty, "d_cpa_km": empty}
+    result = {key: np.concatenate(parts) for key, parts in found.items()}
+    order = np.lexsort((result["t_cpa_s"], result["t_conflict_s"]))
+    return {key: arr[order] for key, arr in result.items()}
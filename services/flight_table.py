@@ -0,0 +1,220 @@
+"""
+Tabla columnar (struct-of-arrays) del estado de vuelos.
+Archivo: services/flight_table.py
+
+En lugar de una lista de dicts reconstruida en cada sondeo, cada campo es una
+columna: NumPy ``float64`` para los numéricos y arrays de objetos con cadenas
+internadas para los textos. Un índice ``icao24 -> fila`` permite actualizar en
+sitio; cada fila guarda la versión en la que cambió por última vez y el
+instante en que se vio por última vez (para descartar vuelos obsoletos).
+
+El JSON se genera directamente desde las columnas (:meth:`FlightTable.to_json`)
+sin construir un dict por vuelo.
+"""
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+NUMERIC_COLUMNS = ("lat", "lon", "alt", "velocity", "heading")
+TEXT_COLUMNS = ("callsign", "type", "origin", "destination")
+# Orden de los campos en la salida (el mismo de los dicts de vuelo anteriores)
+COLUMNS = ("icao24", "callsign", "lat", "lon", "alt", "velocity", "heading", "type", "origin", "destination")
+
+_ROW_TEMPLATE = "{" + ", ".join(f'"{name}": %s' for name in COLUMNS) + "}"
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _json_number(value):
+    if math.isfinite(value):
+        return int(value) if value.is_integer() and abs(value) < 1e15 else value
+    return None
+
+
+class FlightTable:
+    """Estado de vuelos en columnas, con upserts por icao24.
+
+    :param int capacity: filas reservadas inicialmente (crece al doble).
+    """
+
+    def __init__(self, capacity=64):
+        self.size = 0
+        self.index = {}
+        self._capacity = max(1, capacity)
+        self.icao24 = np.empty(self._capacity, dtype=object)
+        self.numeric = {name: np.full(self._capacity, np.nan) for name in NUMERIC_COLUMNS}
+        self.text = {name: np.full(self._capacity, None, dtype=object) for name in TEXT_COLUMNS}
+        self.version = np.zeros(self._capacity, dtype=np.int64)
+        self.last_seen = np.zeros(self._capacity)
+        # Representación JSON de cada cadena internada (se repiten mucho)
+        self._json_strings = {}
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, icao24):
+        return icao24 in self.index
+
+    def column(self, name):
+        """Vista (sin copia) de una columna sobre las filas ocupadas."""
+        if name == "icao24":
+            return self.icao24[:self.size]
+        if name in self.numeric:
+            return self.numeric[name][:self.size]
+        return self.text[name][:self.size]
+
+    def _grow(self, needed):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self._capacity:
+            return
+
+        def resize(arr, fill):
+            out = np.full(capacity, fill, dtype=arr.dtype)
+            out[:self.size] = arr[:self.size]
+            return out
+
+        self.icao24 = resize(self.icao24, None)
+        self.numeric = {name: resize(arr, np.nan) for name, arr in self.numeric.items()}
+        self.text = {name: resize(arr, None) for name, arr in self.text.items()}
+        self.version = resize(self.version, 0)
+        self.last_seen = resize(self.last_seen, 0.0)
+        self._capacity = capacity
+
+    def upsert_many(self, icao24s, version=0, now=None, **columns):
+        """Inserta o actualiza en bloque las filas de ``icao24s``.
+
+        :param columns: una secuencia por columna (``lat=[...]``, ``callsign=[...]``);
+            las columnas omitidas conservan su valor en filas existentes.
+        :param int version: versión que se asigna a las filas nuevas o modificadas.
+        :return: array de filas afectadas, en el orden de ``icao24s``.
+        """
+        now = time.time() if now is None else now
+        rows = np.empty(len(icao24s), dtype=np.int64)
+        is_new = np.zeros(len(icao24s), dtype=bool)
+        for k, icao24 in enumerate(icao24s):
+            row = self.index.get(icao24)
+            if row is None:
+                if self.size == self._capacity:
+                    self._grow(self.size + 1)
+                row = self.size
+                self.size += 1
+                self.index[icao24] = row
+                self.icao24[row] = _intern(icao24)
+                is_new[k] = True
+            rows[k] = row
+
+        changed = is_new.copy()
+        for name, values in columns.items():
+            if name in self.numeric:
+                new = np.asarray(values, dtype=float)  # None -> NaN
+                old = self.numeric[name][rows]
+                changed |= ~((old == new) | (np.isnan(old) & np.isnan(new)))
+                self.numeric[name][rows] = new
+            elif name in self.text:
+                new = np.empty(len(rows), dtype=object)
+                new[:] = [_intern(v) for v in values]
+                changed |= self.text[name][rows] != new
+                self.text[name][rows] = new
+            else:
+                raise KeyError(f"Columna desconocida: {name}")
+
+        self.version[rows[changed]] = version
+        self.last_seen[rows] = now
+        return rows
+
+    def update_rows(self, rows, version=0, now=None, **columns):
+        """Actualiza columnas numéricas de filas ya existentes (vectorizado)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        changed = np.zeros(len(rows), dtype=bool)
+        for name, values in columns.items():
+            new = np.asarray(values, dtype=float)
+            old = self.numeric[name][rows]
+            changed |= ~((old == new) | (np.isnan(old) & np.isnan(new)))
+            self.numeric[name][rows] = new
+        self.version[rows[changed]] = version
+        self.last_seen[rows] = time.time() if now is None else now
+
+    def drop_stale(self, cutoff):
+        """Elimina las filas no vistas desde ``cutoff``; retorna sus icao24."""
+        stale = self.last_seen[:self.size] < cutoff
+        if not stale.any():
+            return []
+        removed = self.icao24[:self.size][stale].tolist()
+        keep = np.nonzero(~stale)[0]
+        n = len(keep)
+        self.icao24[:n] = self.icao24[keep]
+        self.icao24[n:self.size] = None
+        for arr in self.numeric.values():
+            arr[:n] = arr[keep]
+            arr[n:self.size] = np.nan
+        for arr in self.text.values():
+            arr[:n] = arr[keep]
+            arr[n:self.size] = None
+        self.version[:n] = self.version[keep]
+        self.last_seen[:n] = self.last_seen[keep]
+        self.size = n
+        self.index = {icao24: row for row, icao24 in enumerate(self.icao24[:n])}
+        return removed
+
+    def copy(self):
+        """Copia independiente (se usa como instantánea inmutable)."""
+        other = FlightTable.__new__(FlightTable)
+        other.size = self.size
+        other._capacity = max(1, self.size)
+        other.index = dict(self.index)
+        other.icao24 = self.icao24[:other._capacity].copy()
+        other.numeric = {name: arr[:other._capacity].copy() for name, arr in self.numeric.items()}
+        other.text = {name: arr[:other._capacity].copy() for name, arr in self.text.items()}
+        other.version = self.version[:other._capacity].copy()
+        other.last_seen = self.last_seen[:other._capacity].copy()
+        other._json_strings = self._json_strings
+        return other
+
+    def rows_for(self, icao24s):
+        """Filas de los icao24 dados (los ausentes se omiten)."""
+        return np.array([self.index[i] for i in icao24s if i in self.index], dtype=np.int64)
+
+    def _value_columns(self, rows):
+        """Listas de valores Python por columna (en el orden de COLUMNS)."""
+        out = []
+        for name in COLUMNS:
+            if name in self.numeric:
+                out.append([_json_number(v) for v in self.numeric[name][rows].tolist()])
+            elif name == "icao24":
+                out.append(self.icao24[rows].tolist())
+            else:
+                out.append(self.text[name][rows].tolist())
+        return out
+
+    def to_records(self, rows=None):
+        """Filas como lista de dicts (para diffs pequeños o compatibilidad)."""
+        rows = np.arange(self.size) if rows is None else np.asarray(rows, dtype=np.int64)
+        return [dict(zip(COLUMNS, values)) for values in zip(*self._value_columns(rows))]
+
+    def _encode(self, value):
+        encoded = self._json_strings.get(value)
+        if encoded is None:
+            encoded = json.dumps(value, ensure_ascii=False)
+            if isinstance(value, str) and len(self._json_strings) < 100000:
+                self._json_strings[value] = encoded
+        return encoded
+
+    def to_json(self, rows=None):
+        """Arreglo JSON de vuelos construido columna a columna."""
+        rows = np.arange(self.size) if rows is None else np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return "[]"
+        encoded = []
+        for name, values in zip(COLUMNS, self._value_columns(rows)):
+            if name in self.numeric:
+                encoded.append(["null" if v is None else repr(v) for v in values])
+            else:
+                encoded.append([self._encode(v) for v in values])
+        return "[" + ", ".join(_ROW_TEMPLATE % fields for fields in zip(*encoded)) + "]"
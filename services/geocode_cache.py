@@ -0,0 +1,126 @@
+"""
+Caché persistente de geocodificación (SQLite).
+Archivo: services/geocode_cache.py
+
+Las direcciones se normalizan (minúsculas, sin acentos, espacios colapsados)
+antes de usarse como clave. Se guardan tanto resultados exitosos como fallos
+(caché negativa, con un TTL más corto). Al iniciar se cargan en memoria todas
+las entradas vigentes, de modo que las lecturas no tocan el disco.
+"""
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Marcador para direcciones que ya fallaron (caché negativa)
+NEGATIVE = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocode (
+    key TEXT PRIMARY KEY,
+    lat REAL,
+    lon REAL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+def normalize_address(address):
+    """Clave canónica de una dirección: casefold, sin acentos y espacios colapsados."""
+    text = unicodedata.normalize("NFKD", str(address).casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class GeocodeCache:
+    """Caché de direcciones -> (lat, lon) respaldada por SQLite.
+
+    :param path: archivo SQLite (se crea si no existe).
+    :param float ttl: vigencia en segundos de un resultado exitoso.
+    :param float negative_ttl: vigencia en segundos de un fallo.
+    """
+
+    def __init__(self, path, ttl=30 * 24 * 3600, negative_ttl=600):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._memory = {}
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._warm_up()
+
+    def _warm_up(self):
+        """Carga en memoria las entradas vigentes y purga las expiradas."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM geocode WHERE expires_at <= ?", (now,))
+            self._conn.commit()
+            rows = self._conn.execute("SELECT key, lat, lon, expires_at FROM geocode").fetchall()
+            self._memory = {key: (expires_at, lat, lon) for key, lat, lon, expires_at in rows}
+        logger.info("Caché de geocodificación: %d entradas cargadas de %s", len(rows), self.path)
+
+    def get(self, address):
+        """Retorna ``(lat, lon)``, ``NEGATIVE`` si la dirección falló
+        recientemente, o ``None`` si no hay entrada vigente."""
+        key = normalize_address(address)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._memory[key]
+                self.misses += 1
+                return None
+            _, lat, lon = entry
+            if lat is None or lon is None:
+                self.negative_hits += 1
+                return NEGATIVE
+            self.hits += 1
+            return lat, lon
+
+    def set(self, address, coords):
+        """Guarda ``coords`` (tuple lat, lon) o ``None`` para registrar un fallo."""
+        key = normalize_address(address)
+        if coords is None:
+            lat = lon = None
+            expires_at = time.time() + self.negative_ttl
+        else:
+            lat, lon = float(coords[0]), float(coords[1])
+            expires_at = time.time() + self.ttl
+        with self._lock:
+            self._memory[key] = (expires_at, lat, lon)
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO geocode (key, lat, lon, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, lat, lon, expires_at),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                # La copia en memoria sigue siendo válida aunque falle el disco
+                logger.warning("No se pudo persistir geocodificación '%s': %s", key, e)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "size": len(self._memory),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+                "ttl_s": self.ttl,
+                "negative_ttl_s": self.negative_ttl,
+                "path": str(self.path),
+            }
@@ -0,0 +1,43 @@
+"""
+Utilidades geodésicas vectorizadas (NumPy).
+Archivo: services/geodesy.py
+
+Todas las funciones trabajan en kilómetros y grados decimales (WGS-84) y
+aceptan escalares, listas o arrays; se aplica broadcasting de NumPy.
+"""
+import numpy as np
+
+# Radio medio de la Tierra en km (el mismo que usaba app.haversine_distance)
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_many(lats1, lons1, lats2, lons2):
+    """Distancia haversine en km entre pares de puntos (con broadcasting).
+
+    Las coordenadas ausentes (None) se convierten a NaN y producen NaN,
+    de modo que cualquier comparación posterior (``< umbral``) es False.
+    """
+    lat1 = np.radians(np.asarray(lats1, dtype=float))
+    lon1 = np.radians(np.asarray(lons1, dtype=float))
+    lat2 = np.radians(np.asarray(lats2, dtype=float))
+    lon2 = np.radians(np.asarray(lons2, dtype=float))
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    # El redondeo puede dejar `a` apenas por encima de 1 en puntos antipodales
+    c = 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    return EARTH_RADIUS_KM * c
+
+
+def pairwise_distance_matrix(points):
+    """Matriz n×n de distancias haversine (km) entre todos los puntos.
+
+    :param points: secuencia de pares ``[lat, lon]`` o array de forma (n, 2).
+    :return: ``np.ndarray`` simétrico con ceros en la diagonal.
+    """
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    lats = pts[:, 0]
+    lons = pts[:, 1]
+    return haversine_many(lats[:, None], lons[:, None], lats[None, :], lons[None, :])
@@ -0,0 +1,97 @@
+"""
+Capa HTTP compartida: sesiones `requests` con pool de conexiones por host.
+Archivo: services/http_client.py
+
+Cada host (esquema + dominio) tiene una única `requests.Session` reutilizada
+por todos los hilos, con keep-alive, un pool de conexiones acotado y una
+política de reintentos con backoff exponencial para errores transitorios
+(conexión y 5xx). Así se evita un handshake TCP/TLS por llamada.
+
+Los 429 no se reintentan aquí: OpenSky anuncia su espera en una cabecera
+propia y la gestiona su limitador (`services.rate_limit`); reintentarlos a
+ciegas solo gastaría más peticiones y créditos. Las lecturas fallidas y los
+5xx solo se reintentan en métodos idempotentes, para no repetir un POST de
+pago (OpenRouter) que pudo haberse procesado.
+"""
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.environ.get("HTTP_BACKOFF", "0.5"))
+
+# Respuestas que se reintentan (respetando Retry-After cuando viene)
+RETRY_STATUS = (500, 502, 503, 504)
+
+_sessions = {}
+_overrides = {}
+_lock = threading.Lock()
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def configure_host(url, pool_size=None, retries=None, backoff=None):
+    """Ajusta pool/reintentos de un host antes de su primer uso.
+
+    Si la sesión ya existía se descarta, de modo que la próxima llamada a
+    :func:`get_session` la recrea con la nueva configuración.
+    """
+    origin = _origin(url)
+    with _lock:
+        _overrides[origin] = {"pool_size": pool_size, "retries": retries, "backoff": backoff}
+        old = _sessions.pop(origin, None)
+    if old is not None:
+        old.close()
+
+
+def _build_session(origin):
+    cfg = _overrides.get(origin, {})
+    pool_size = cfg.get("pool_size") or HTTP_POOL_SIZE
+    retries = HTTP_RETRIES if cfg.get("retries") is None else cfg["retries"]
+    backoff = HTTP_BACKOFF if cfg.get("backoff") is None else cfg["backoff"]
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,  # sin POST: solo los errores de conexión se reintentan
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount(origin + "/", adapter)
+    return session
+
+
+def get_session(url):
+    """Sesión compartida (keep-alive + pool + reintentos) para el host de ``url``."""
+    origin = _origin(url)
+    session = _sessions.get(origin)
+    if session is not None:
+        return session
+    with _lock:
+        session = _sessions.get(origin)
+        if session is None:
+            session = _sessions[origin] = _build_session(origin)
+        return session
+
+
+def close_all():
+    """Cierra todas las sesiones (p. ej. al apagar el proceso)."""
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
@@ -0,0 +1,132 @@
+"""
+Lectura incremental de arreglos JSON grandes (solo biblioteca estándar).
+Archivo: services/json_stream.py
+
+En vez de cargar la respuesta completa y luego hacer ``json.loads``, se lee
+por fragmentos y se decodifica un elemento del arreglo a la vez con
+``json.JSONDecoder.raw_decode``. La memoria pico queda acotada al fragmento
+en curso más el elemento que se está entregando.
+"""
+import codecs
+import json
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_AFTER_NUMBER = _WHITESPACE + ",]}"
+# Se descarta el texto ya consumido cuando el búfer supera este tamaño
+_COMPACT_AT = 1 << 16
+
+
+class _Reader:
+    """Búfer de texto sobre un iterador de fragmentos (bytes o str)."""
+
+    def __init__(self, chunks, encoding="utf-8"):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Agrega el siguiente fragmento; False si ya no hay más datos."""
+        if self.eof:
+            return False
+        if self.pos > _COMPACT_AT:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._decoder.decode(chunk)
+            if chunk:
+                self.buf += chunk
+                return True
+        self.buf += self._decoder.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def peek(self):
+        """Siguiente carácter no blanco (sin consumirlo) o '' al final."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"JSON inválido: se esperaba '{char}' en la posición {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decodifica el siguiente valor JSON completo."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # Un número al final del búfer puede estar cortado: pedir más datos.
+            # raw_decode de "1." o "2e" entrega 1 / 2 y deja el resto: un número
+            # válido siempre va seguido de un blanco o un delimitador
+            cut = end == len(self.buf) or (
+                isinstance(value, (int, float)) and not isinstance(value, bool)
+                and self.buf[end] not in _AFTER_NUMBER
+            )
+            if cut and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_array(reader):
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        sep = reader.peek()
+        reader.pos += 1
+        if sep == "]":
+            return
+        if sep != ",":
+            raise ValueError(f"JSON inválido: se esperaba ',' o ']' en la posición {reader.pos - 1}")
+
+
+def iter_array(chunks, key=None, header=None):
+    """Genera los elementos de un arreglo JSON a medida que llegan.
+
+    :param chunks: iterable de fragmentos ``bytes``/``str`` (p. ej. ``Response.iter_content``).
+    :param str key: si se indica, el documento es un objeto y se recorre el
+        arreglo de esa clave; si es None, el documento es el arreglo.
+    :param dict header: si se pasa un dict, recibe los demás campos escalares
+        del objeto leídos antes del arreglo (p. ej. ``time`` en ``/states/all``).
+        Un valor ``null`` en la clave se trata como arreglo vacío.
+    """
+    reader = _Reader(chunks)
+    if key is None:
+        yield from _iter_array(reader)
+        return
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        if name == key and reader.peek() == "[":
+            yield from _iter_array(reader)
+        else:
+            value = reader.value()
+            if header is not None and name != key:
+                header[name] = value
+        sep = reader.peek()
+        reader.pos += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            raise ValueError(f"JSON inválido: se esperaba ',' o '}}' en la posición {reader.pos - 1}")
@@ -22,19 +22,78 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 import calendar
+import hashlib
 import logging
+import os
 import pprint
 import time
-from collections import defaultdict
 from datetime import datetime
+from itertools import zip_longest
 
-import requests
+import numpy as np
+
+from services.http_client import get_session
+from services.json_stream import iter_array
+from services.rate_limit import RateLimiter, RateLimitExceeded
+from services.singleflight import upstream_calls
 
 logger = logging.getLogger("opensky_api")
 logger.addHandler(logging.NullHandler())
 
+# Size of the chunks read from the socket in streaming mode
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Daily API credit budget per credential (OpenSky: 400 anonymous, 4000 registered, 8000 feeders)
+OPENSKY_DAILY_CREDITS_ANON = int(os.environ.get("OPENSKY_DAILY_CREDITS_ANON", "400"))
+OPENSKY_DAILY_CREDITS_AUTH = int(os.environ.get("OPENSKY_DAILY_CREDITS_AUTH", "4000"))
+# Longest a caller waits in the rate-limit queue before RateLimitExceeded is raised
+OPENSKY_MAX_WAIT_S = float(os.environ.get("OPENSKY_MAX_WAIT_S", "30"))
+# Attempts of a request answered with 429 (each one waits for the announced retry time)
+RATE_LIMITED_ATTEMPTS = 3
+
+# Shared by every OpenSkyApi instance: the budgets belong to the credential, not to the client object
+opensky_limiter = RateLimiter(max_wait=OPENSKY_MAX_WAIT_S)
+
+
+def states_credit_cost(bbox=()):
+    """Credits charged by /states/all for a bounding box, by its area in square degrees."""
+    if len(bbox) != 4:
+        return 4
+    area = abs(bbox[1] - bbox[0]) * abs(bbox[3] - bbox[2])
+    if area <= 25:
+        return 1
+    if area <= 100:
+        return 2
+    if area <= 400:
+        return 3
+    return 4
+
+
+class _Record(object):
+    """Base for the compact API records: one slot per entry of ``keys`` instead of a per-instance ``__dict__``.
+    Fields missing from the received array are set to None; additional entries are ignored."""
+
+    __slots__ = ()
+    keys = []
+
+    def __init__(self, arr):
+        """
+        :param list arr: the array representation of the record as received by the API.
+        """
+        for key, value in zip_longest(self.keys, arr[:len(self.keys)]):
+            setattr(self, key, value)
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.keys}
 
-class StateVector(object):
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__, repr([getattr(self, key) for key in self.keys]))
+
+    def __str__(self):
+        return pprint.pformat(self.to_dict(), indent=4)
+
+
+class StateVector(_Record):
     """Represents the state of a vehicle at a particular time. It has the following fields:
 
     |  **icao24**: `str` - ICAO24 address of the transmitter in hex string representation.
@@ -88,21 +147,47 @@ class StateVector(object):
         "category",
     ]
 
-    # We are not using namedtuple here as state vectors from the server might be extended; zip() will ignore additional
-    #  entries in this case
-    def __init__(self, arr):
-        """
-        Initializes the StateVector object.
+    # We are not using namedtuple here as state vectors from the server might be extended; additional entries are
+    #  ignored in this case
+    __slots__ = keys
 
-        :param list arr: the array representation of a state vector as received by the API.
-        """
-        self.__dict__ = dict(zip(StateVector.keys, arr))
+    # Typed columns produced by OpenSkyStates.to_arrays()
+    float_keys = ("time_position", "last_contact", "longitude", "latitude", "baro_altitude", "velocity",
+                  "true_track", "vertical_rate", "geo_altitude")
+    bool_keys = ("on_ground", "spi")
+    int_keys = ("position_source", "category")
 
-    def __repr__(self):
-        return "StateVector(%s)" % repr(self.__dict__.values())
 
-    def __str__(self):
-        return pprint.pformat(self.__dict__, indent=4)
+def bbox_predicate(min_latitude, max_latitude, min_longitude, max_longitude):
+    """
+    Build a predicate for the streaming mode of `OpenSkyApi.get_states` that keeps raw state rows inside
+    the given bounding box. Rows without a position are rejected.
+    """
+    lat_i, lon_i = StateVector.keys.index("latitude"), StateVector.keys.index("longitude")
+
+    def predicate(row):
+        lat, lon = row[lat_i], row[lon_i]
+        return (lat is not None and lon is not None
+                and min_latitude <= lat <= max_latitude and min_longitude <= lon <= max_longitude)
+
+    return predicate
+
+
+def altitude_predicate(min_altitude=None, max_altitude=None):
+    """
+    Build a predicate for the streaming mode of `OpenSkyApi.get_states` that keeps raw state rows whose
+    altitude in meters (geometric, else barometric) lies in [min_altitude, max_altitude]. Rows without
+    altitude are rejected.
+    """
+    geo_i, baro_i = StateVector.keys.index("geo_altitude"), StateVector.keys.index("baro_altitude")
+
+    def predicate(row):
+        alt = row[geo_i] if len(row) > geo_i and row[geo_i] is not None else row[baro_i]
+        if alt is None:
+            return False
+        return (min_altitude is None or alt >= min_altitude) and (max_altitude is None or alt <= max_altitude)
+
+    return predicate
 
 
 class OpenSkyStates(object):
@@ -111,6 +196,9 @@ class OpenSkyStates(object):
     |  **time**: `int` - in seconds since epoch (Unix time stamp). Gives the validity period of all states.
       All vectors represent the state of a vehicle with the interval :math:`[time - 1, time]`.
     |  **states**: `list` [`StateVector`] - a list of `StateVector` or is None if there have been no states received.
+
+    The `StateVector` objects are only built on first access to ``states``; `to_arrays` decodes the raw rows
+    straight into typed columns without materializing any of them.
     """
 
     def __init__(self, states_dict):
@@ -120,11 +208,51 @@ class OpenSkyStates(object):
         :param dict states_dict: the dictionary that represents the state of the airspace as seen by OpenSky
             at a particular time.
         """
-        self.__dict__ = states_dict
-        if self.states is not None:
-            self.states = [StateVector(a) for a in self.states]
-        else:
-            self.states = []
+        # Copy: the same response dict may be shared by several coalesced callers
+        self.__dict__ = dict(states_dict)
+        self._rows = states_dict.get("states") or []
+        self._states = None
+
+    @property
+    def states(self):
+        if self._states is None:
+            self._states = [StateVector(a) for a in self._rows]
+        return self._states
+
+    def __len__(self):
+        return len(self._rows)
+
+    def to_arrays(self, fields=None):
+        """
+        Decode the raw state rows into columns.
+
+        Float fields become ``float64`` arrays (None -> NaN), ``on_ground``/``spi`` ``bool`` arrays,
+        ``position_source``/``category`` ``int16`` arrays (None -> -1) and the rest ``object`` arrays.
+
+        :param list fields: optional subset of `StateVector.keys` to decode (all by default).
+        :return: dict of field name -> numpy array, one entry per state vector.
+        :rtype: dict
+        """
+        fields = StateVector.keys if fields is None else fields
+        wanted = {StateVector.keys.index(f) for f in fields}
+        # zip_longest pads rows that lack the optional trailing fields (e.g. category)
+        columns = dict(zip(StateVector.keys, zip_longest(*self._rows))) if self._rows else {}
+        arrays = {}
+        for index, name in enumerate(StateVector.keys):
+            if index not in wanted:
+                continue
+            values = columns.get(name, ())
+            if name in StateVector.float_keys:
+                arrays[name] = np.array(values, dtype=float)
+            elif name in StateVector.bool_keys:
+                arrays[name] = np.array([bool(v) for v in values], dtype=bool)
+            elif name in StateVector.int_keys:
+                arrays[name] = np.nan_to_num(np.array(values, dtype=float), nan=-1).astype(np.int16)
+            else:
+                arr = np.empty(len(values), dtype=object)
+                arr[:] = values
+                arrays[name] = arr
+        return arrays
 
     def __repr__(self):
         return "<OpenSkyStates@%s>" % str(self.__dict__)
@@ -133,7 +261,7 @@ class OpenSkyStates(object):
         return pprint.pformat(self.__dict__, indent=4)
 
 
-class FlightData(object):
+class FlightData(_Record):
     """
     Class that represents data of certain flight. It has the following fields:
 
@@ -176,22 +304,10 @@ class FlightData(object):
         "arrivalAirportCandidatesCount",
     ]
 
-    def __init__(self, arr):
-        """
-        Function that initializes the FlightData object.
-
-        :param list arr: array representation of a flight data as received by the API.
-        """
-        self.__dict__ = dict(zip(FlightData.keys, arr))
+    __slots__ = keys
 
-    def __repr__(self):
-        return "FlightData(%s)" % repr(self.__dict__.values())
 
-    def __str__(self):
-        return pprint.pformat(self.__dict__, indent=4)
-
-
-class Waypoint(object):
+class Waypoint(_Record):
     """
     Class that represents the single waypoint that is a basic part of flight trajectory:
 
@@ -213,19 +329,7 @@ class Waypoint(object):
         "on_ground",
     ]
 
-    def __init__(self, arr):
-        """
-        Function that initializes the Waypoint object.
-
-        :param list arr: array representation of a single waypoint as received by the API.
-        """
-        self.__dict__ = dict(zip(Waypoint.keys, arr))
-
-    def __repr__(self):
-        return "Waypoint(%s)" % repr(self.__dict__.values())
-
-    def __str__(self):
-        return pprint.pformat(self.__dict__, indent=4)
+    __slots__ = keys
 
 
 class FlightTrack(object):
@@ -247,7 +351,7 @@ class FlightTrack(object):
         """
         for key, value in arr.items():
             if key == "path":
-                v = [Waypoint(point) for point in value]
+                value = [Waypoint(point) for point in value or []]
             self.__dict__[key] = value
 
     def __repr__(self):
@@ -262,37 +366,120 @@ class OpenSkyApi(object):
     Main class of the OpenSky Network API. Instances retrieve data from OpenSky via HTTP.
     """
 
-    def __init__(self, username=None, password=None):
+    def __init__(self, username=None, password=None, session=None, limiter=None):
         """Create an instance of the API client. If you do not provide username and password requests will be
         anonymous which imposes some limitations.
 
         :param str username: an OpenSky username (optional).
         :param str password: an OpenSky password for the given username (optional).
+        :param requests.Session session: HTTP session to use (optional). Defaults to the shared keep-alive
+            session for the OpenSky host from `services.http_client`.
+        :param RateLimiter limiter: rate limiter to use (optional). Defaults to `opensky_limiter`, shared by all
+            clients, so instances with the same credential draw from the same budgets.
         """
         if username is not None:
             self._auth = (username, password)
+            # Budgets are keyed by a digest so the username does not show up in the limiter stats
+            self._credential = "user-" + hashlib.sha1(username.encode("utf-8")).hexdigest()[:8]
         else:
             self._auth = ()
+            self._credential = "anonymous"
         self._api_url = "https://opensky-network.org/api"
-        self._last_requests = defaultdict(lambda: 0)
+        self._session = session or get_session(self._api_url)
+        self._limiter = limiter or opensky_limiter
+        daily = OPENSKY_DAILY_CREDITS_AUTH if len(self._auth) == 2 else OPENSKY_DAILY_CREDITS_ANON
+        self._credits = self._limiter.bucket((self._credential, "credits"), daily / 86400.0, daily)
+
+    def _reservations(self, callee, min_interval, cost):
+        """Token-bucket reservations of a request: minimum interval of the endpoint and daily credits."""
+        interval = min_interval[0] if len(self._auth) < 2 else min_interval[1]
+        reservations = []
+        if interval > 0:
+            reservations.append((self._limiter.bucket((self._credential,) + callee, 1.0 / interval, 1), 1))
+        if cost > 0:
+            reservations.append((self._credits, cost))
+        return reservations
+
+    def _request(self, url_post, callee, params, min_interval=(0, 0), cost=0, stream=False):
+        """
+        Sends HTTP request to the given endpoint once the rate limiter allows it.
+
+        Callers too early are queued (they sleep until their turn) instead of being dropped. A 429 blocks the
+        credential for the announced retry time and the request is sent again.
+
+        :param tuple callee: hashable key of the endpoint (and query) for the minimum interval.
+        :param tuple min_interval: minimum seconds between requests with the same key (anonymous, authenticated).
+        :param int cost: API credits charged by the request.
+        :raises RateLimitExceeded: if the wait would exceed the limiter's max_wait.
+        :rtype: requests.Response
+        """
+        reservations = self._reservations(callee, min_interval, cost)
+        for attempt in range(RATE_LIMITED_ATTEMPTS):
+            # A request rejected with 429 keeps its reservation: the retry only waits for the penalty
+            self._limiter.acquire(reservations if attempt == 0 else [], scope=self._credential)
+            r = self._session.get(
+                "{0:s}{1:s}".format(self._api_url, url_post),
+                auth=self._auth,
+                params=params,
+                timeout=15.00,
+                stream=stream,
+            )
+            remaining = r.headers.get("X-Rate-Limit-Remaining")
+            if remaining is not None and remaining.lstrip("-").isdigit():
+                self._limiter.set_level(self._credits, int(remaining))
+            if r.status_code != 429:
+                return r
+            try:
+                retry_after = float(r.headers.get("X-Rate-Limit-Retry-After-Seconds") or r.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                retry_after = 60.0
+            r.close()
+            logger.debug("Rate limited by OpenSky (429), retry after %.0f s.", retry_after)
+            self._limiter.penalize(self._credential, retry_after)
+        raise RateLimitExceeded(retry_after, self._credential)
+
+    def rate_limit_status(self, bbox=()):
+        """
+        Current rate-limit state of this client's credential.
 
-    def _get_json(self, url_post, callee, params=None):
+        :param tuple bbox: bounding box used to estimate the wait of the next `get_states` call.
+        :return: remaining and daily credits, and the seconds a `get_states` call would wait now.
+        :rtype: dict
+        """
+        reservations = self._reservations(("states", tuple(bbox)), (10, 5), states_credit_cost(bbox))
+        remaining = self._limiter.level(self._credits)
+        return {
+            "credential": self._credential,
+            "remaining_credits": max(0, int(remaining)),
+            "daily_credits": int(self._credits.capacity),
+            "states_wait_s": round(self._limiter.wait_time(reservations, scope=self._credential), 3),
+        }
+
+    def _get_json(self, url_post, callee, params=None, min_interval=(0, 0), cost=0):
         """
         Sends HTTP request to the given endpoint and returns the response as a json.
 
+        Concurrent identical requests (same credential, endpoint and parameters) are coalesced: only one goes
+        upstream, and it is charged to the rate limiter once, while the other callers wait for its result.
+
         :param str url_post: endpoint to which the request will be sent.
-        :param Callable callee: method that calls _get_json().
+        :param tuple callee: rate-limit key of the endpoint (see _request()).
         :param dict params: request parameters.
+        :param tuple min_interval: minimum seconds between requests with the same key (anonymous, authenticated).
+        :param int cost: API credits charged by the request.
         :rtype: dict|None
         """
-        r = requests.get(
-            "{0:s}{1:s}".format(self._api_url, url_post),
-            auth=self._auth,
-            params=params,
-            timeout=15.00,
-        )
+        frozen = tuple(sorted(
+            (name, tuple(value) if isinstance(value, (list, tuple)) else value)
+            for name, value in (params or {}).items()
+        ))
+        key = ("opensky", self._api_url, self._credential, url_post, frozen)
+        return upstream_calls.do(key, self._fetch_json, url_post, callee, params, min_interval, cost)
+
+    def _fetch_json(self, url_post, callee, params, min_interval, cost):
+        """The uncoalesced request behind _get_json()."""
+        r = self._request(url_post, callee, params, min_interval=min_interval, cost=cost)
         if r.status_code == 200:
-            self._last_requests[callee] = time.time()
             return r.json()
         else:
             logger.debug(
@@ -300,19 +487,42 @@ class OpenSkyApi(object):
             )
         return None
 
-    def _check_rate_limit(self, time_diff_noauth, time_diff_auth, func):
+    def _stream_json(self, url_post, callee, params=None, key=None, header=None, min_interval=(0, 0), cost=0):
         """
-        Impose client-side rate limit.
+        Like _get_json() but the body is parsed incrementally while it is downloaded.
 
-        :param int time_diff_noauth: the minimum time between two requests in seconds if not using authentication.
-        :param int time_diff_auth: the minimum time between two requests in seconds if using authentication.
-        :param callable func: the API function to evaluate.
-        :rtype: bool
+        :param str url_post: endpoint to which the request will be sent.
+        :param tuple callee: rate-limit key of the endpoint (see _request()).
+        :param dict params: request parameters.
+        :param str key: stream the array under this key of the top-level object (None if the document is an array).
+        :param dict header: optional dict that receives the other top-level fields (see `json_stream.iter_array`).
+        :param tuple min_interval: minimum seconds between requests with the same key (anonymous, authenticated).
+        :param int cost: API credits charged by the request.
+        :return: generator over the array items if the request was successful, None otherwise.
+        :rtype: generator | None
         """
-        if len(self._auth) < 2:
-            return abs(time.time() - self._last_requests[func]) >= time_diff_noauth
-        else:
-            return abs(time.time() - self._last_requests[func]) >= time_diff_auth
+        r = self._request(url_post, callee, params, min_interval=min_interval, cost=cost, stream=True)
+        if r.status_code != 200:
+            logger.debug(
+                "Response not OK. Status {0:d} - {1:s}".format(r.status_code, r.reason)
+            )
+            r.close()
+            return None
+
+        def items():
+            try:
+                yield from iter_array(r.iter_content(chunk_size=STREAM_CHUNK_SIZE), key=key, header=header)
+            finally:
+                r.close()
+
+        return items()
+
+    @staticmethod
+    def _iter_records(items, convert, predicate, raw):
+        """Apply `predicate` to the raw items and only materialize (`convert`) the accepted ones."""
+        for item in items:
+            if predicate is None or predicate(item):
+                yield item if raw else convert(item)
 
     @staticmethod
     def _check_lat(lat):
@@ -326,24 +536,30 @@ class OpenSkyApi(object):
                 "Invalid longitude {:f}! Must be in [-180, 180].".format(lon)
             )
 
-    def get_states(self, time_secs=0, icao24=None, bbox=()):
+    def get_states(self, time_secs=0, icao24=None, bbox=(), stream=False, predicate=None, raw=False):
         """
         Retrieve state vectors for a given time. If time = 0 the most recent ones are taken.
         Optional filters may be applied for ICAO24 addresses.
 
+        With ``stream=True`` the response is parsed incrementally and a generator of `StateVector` is returned
+        instead; ``predicate`` (e.g. `bbox_predicate`, `altitude_predicate`) is applied to each raw row while
+        parsing, so rejected rows never become objects. ``raw=True`` yields the raw row lists.
+
         :param int time_secs: time as Unix time stamp (seconds since epoch) or datetime. The datetime must be in UTC!
         :param str icao24: optionally retrieve only state vectors for the given ICAO24 address(es).
             The parameter can either be a single address as str or an array of str containing multiple addresses.
         :param tuple bbox: optionally retrieve state vectors within a bounding box.
             The bbox must be a tuple of exactly four values [min_latitude, max_latitude, min_longitude, max_longitude]
             each in WGS84 decimal degrees.
-        :return: OpenSkyStates if request was successful, None otherwise.
-        :rtype: OpenSkyStates | None
+        :param bool stream: parse the response incrementally and return a generator.
+        :param callable predicate: streaming mode only; receives the raw row (list) and returns whether to keep it.
+        :param bool raw: streaming mode only; yield raw rows instead of StateVector objects.
+        :return: OpenSkyStates (or a generator in streaming mode) if request was successful, None otherwise.
+        :rtype: OpenSkyStates | generator | None
+        :raises RateLimitExceeded: if the call would wait in the rate-limit queue longer than the limiter allows
+            (calls that are merely early wait for their turn: each bbox costs 1-4 daily credits by area and
+            may be requested every 10 s anonymously or every 5 s authenticated).
         """
-        if not self._check_rate_limit(10, 5, self.get_states):
-            logger.debug("Blocking request due to rate limit.")
-            return None
-
         t = time_secs
         if type(time_secs) == datetime:
             t = calendar.timegm(t.timetuple())
@@ -365,7 +581,16 @@ class OpenSkyApi(object):
                 "Invalid bounding box! Must be [min_latitude, max_latitude, min_longitude, max_longitude]."
             )
 
-        states_json = self._get_json("/states/all", self.get_states, params=params)
+        # The minimum interval applies per bounding box, so disjoint boxes can be polled together
+        callee = ("states", tuple(bbox))
+        limits = {"min_interval": (10, 5), "cost": states_credit_cost(bbox)}
+        if stream:
+            rows = self._stream_json("/states/all", callee, params=params, key="states", **limits)
+            if rows is None:
+                return None
+            return self._iter_records(rows, StateVector, predicate, raw)
+
+        states_json = self._get_json("/states/all", callee, params=params, **limits)
         if states_json is not None:
             return OpenSkyStates(states_json)
         return None
@@ -383,12 +608,10 @@ class OpenSkyApi(object):
             The parameter can either be a single sensor serial number (int) or a list of serial numbers.
         :return: OpenSkyStates if request was successful, None otherwise.
         :rtype: OpenSkyStates | None
+        :raises RateLimitExceeded: if the call would wait in the rate-limit queue longer than the limiter allows.
         """
         if len(self._auth) < 2:
             raise Exception("No username and password provided for get_my_states!")
-        if not self._check_rate_limit(0, 1, self.get_my_states):
-            logger.debug("Blocking request due to rate limit.")
-            return None
         t = time_secs
         if type(time_secs) == datetime:
             t = calendar.timegm(t.timetuple())
@@ -399,18 +622,28 @@ class OpenSkyApi(object):
             "serials": serials,
             "extended": True,
         }
-        states_json = self._get_json("/states/own", self.get_my_states, params=params)
+        states_json = self._get_json("/states/own", ("states/own",), params=params, min_interval=(0, 1))
         if states_json is not None:
             return OpenSkyStates(states_json)
         return None
 
-    def get_flights_from_interval(self, begin, end):
+    def _stream_flights(self, url_post, callee, params, predicate, raw):
+        """Streaming variant shared by the /flights/* endpoints."""
+        entries = self._stream_json(url_post, callee, params=params)
+        if entries is None:
+            return None
+        return self._iter_records(entries, lambda entry: FlightData(list(entry.values())), predicate, raw)
+
+    def get_flights_from_interval(self, begin, end, stream=False, predicate=None, raw=False):
         """
         Retrieves data of flights for certain time interval [begin, end].
 
         :param int begin: Start of time interval to retrieve flights for as Unix time (seconds since epoch).
         :param int end: End of time interval to retrieve flights for as Unix time (seconds since epoch).
-        :return: list of FlightData objects if request was successful, None otherwise.
+        :param bool stream: parse the response incrementally and return a generator of FlightData.
+        :param callable predicate: streaming mode only; receives the raw flight dict and returns whether to keep it.
+        :param bool raw: streaming mode only; yield the raw dicts instead of FlightData objects.
+        :return: list of FlightData objects (a generator in streaming mode) if request was successful, None otherwise.
         :rtype: FlightData | None
         """
         if begin >= end:
@@ -419,15 +652,18 @@ class OpenSkyApi(object):
             raise ValueError("The time interval must be smaller than 2 hours.")
 
         params = {"begin": begin, "end": end}
+        if stream:
+            return self._stream_flights("/flights/all", ("flights/all",), params, predicate, raw)
+
         states_json = self._get_json(
-            "/flights/all", self.get_flights_from_interval, params=params
+            "/flights/all", ("flights/all",), params=params
         )
 
         if states_json is not None:
             return [FlightData(list(entry.values())) for entry in states_json]
         return None
 
-    def get_flights_by_aircraft(self, icao24, begin, end):
+    def get_flights_by_aircraft(self, icao24, begin, end, stream=False, predicate=None, raw=False):
         """
         Retrieves data of flights for certain aircraft and time interval.
 
@@ -435,7 +671,10 @@ class OpenSkyApi(object):
             All letters need to be lower case.
         :param int begin: Start of time interval to retrieve flights for as Unix time (seconds since epoch).
         :param int end: End of time interval to retrieve flights for as Unix time (seconds since epoch).
-        :return: list of FlightData objects if request was successful, None otherwise.
+        :param bool stream: parse the response incrementally and return a generator of FlightData.
+        :param callable predicate: streaming mode only; receives the raw flight dict and returns whether to keep it.
+        :param bool raw: streaming mode only; yield the raw dicts instead of FlightData objects.
+        :return: list of FlightData objects (a generator in streaming mode) if request was successful, None otherwise.
         :rtype: FlightData | None
         """
 
@@ -445,22 +684,28 @@ class OpenSkyApi(object):
             raise ValueError("The time interval must be smaller than 30 days.")
 
         params = {"icao24": icao24, "begin": begin, "end": end}
+        if stream:
+            return self._stream_flights("/flights/aircraft", ("flights/aircraft",), params, predicate, raw)
+
         states_json = self._get_json(
-            "/flights/aircraft", self.get_flights_by_aircraft, params=params
+            "/flights/aircraft", ("flights/aircraft",), params=params
         )
 
         if states_json is not None:
             return [FlightData(list(entry.values())) for entry in states_json]
         return None
 
-    def get_arrivals_by_airport(self, airport, begin, end):
+    def get_arrivals_by_airport(self, airport, begin, end, stream=False, predicate=None, raw=False):
         """
         Retrieves flights for a certain airport which arrived within a given time interval [begin, end].
 
         :param str airport: ICAO identier for the airport.
         :param int begin: Start of time interval to retrieve flights for as Unix time (seconds since epoch).
         :param int end: End of time interval to retrieve flights for as Unix time (seconds since epoch).
-        :return: list of FlightData objects if request was successful, None otherwise..
+        :param bool stream: parse the response incrementally and return a generator of FlightData.
+        :param callable predicate: streaming mode only; receives the raw flight dict and returns whether to keep it.
+        :param bool raw: streaming mode only; yield the raw dicts instead of FlightData objects.
+        :return: list of FlightData objects (a generator in streaming mode) if request was successful, None otherwise..
         :rtype: FlightData | None
         """
         if begin >= end:
@@ -469,22 +714,28 @@ class OpenSkyApi(object):
             raise ValueError("The time interval must be smaller than 7 days.")
 
         params = {"airport": airport, "begin": begin, "end": end}
+        if stream:
+            return self._stream_flights("/flights/arrival", ("flights/arrival",), params, predicate, raw)
+
         states_json = self._get_json(
-            "/flights/arrival", self.get_arrivals_by_airport, params=params
+            "/flights/arrival", ("flights/arrival",), params=params
         )
 
         if states_json is not None:
             return [FlightData(list(entry.values())) for entry in states_json]
         return None
 
-    def get_departures_by_airport(self, airport, begin, end):
+    def get_departures_by_airport(self, airport, begin, end, stream=False, predicate=None, raw=False):
         """
         Retrieves flights for a certain airport which arrived within a given time interval [begin, end].
 
         :param str airport: ICAO identier for the airport.
         :param int begin: Start of time interval to retrieve flights for as Unix time (seconds since epoch).
         :param int end: End of time interval to retrieve flights for as Unix time (seconds since epoch).
-        :return: list of FlightData objects if request was successful, None otherwise.
+        :param bool stream: parse the response incrementally and return a generator of FlightData.
+        :param callable predicate: streaming mode only; receives the raw flight dict and returns whether to keep it.
+        :param bool raw: streaming mode only; yield the raw dicts instead of FlightData objects.
+        :return: list of FlightData objects (a generator in streaming mode) if request was successful, None otherwise.
         :rtype: FlightData | None
         """
         if begin >= end:
@@ -493,8 +744,11 @@ class OpenSkyApi(object):
             raise ValueError("The time interval must be smaller than 7 days.")
 
         params = {"airport": airport, "begin": begin, "end": end}
+        if stream:
+            return self._stream_flights("/flights/departure", ("flights/departure",), params, predicate, raw)
+
         states_json = self._get_json(
-            "/flights/departure", self.get_departures_by_airport, params=params
+            "/flights/departure", ("flights/departure",), params=params
         )
 
         if states_json is not None:
@@ -520,7 +774,7 @@ class OpenSkyApi(object):
 
         params = {"icao24": icao24, "time": t}
         states_json = self._get_json(
-            "/tracks/all", self.get_track_by_aircraft, params=params
+            "/tracks/all", ("tracks/all",), params=params
         )
 
         if states_json is not None:
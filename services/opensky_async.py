@@ -0,0 +1,114 @@
+"""
+Cliente asyncio de OpenSky para consultas concurrentes.
+Archivo: services/opensky_async.py
+
+Expone la misma superficie que `OpenSkyApi` (``get_states``,
+``get_arrivals_by_airport``, ``get_departures_by_airport``,
+``get_track_by_aircraft``...) como corrutinas. Cada llamada se ejecuta sobre
+el cliente síncrono en un pool de hilos acotado (el límite de concurrencia), y
+todos los hilos comparten la sesión keep-alive del host de OpenSky
+(`services.http_client`), así que no se abren conexiones nuevas por petición.
+
+Con ``gather``/``get_states_many``/``get_airport_traffic`` varias consultas
+(bboxes disjuntos, una docena de aeropuertos) se lanzan a la vez y el tiempo
+total se acerca a la latencia de una sola en lugar de N veces esa latencia.
+"""
+import asyncio
+import os
+import types
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from services.opensky_api import OpenSkyApi
+
+# Peticiones simultáneas hacia OpenSky (conviene que HTTP_POOL_SIZE sea al menos este valor)
+OPENSKY_MAX_CONCURRENCY = int(os.environ.get("OPENSKY_MAX_CONCURRENCY", "8"))
+
+# Métodos de OpenSkyApi expuestos como corrutinas
+_METHODS = (
+    "get_states",
+    "get_my_states",
+    "get_flights_from_interval",
+    "get_flights_by_aircraft",
+    "get_arrivals_by_airport",
+    "get_departures_by_airport",
+    "get_track_by_aircraft",
+)
+
+
+class AsyncOpenSkyApi:
+    """Versión asyncio de `OpenSkyApi` con límite de concurrencia.
+
+    :param OpenSkyApi api: cliente síncrono a envolver (por defecto uno nuevo
+        con ``username``/``password``); se comparte su estado de rate-limit.
+    :param int max_concurrency: peticiones en vuelo como máximo.
+    """
+
+    def __init__(self, username=None, password=None, api=None, max_concurrency=OPENSKY_MAX_CONCURRENCY):
+        self.api = api or OpenSkyApi(username, password)
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="opensky")
+
+    def _invoke(self, name, args, kwargs):
+        result = getattr(self.api, name)(*args, **kwargs)
+        # En modo stream el generador se consume en el hilo del pool, no en el event loop
+        if isinstance(result, types.GeneratorType):
+            result = list(result)
+        return result
+
+    async def call(self, name, *args, **kwargs):
+        """Ejecuta ``OpenSkyApi.<name>(*args, **kwargs)`` sin bloquear el event loop."""
+        if name not in _METHODS:
+            raise AttributeError(f"Método de OpenSky no soportado: {name}")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(self._invoke, name, args, kwargs))
+
+    def __getattr__(self, name):
+        if name in _METHODS:
+            return partial(self.call, name)
+        raise AttributeError(name)
+
+    async def gather(self, calls, return_exceptions=False):
+        """Lanza varias consultas a la vez y retorna sus resultados en orden.
+
+        :param calls: iterable de ``(método, kwargs)``, p. ej.
+            ``[("get_states", {"bbox": bbox}), ("get_arrivals_by_airport", {...})]``.
+        :param bool return_exceptions: como en `asyncio.gather`, entrega las
+            excepciones en su posición en lugar de propagar la primera.
+        """
+        return await asyncio.gather(
+            *(self.call(name, **kwargs) for name, kwargs in calls),
+            return_exceptions=return_exceptions,
+        )
+
+    async def get_states_many(self, bboxes, return_exceptions=False, **kwargs):
+        """``get_states`` sobre varios bboxes en paralelo (una entrada por bbox)."""
+        return await self.gather(
+            [("get_states", dict(kwargs, bbox=tuple(bbox))) for bbox in bboxes],
+            return_exceptions=return_exceptions,
+        )
+
+    async def get_airport_traffic(self, airports, begin, end, return_exceptions=True):
+        """Llegadas y salidas de varios aeropuertos en paralelo.
+
+        :return: ``{aeropuerto: {"arrivals": [...], "departures": [...]}}``; con
+            ``return_exceptions`` una consulta fallida deja su excepción en lugar de la lista.
+        """
+        airports = list(airports)
+        calls = []
+        for airport in airports:
+            params = {"airport": airport, "begin": begin, "end": end}
+            calls.append(("get_arrivals_by_airport", params))
+            calls.append(("get_departures_by_airport", params))
+        results = await self.gather(calls, return_exceptions=return_exceptions)
+        return {
+            airport: {"arrivals": results[2 * k], "departures": results[2 * k + 1]}
+            for k, airport in enumerate(airports)
+        }
+
+    def run(self, coro):
+        """Ejecuta una corrutina de este cliente desde código síncrono (p. ej. Flask)."""
+        return asyncio.run(coro)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
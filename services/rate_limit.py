@@ -0,0 +1,179 @@
+"""
+Limitador de tasa por token bucket, seguro entre hilos y con cola.
+Archivo: services/rate_limit.py
+
+En lugar de descartar una petición que llega antes de tiempo, cada llamador
+reserva sus tokens y duerme hasta su turno: el saldo de un bucket puede
+quedar negativo (deuda) y el siguiente llamador espera más, así las esperas
+se encadenan en orden de llegada y la capacidad se usa completa.
+
+Un mismo :class:`RateLimiter` agrupa varios buckets (p. ej. intervalo mínimo
+por endpoint y presupuesto diario de créditos por credencial). Una petición
+reserva en todos a la vez, o en ninguno si la espera superaría ``max_wait``
+(entonces se lanza :class:`RateLimitExceeded` con la espera estimada). Un
+429 del servidor bloquea el ámbito afectado durante el ``Retry-After``.
+"""
+import threading
+import time
+
+
+class RateLimitExceeded(Exception):
+    """La petición tendría que esperar más de lo permitido.
+
+    :ivar float wait_s: segundos que faltarían para poder enviarla.
+    """
+
+    def __init__(self, wait_s, key=None):
+        self.wait_s = wait_s
+        self.key = key
+        super().__init__(f"Límite de tasa alcanzado{f' ({key})' if key else ''}: reintentar en {wait_s:.1f} s")
+
+
+class TokenBucket:
+    """Bucket de ``capacity`` tokens que se recarga a ``rate`` tokens/s.
+
+    No es seguro entre hilos por sí solo: lo protege el lock del
+    :class:`RateLimiter` que lo contiene.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def level(self, now=None):
+        """Tokens disponibles (negativo si hay peticiones en cola)."""
+        self._refill(time.monotonic() if now is None else now)
+        return self._tokens
+
+    def wait_time(self, tokens=1, now=None):
+        """Segundos hasta que haya ``tokens`` disponibles (sin reservarlos)."""
+        deficit = min(tokens, self.capacity) - self.level(now)
+        if deficit <= 0:
+            return 0.0
+        return deficit / self.rate if self.rate > 0 else float("inf")
+
+    def take(self, tokens=1, now=None):
+        """Descuenta ``tokens`` aunque el saldo quede negativo (reserva en cola)."""
+        self.level(now)
+        self._tokens -= min(tokens, self.capacity)
+
+    def set_level(self, tokens, now=None):
+        """Ajusta el saldo a lo que reporta el servidor (p. ej. créditos restantes).
+
+        La deuda de las peticiones en cola se conserva: el servidor aún no las
+        ha visto, así que siguen descontándose del saldo que reporta.
+        """
+        queued = max(0.0, -self.level(now))
+        self._tokens = min(self.capacity, float(tokens)) - queued
+
+
+class RateLimiter:
+    """Conjunto de token buckets con reserva atómica y bloqueos por 429.
+
+    :param float max_wait: espera máxima (s) que un llamador acepta en cola;
+        None para esperar lo que haga falta.
+    """
+
+    def __init__(self, max_wait=None):
+        self.max_wait = max_wait
+        self._buckets = {}
+        self._blocked_until = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.queued = 0
+        self.total_wait_s = 0.0
+        self.rejected = 0
+        self.penalties = 0
+
+    def bucket(self, key, rate, capacity):
+        """Bucket de ``key`` (se crea la primera vez con ``rate``/``capacity``)."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, capacity)
+            return bucket
+
+    def _wait_locked(self, reservations, scope, now):
+        waits = [bucket.wait_time(tokens, now) for bucket, tokens in reservations]
+        waits.append(self._blocked_until.get(scope, 0.0) - now)
+        return max(0.0, *waits)
+
+    def wait_time(self, reservations, scope=None):
+        """Espera estimada (s) para ``reservations`` sin reservar nada."""
+        with self._lock:
+            return self._wait_locked(reservations, scope, time.monotonic())
+
+    def acquire(self, reservations, scope=None, max_wait=None):
+        """Reserva tokens en todos los buckets y duerme hasta el turno.
+
+        :param reservations: lista de ``(bucket, tokens)``.
+        :param scope: ámbito de bloqueo por 429 (p. ej. la credencial).
+        :param float max_wait: sobrescribe el ``max_wait`` del limitador.
+        :return: segundos esperados.
+        :raises RateLimitExceeded: si la espera superaría ``max_wait`` (no se reserva nada).
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        with self._lock:
+            now = time.monotonic()
+            wait = self._wait_locked(reservations, scope, now)
+            if max_wait is not None and wait > max_wait:
+                self.rejected += 1
+                raise RateLimitExceeded(wait, scope)
+            for bucket, tokens in reservations:
+                bucket.take(tokens, now)
+            self.requests += 1
+            if wait > 0:
+                self.queued += 1
+                self.total_wait_s += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def level(self, bucket):
+        """Saldo actual de ``bucket``."""
+        with self._lock:
+            return bucket.level()
+
+    def set_level(self, bucket, tokens):
+        """Sincroniza ``bucket`` con el saldo que reporta el servidor."""
+        with self._lock:
+            bucket.set_level(tokens)
+
+    def penalize(self, scope, retry_after_s):
+        """Bloquea ``scope`` durante ``retry_after_s`` segundos (respuesta 429)."""
+        with self._lock:
+            until = time.monotonic() + max(0.0, retry_after_s)
+            self._blocked_until[scope] = max(until, self._blocked_until.get(scope, 0.0))
+            self.penalties += 1
+
+    def stats(self):
+        """Saldo de cada bucket, bloqueos vigentes y contadores de espera."""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "requests": self.requests,
+                "queued": self.queued,
+                "total_wait_s": round(self.total_wait_s, 3),
+                "rejected": self.rejected,
+                "penalties": self.penalties,
+                "max_wait_s": self.max_wait,
+                "buckets": {
+                    "/".join(map(str, key)): {
+                        "available": round(bucket.level(now), 3),
+                        "capacity": bucket.capacity,
+                        "wait_s": round(bucket.wait_time(1, now), 3),
+                    }
+                    for key, bucket in self._buckets.items()
+                },
+                "blocked_s": {
+                    str(scope): round(until - now, 3)
+                    for scope, until in self._blocked_until.items() if until > now
+                },
+            }
@@ -0,0 +1,624 @@
+"""
+Motor de optimización de rutas (TSP de trayecto abierto).
+Archivo: services/route_solver.py
+
+La matriz de distancias se calcula una sola vez por solicitud y todas las
+evaluaciones de movimientos son O(1) sobre esa matriz. El recorrido siempre
+empieza en el índice 0 (origen) y se mide como trayecto one-way, sin arista
+de regreso al origen. Con ``fixed_end=True`` el último punto (destino)
+también queda fijo al final del trayecto.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from services.geodesy import pairwise_distance_matrix
+
+# Vecinos más cercanos considerados por ciudad en la búsqueda local
+DEFAULT_NEIGHBORS = 10
+
+# Longitud máxima de segmento en Or-opt
+OR_OPT_MAX_LEN = 3
+
+# Profundidad máxima de las cadenas estilo Lin–Kernighan
+LK_DEPTH = 5
+
+# Niveles de búsqueda local: cada uno aplica sus pasos en orden hasta que
+# ninguno mejora el trayecto o se agota el presupuesto de tiempo
+TIERS = {
+    "2opt": ("two_opt",),
+    "oropt": ("two_opt", "or_opt"),
+    "3opt": ("two_opt", "or_opt", "three_opt"),
+    "lk": ("two_opt", "or_opt", "lin_kernighan"),
+}
+DEFAULT_TIER = "2opt"
+
+# Tamaño máximo (puntos totales) para el solver exacto de Held–Karp, y el
+# techo configurable: la tabla dp ocupa 2^m · m floats (m = puntos intermedios)
+EXACT_MAX_POINTS = 12
+EXACT_LIMIT_POINTS = 16
+
+# Multi-arranque: presupuesto por defecto y tamaño de la lista restringida de
+# candidatos (RCL) de la construcción greedy aleatorizada
+MULTISTART_BUDGET_MS = 500
+MULTISTART_RCL = 3
+# Margen sobre el presupuesto para recoger los resultados de los procesos
+MULTISTART_GRACE_MS = 2000
+# Búsqueda local mínima en el propio proceso si ningún trabajador llegó a tiempo
+MULTISTART_FALLBACK_MS = 250
+
+# Tolerancia para aceptar una mejora (evita ciclos por ruido de coma flotante)
+_EPS = 1e-9
+
+
+class RouteSolver:
+    """Resuelve el trayecto más corto que parte del punto 0.
+
+    :param points: lista de ``[lat, lon]``.
+    :param int neighbors: tamaño de las listas de vecinos para 2-opt.
+    :param bool fixed_end: si es True, el último punto es el destino fijo.
+    :param dist: matriz de distancias ya calculada (opcional); si se indica,
+        ``points`` puede ser None.
+    """
+
+    def __init__(self, points, neighbors=DEFAULT_NEIGHBORS, fixed_end=False, dist=None):
+        self.points = points
+        if dist is not None:
+            self.dist = dist
+        else:
+            self.dist = pairwise_distance_matrix(points) if points else np.zeros((0, 0))
+        self.n = len(self.dist)
+        self.fixed_end = fixed_end and self.n > 1
+        # Última posición que un movimiento puede modificar
+        self.last = self.n - 2 if self.fixed_end else self.n - 1
+        self.neighbors = self._build_neighbor_lists(neighbors)
+
+    def _build_neighbor_lists(self, k):
+        """Para cada punto, los ``k`` puntos más cercanos ordenados por distancia."""
+        if self.n <= 1:
+            return [[] for _ in range(self.n)]
+        k = min(k, self.n - 1)
+        # Excluir al propio punto de su lista de vecinos
+        d = self.dist + np.diag(np.full(self.n, np.inf))
+        idx = np.argpartition(d, k - 1, axis=1)[:, :k]
+        rows = np.arange(self.n)[:, None]
+        order = np.argsort(d[rows, idx], axis=1)
+        return idx[rows, order].tolist()
+
+    def path_length(self, tour):
+        """Longitud (km) del trayecto abierto ``tour``."""
+        if len(tour) < 2:
+            return 0.0
+        t = np.asarray(tour)
+        return float(self.dist[t[:-1], t[1:]].sum())
+
+    def nearest_neighbor_tour(self, start=0):
+        """Construcción greedy: siempre al punto no visitado más cercano."""
+        tour = [start]
+        visited = np.zeros(self.n, dtype=bool)
+        visited[start] = True
+        remaining = self.n - 1
+        if self.fixed_end:
+            # El destino se reserva para el final
+            visited[self.n - 1] = True
+            remaining -= 1
+        for _ in range(remaining):
+            row = np.where(visited, np.inf, self.dist[tour[-1]])
+            nxt = int(np.argmin(row))
+            tour.append(nxt)
+            visited[nxt] = True
+        if self.fixed_end:
+            tour.append(self.n - 1)
+        return tour
+
+    def random_greedy_tour(self, rng, rcl=MULTISTART_RCL):
+        """Construcción greedy aleatorizada: en cada paso elige al azar entre
+        los ``rcl`` puntos no visitados más cercanos."""
+        tour = [0]
+        visited = np.zeros(self.n, dtype=bool)
+        visited[0] = True
+        remaining = self.n - 1
+        if self.fixed_end:
+            visited[self.n - 1] = True
+            remaining -= 1
+        for _ in range(remaining):
+            row = np.where(visited, np.inf, self.dist[tour[-1]])
+            k = min(rcl, remaining - len(tour) + 1)
+            options = np.argpartition(row, k - 1)[:k]
+            nxt = int(options[rng.integers(k)])
+            tour.append(nxt)
+            visited[nxt] = True
+        if self.fixed_end:
+            tour.append(self.n - 1)
+        return tour
+
+    def double_bridge(self, tour, rng):
+        """Perturbación "double bridge": intercambia dos segmentos consecutivos
+        de la parte móvil del trayecto (A B C D -> A C B D)."""
+        if self.last < 3:
+            return list(tour)
+        a, b, c = sorted(rng.choice(np.arange(1, self.last + 1), size=3, replace=False))
+        return tour[:a] + tour[b:c] + tour[a:b] + tour[c:]
+
+    def _positions(self, tour):
+        pos = [0] * self.n
+        for p, city in enumerate(tour):
+            pos[city] = p
+        return pos
+
+    def _two_opt_gain(self, tour, i, j):
+        """Ganancia del movimiento 2-opt (i, j) sobre el trayecto abierto."""
+        n = len(tour)
+        dist = self.dist
+        d_old = dist[tour[i], tour[i + 1]]
+        d_new = dist[tour[i], tour[j]]
+        if j + 1 < n:
+            d_old += dist[tour[j], tour[j + 1]]
+            d_new += dist[tour[i + 1], tour[j + 1]]
+        return d_old - d_new
+
+    def _two_opt_candidates(self, tour, pos, a):
+        """Movimientos 2-opt (i, j) que crean la arista (a, c) con c vecino de a.
+
+        Genera tuplas ``(c, i, j, b)`` donde ``b`` es el vecino de `a` cuya
+        arista se elimina. Solo se generan candidatos cuya nueva arista es más
+        corta que la eliminada (criterio de ganancia parcial positiva).
+        """
+        n = len(tour)
+        dist = self.dist
+        p = pos[a]
+        for direction in (1, -1):
+            # Arista de `a` hacia su sucesor (1) o su predecesor (-1)
+            if direction == 1:
+                if p + 1 >= n:
+                    continue
+                b = tour[p + 1]
+            else:
+                if p == 0:
+                    continue
+                b = tour[p - 1]
+            d_cur = dist[a, b]
+
+            for c in self.neighbors[a]:
+                if dist[a, c] >= d_cur:
+                    break
+                q = pos[c]
+                if direction == 1:
+                    i, j = min(p, q), max(p, q)
+                else:
+                    i, j = min(p, q) - 1, max(p, q) - 1
+                if i < 0 or j - i < 2 or j > self.last:
+                    continue
+                yield c, i, j, b
+
+    @staticmethod
+    def _reverse(tour, pos, i, j):
+        """Invierte tour[i+1..j] y actualiza las posiciones."""
+        tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1]
+        for k in range(i + 1, j + 1):
+            pos[tour[k]] = k
+
+    def two_opt(self, tour, deadline=None):
+        """Mejora 2-opt con listas de vecinos y bits "don't-look".
+
+        Un movimiento elimina las aristas (t[i], t[i+1]) y (t[j], t[j+1]),
+        añade (t[i], t[j]) y (t[i+1], t[j+1]) e invierte t[i+1..j]. Cuando
+        ``j`` es el último índice la segunda arista no existe (extremo libre);
+        con destino fijo ``j`` nunca alcanza la última posición.
+        Las mejoras se aplican en cuanto se encuentran, sin reiniciar el
+        barrido: solo se reactivan los extremos de las aristas modificadas.
+
+        Modifica ``tour`` in-place y lo retorna.
+        """
+        n = len(tour)
+        if n < 4:
+            return tour
+
+        pos = self._positions(tour)
+        queue = deque(tour)
+        active = set(queue)
+
+        while queue:
+            if _expired(deadline):
+                break
+            a = queue.popleft()
+            active.discard(a)
+
+            for _, i, j, _ in self._two_opt_candidates(tour, pos, a):
+                if self._two_opt_gain(tour, i, j) > _EPS:
+                    touched = [tour[i], tour[i + 1], tour[j]]
+                    if j + 1 < n:
+                        touched.append(tour[j + 1])
+                    self._reverse(tour, pos, i, j)
+                    for city in touched:
+                        if city not in active:
+                            active.add(city)
+                            queue.append(city)
+                    break
+
+        return tour
+
+    def segment_insertion(self, tour, max_len=None, deadline=None):
+        """Mueve un segmento t[s..e] entre otras dos ciudades (3-opt "or").
+
+        El segmento se reinserta en el sentido original o invertido junto a
+        un vecino de alguno de sus extremos. Con ``max_len=3`` es el Or-opt
+        clásico; sin límite es la variante de inserción de segmentos de 3-opt.
+
+        Retorna el trayecto mejorado (nueva lista).
+        """
+        n = len(tour)
+        if n < 4:
+            return tour
+        dist = self.dist
+        last_pos = self.last
+        max_len = min(max_len or n, n - 2)
+
+        def d(x, y):
+            return 0.0 if x is None or y is None else dist[x, y]
+
+        improved = True
+        while improved:
+            improved = False
+            pos = self._positions(tour)
+            for s in range(1, last_pos + 1):
+                if _expired(deadline):
+                    return tour
+                prev = tour[s - 1]
+                # Tras aplicar un movimiento se sigue barriendo desde `s`, sin reiniciar
+                for e in range(s, min(s + max_len, last_pos + 1)):
+                    first, last = tour[s], tour[e]
+                    nxt = tour[e + 1] if e + 1 < n else None
+                    remove_gain = d(prev, first) + d(last, nxt) - d(prev, nxt)
+                    if remove_gain <= _EPS:
+                        continue
+                    # Criterio de ganancia parcial: la arista nueva debe ser más
+                    # corta que la mayor de las aristas eliminadas del segmento
+                    bound = max(d(prev, first), d(last, nxt))
+
+                    best = None
+                    for u in (first, last):
+                        for c in self.neighbors[u]:
+                            if dist[u, c] >= bound:
+                                break
+                            g = pos[c]
+                            if s <= g <= e:
+                                continue
+                            # Insertar entre (t[g], t[g+1]) o (t[g-1], t[g])
+                            for gx in (g, g - 1):
+                                if gx < 0 or gx > last_pos or gx == s - 1 or s <= gx <= e:
+                                    continue
+                                x = tour[gx]
+                                y = tour[gx + 1] if gx + 1 < n else None
+                                for head, tail, rev in ((first, last, False), (last, first, True)):
+                                    add = d(x, head) + d(tail, y) - d(x, y)
+                                    delta = remove_gain - add
+                                    if delta > _EPS and (best is None or delta > best[0]):
+                                        best = (delta, gx, rev)
+                    if best is not None:
+                        _, gx, rev = best
+                        segment = tour[s:e + 1]
+                        if rev:
+                            segment.reverse()
+                        x = tour[gx]
+                        rest = tour[:s] + tour[e + 1:]
+                        k = rest.index(x) + 1
+                        tour = rest[:k] + segment + rest[k:]
+                        pos = self._positions(tour)
+                        improved = True
+                        break
+        return tour
+
+    def or_opt(self, tour, deadline=None):
+        """Or-opt: reubica segmentos de 1 a 3 ciudades."""
+        return self.segment_insertion(tour, max_len=OR_OPT_MAX_LEN, deadline=deadline)
+
+    def three_opt(self, tour, deadline=None):
+        """3-opt de inserción de segmentos sin límite de longitud."""
+        return self.segment_insertion(tour, max_len=None, deadline=deadline)
+
+    def lin_kernighan(self, tour, depth=LK_DEPTH, deadline=None):
+        """Movimiento estilo Lin–Kernighan: cadenas de 2-opt de profundidad variable.
+
+        Desde cada ciudad se encadenan hasta ``depth`` movimientos 2-opt,
+        permitiendo pasos que empeoran mientras la nueva arista sea más corta
+        que la eliminada. Se conserva el mejor prefijo de la cadena; si
+        ninguno mejora el trayecto, la cadena se deshace.
+
+        Modifica ``tour`` in-place y lo retorna.
+        """
+        n = len(tour)
+        if n < 4:
+            return tour
+
+        pos = self._positions(tour)
+        queue = deque(tour)
+        active = set(queue)
+
+        while queue:
+            if _expired(deadline):
+                break
+            start = queue.popleft()
+            active.discard(start)
+
+            a = start
+            total = 0.0
+            best_total, best_step = _EPS, 0
+            chain = []
+            frozen = {start}
+            for _ in range(depth):
+                move = None
+                for c, i, j, b in self._two_opt_candidates(tour, pos, a):
+                    if c in frozen:
+                        continue
+                    g = self._two_opt_gain(tour, i, j)
+                    if move is None or g > move[0]:
+                        move = (g, c, i, j, b)
+                if move is None:
+                    break
+                g, c, i, j, b = move
+                # El antiguo vecino de `a` queda con la arista de cierre y continúa la cadena
+                a = b
+                self._reverse(tour, pos, i, j)
+                chain.append((i, j))
+                frozen.add(c)
+                total += g
+                if total > best_total:
+                    best_total, best_step = total, len(chain)
+
+            # Deshacer los pasos posteriores al mejor prefijo
+            for i, j in reversed(chain[best_step:]):
+                self._reverse(tour, pos, i, j)
+
+            if best_step:
+                for i, j in chain[:best_step]:
+                    for k in (i, i + 1, j, j + 1):
+                        if k < n and tour[k] not in active:
+                            active.add(tour[k])
+                            queue.append(tour[k])
+
+        return tour
+
+    def solve_exact(self):
+        """Solución óptima por programación dinámica de Held–Karp.
+
+        Los subconjuntos de puntos intermedios se representan como máscaras de
+        bits y cada capa (subconjuntos del mismo tamaño) se relaja en bloque
+        con NumPy. Coste O(2^m · m²) con m puntos intermedios: usar solo para
+        conjuntos pequeños (ver ``EXACT_MAX_POINTS``).
+
+        :return: lista de índices del trayecto óptimo.
+        """
+        n = self.n
+        if n <= 2:
+            return list(range(n))
+
+        inner = list(range(1, n - 1)) if self.fixed_end else list(range(1, n))
+        m = len(inner)
+        d_inner = self.dist[np.ix_(inner, inner)]
+        size = 1 << m
+
+        # dp[mask, j]: mejor trayecto desde 0 que visita `mask` y termina en inner[j]
+        dp = np.full((size, m), np.inf)
+        parent = np.full((size, m), -1, dtype=np.int64)
+        singles = 1 << np.arange(m)
+        dp[singles, np.arange(m)] = self.dist[0, inner]
+
+        masks = np.arange(size)
+        popcount = np.array([bin(x).count("1") for x in range(size)])
+        for k in range(2, m + 1):
+            layer = masks[popcount == k]
+            for j in range(m):
+                cur = layer[(layer >> j) & 1 == 1]
+                prev = cur ^ (1 << j)
+                cand = dp[prev] + d_inner[:, j]
+                best = np.argmin(cand, axis=1)
+                dp[cur, j] = cand[np.arange(len(cur)), best]
+                parent[cur, j] = best
+
+        full = size - 1
+        final = dp[full].copy()
+        if self.fixed_end:
+            final += self.dist[inner, n - 1]
+
+        # Reconstrucción hacia atrás
+        j = int(np.argmin(final))
+        mask = full
+        order = []
+        while j >= 0:
+            order.append(inner[j])
+            j, mask = int(parent[mask, j]), mask ^ (1 << j)
+        tour = [0] + order[::-1]
+        if self.fixed_end:
+            tour.append(n - 1)
+        return tour
+
+    def solve(self, tier=DEFAULT_TIER, time_budget_ms=None):
+        """Greedy + búsqueda local del nivel ``tier``.
+
+        :param str tier: uno de ``TIERS`` ("2opt", "oropt", "3opt", "lk").
+        :param time_budget_ms: presupuesto de tiempo; al agotarse se retorna
+            el mejor trayecto encontrado hasta el momento.
+        :return: lista de índices del trayecto.
+        """
+        if tier not in TIERS:
+            raise ValueError(f"Nivel de optimización desconocido: {tier}")
+        if self.n <= 1:
+            return list(range(self.n))
+        return self.improve(self.nearest_neighbor_tour(0), tier, _deadline(time_budget_ms))
+
+    def improve(self, tour, tier=DEFAULT_TIER, deadline=None):
+        """Aplica los pasos de ``tier`` sobre ``tour`` hasta que ninguno mejora
+        o se alcanza ``deadline`` (``time.perf_counter()``)."""
+        best = self.path_length(tour)
+        while True:
+            for step in TIERS[tier]:
+                tour = getattr(self, step)(tour, deadline=deadline)
+            length = self.path_length(tour)
+            if _expired(deadline) or length >= best - _EPS:
+                break
+            best = length
+        return tour
+
+
+def _deadline(time_budget_ms):
+    if time_budget_ms is None:
+        return None
+    return time.perf_counter() + float(time_budget_ms) / 1000.0
+
+
+def _expired(deadline):
+    return deadline is not None and time.perf_counter() >= deadline
+
+
+# -------------------------------------------------------------------
+# Multi-arranque en paralelo (pool de procesos compartido)
+# -------------------------------------------------------------------
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _pool_context():
+    """Contexto de arranque de los procesos del pool.
+
+    El pool se crea desde un hilo de una petición, con el sondeo y otros pools
+    de hilos en marcha: un ``fork`` copiaría locks tomados por esos hilos y el
+    hijo podría bloquearse. Con ``forkserver`` los hijos salen de un proceso
+    limpio que solo precarga este módulo (``spawn`` donde no existe).
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload([__name__])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def get_process_pool():
+    """Pool de procesos del módulo, creado una sola vez y reutilizado entre
+    solicitudes para no pagar el arranque de procesos en cada llamada."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=_pool_context())
+        return _POOL
+
+
+def shutdown_process_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = None
+
+
+atexit.register(shutdown_process_pool)
+
+
+def _multistart_worker(shm_name, n, fixed_end, tier, deadline_at, seed):
+    """Búsqueda local iterada hasta ``deadline_at``.
+
+    El plazo es absoluto (``time.monotonic()``, común a todos los procesos)
+    y se fija al enviar la tarea: el tiempo que pasó en la cola del pool se
+    descuenta, y una tarea que empieza con el plazo ya vencido no hace nada.
+
+    El trabajador con ``seed == 0`` parte del greedy determinista y el resto
+    de una construcción greedy aleatorizada; después cada uno perturba su
+    mejor trayecto con "double bridge" y lo vuelve a mejorar. La matriz de
+    distancias se lee de memoria compartida (sin pickling).
+    Retorna ``(longitud, trayecto)`` del mejor resultado, o None si el plazo
+    venció antes de empezar.
+    """
+    remaining_ms = (deadline_at - time.monotonic()) * 1000.0
+    if remaining_ms <= 0:
+        return None
+    deadline = _deadline(remaining_ms)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    solver = dist = None
+    try:
+        dist = np.ndarray((n, n), dtype=np.float64, buffer=shm.buf)
+        solver = RouteSolver(None, fixed_end=fixed_end, dist=dist)
+        rng = np.random.default_rng(seed)
+
+        if seed == 0:
+            best_tour = solver.nearest_neighbor_tour(0)
+        else:
+            best_tour = solver.random_greedy_tour(rng)
+        best_tour = solver.improve(best_tour, tier, deadline)
+        best_len = solver.path_length(best_tour)
+
+        while not _expired(deadline):
+            tour = solver.improve(solver.double_bridge(best_tour, rng), tier, deadline)
+            length = solver.path_length(tour)
+            if length < best_len - _EPS:
+                best_len, best_tour = length, tour
+        return best_len, best_tour
+    finally:
+        # Las vistas NumPy sobre el buffer deben soltarse antes de cerrarlo
+        # (si no, close() lanza BufferError y tapa el error original)
+        solver = dist = None
+        shm.close()
+
+
+def solve_multistart(points, workers=None, time_budget_ms=MULTISTART_BUDGET_MS,
+                     tier=DEFAULT_TIER, fixed_end=False, seed=None):
+    """Multi-arranque paralelo: cada proceso del pool ejecuta una búsqueda
+    local iterada con su propia semilla durante ``time_budget_ms`` y se
+    conserva el mejor trayecto. El presupuesto cuenta desde esta llamada,
+    también para las tareas que esperan en la cola del pool compartido. Los
+    procesos que no terminan dentro del presupuesto más ``MULTISTART_GRACE_MS``
+    se descartan (y se cancelan si aún no habían empezado); si ninguno dio
+    resultado, se resuelve en este proceso con lo que quede del presupuesto
+    (al menos ``MULTISTART_FALLBACK_MS``).
+
+    :param int workers: número de procesos a usar (por defecto todos los núcleos).
+    :return: ``(longitud_km, trayecto)``.
+    """
+    if tier not in TIERS:
+        raise ValueError(f"Nivel de optimización desconocido: {tier}")
+    solver = RouteSolver(points, fixed_end=fixed_end)
+    n = solver.n
+    if n <= 3:
+        tour = solver.solve(tier)
+        return solver.path_length(tour), tour
+
+    workers = max(1, min(workers or os.cpu_count() or 1, os.cpu_count() or 1))
+    if time_budget_ms is None:
+        time_budget_ms = MULTISTART_BUDGET_MS
+    deadline_at = time.monotonic() + time_budget_ms / 1000.0
+    base_seed = int(seed) if seed is not None else int(np.random.default_rng().integers(1 << 31))
+
+    shm = shared_memory.SharedMemory(create=True, size=solver.dist.nbytes)
+    try:
+        np.ndarray(solver.dist.shape, dtype=np.float64, buffer=shm.buf)[:] = solver.dist
+        pool = get_process_pool()
+        futures = [
+            pool.submit(_multistart_worker, shm.name, n, fixed_end, tier, deadline_at,
+                        0 if w == 0 else base_seed + w)
+            for w in range(workers)
+        ]
+        done, not_done = wait(futures, timeout=(time_budget_ms + MULTISTART_GRACE_MS) / 1000.0)
+        for future in not_done:
+            future.cancel()
+        failed = [f for f in done if f.exception() is not None]
+        results = [f.result() for f in done if f not in failed and f.result() is not None]
+        if not results and failed:
+            # Todos los que terminaron fallaron: se propaga el error
+            failed[0].result()
+    finally:
+        shm.close()
+        shm.unlink()
+
+    if not results:
+        remaining_ms = (deadline_at - time.monotonic()) * 1000.0
+        tour = solver.solve(tier, time_budget_ms=max(remaining_ms, MULTISTART_FALLBACK_MS))
+        return float(solver.path_length(tour)), tour
+    best_len, best_tour = min(results, key=lambda r: r[0])
+    return float(best_len), best_tour
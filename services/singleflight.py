@@ -0,0 +1,65 @@
+"""
+Coalescencia de llamadas concurrentes idénticas (single-flight).
+Archivo: services/singleflight.py
+
+Si varios hilos piden lo mismo a la vez (misma clave), solo el primero hace
+la llamada real; los demás esperan su ``Future`` y reciben el mismo resultado
+(o la misma excepción). Al terminar, la clave se libera: no es una caché, las
+llamadas posteriores vuelven a salir hacia el servicio.
+"""
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Grupo de llamadas en curso indexadas por clave."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """Ejecuta ``fn(*args, **kwargs)`` salvo que ya haya una llamada con ``key`` en curso.
+
+        :param key: clave hashable que identifica la llamada (incluye todo lo que cambie el resultado).
+        :return: el resultado de la llamada (compartido con los demás llamadores concurrentes).
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        """Llamadas reales, llamadas absorbidas y claves en curso."""
+        with self._lock:
+            total = self.calls + self.coalesced
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+                "coalesced_rate": round(self.coalesced / total, 4) if total else 0.0,
+            }
+
+
+# Grupo compartido por las llamadas a servicios externos (OpenSky, OpenRouter, Nominatim)
+upstream_calls = SingleFlight()
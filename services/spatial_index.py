@@ -0,0 +1,139 @@
+"""
+Índice espacial de rejilla uniforme lat/lon (NumPy).
+Archivo: services/spatial_index.py
+
+Las celdas miden al menos `cell_km` por lado, así que dos puntos a menos de
+`cell_km` siempre caen en la misma celda o en celdas vecinas. Para obtener los
+pares candidatos basta con cruzar cada celda con 4 de sus 8 vecinas (la otra
+mitad se cubre por simetría), en lugar de comparar todos contra todos.
+
+La construcción es un ordenamiento por clave de celda (O(n log n)) y se rehace
+en cada ciclo de sondeo; el costo de los pares es proporcional al número de
+puntos cercanos, no a n². No contempla el salto del antimeridiano (±180°).
+"""
+import numpy as np
+
+from services.geodesy import EARTH_RADIUS_KM, haversine_many
+
+# Kilómetros por grado de latitud
+KM_PER_DEG_LAT = np.pi * EARTH_RADIUS_KM / 180.0
+
+# Desplazamientos (fila, columna) de media vecindad: la propia celda y 4 vecinas
+_HALF_NEIGHBORHOOD = ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1))
+
+# Pares candidatos por bloque al recorrer la rejilla
+BLOCK_PAIRS = 1 << 16
+
+
+class GridIndex:
+    """Rejilla uniforme sobre un conjunto de puntos (lat, lon).
+
+    :param lats: latitudes en grados (los NaN/None quedan fuera del índice).
+    :param lons: longitudes en grados.
+    :param float cell_km: lado mínimo de la celda en km (normalmente el umbral de distancia).
+    """
+
+    def __init__(self, lats, lons, cell_km):
+        if cell_km <= 0:
+            raise ValueError("cell_km debe ser positivo")
+        lats = np.asarray(lats, dtype=float).ravel()
+        lons = np.asarray(lons, dtype=float).ravel()
+        self.cell_km = float(cell_km)
+        self.ids = np.nonzero(np.isfinite(lats) & np.isfinite(lons))[0]
+        self.lats = lats[self.ids]
+        self.lons = lons[self.ids]
+
+        n = len(self.ids)
+        self.cell_lat = self.cell_km / KM_PER_DEG_LAT
+        # El ancho en longitud se calcula en la latitud más alejada del ecuador,
+        # donde un grado mide menos: así ninguna celda queda más angosta que cell_km
+        max_abs_lat = float(np.max(np.abs(self.lats))) if n else 0.0
+        self.cell_lon = self.cell_lat / np.cos(np.radians(min(max_abs_lat, 89.0)))
+
+        rows = np.floor(self.lats / self.cell_lat).astype(np.int64)
+        cols = np.floor(self.lons / self.cell_lon).astype(np.int64)
+        if n:
+            # Columnas desplazadas a [1, width - 2] para que col ± 1 no invada otra fila
+            cols -= cols.min() - 1
+            self.width = int(cols.max()) + 2
+        else:
+            self.width = 2
+        keys = rows * self.width + cols
+
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def candidate_blocks(self, block_size=BLOCK_PAIRS):
+        """Genera los pares candidatos en bloques de ~`block_size` pares.
+
+        Cada bloque es ``(a, b)`` con índices sobre los puntos válidos
+        (`self.lats`/`self.lons`); :meth:`to_original` los traduce a índices
+        de la entrada. Procesar por bloques acota la memoria temporal cuando
+        el radio es grande y hay millones de candidatos.
+        """
+        n = len(self.ids)
+        positions = np.arange(n)
+        for d_row, d_col in _HALF_NEIGHBORHOOD:
+            target = self.sorted_keys + d_row * self.width + d_col
+            end = np.searchsorted(self.sorted_keys, target, side="right")
+            if d_row == 0 and d_col == 0:
+                # Misma celda: solo los que vienen después en el orden (cada par una vez)
+                start = positions + 1
+            else:
+                start = np.searchsorted(self.sorted_keys, target, side="left")
+            counts = np.maximum(end - start, 0)
+            cumulative = np.cumsum(counts)
+            total = int(cumulative[-1]) if n else 0
+            if not total:
+                continue
+            cuts = np.searchsorted(cumulative, np.arange(block_size, total, block_size))
+            for lo, hi in zip(np.r_[0, cuts], np.r_[cuts, n]):
+                block_counts = counts[lo:hi]
+                block_total = int(block_counts.sum())
+                if not block_total:
+                    continue
+                src = np.repeat(positions[lo:hi], block_counts)
+                offsets = np.arange(block_total) - np.repeat(np.cumsum(block_counts) - block_counts, block_counts)
+                dst = np.repeat(start[lo:hi], block_counts) + offsets
+                yield self.order[src], self.order[dst]
+
+    def to_original(self, i, j):
+        """Índices de puntos válidos -> índices de la entrada, con ``i < j``."""
+        lo, hi = np.minimum(i, j), np.maximum(i, j)
+        return self.ids[lo], self.ids[hi]
+
+    def candidate_pairs(self):
+        """Pares ``(i, j)`` (índices originales, ``i < j``, sin repetir) en celdas vecinas.
+
+        Incluye todos los pares a menos de `cell_km` y algunos más lejanos;
+        el filtro exacto lo hace :meth:`pairs_within`.
+        """
+        blocks = list(self.candidate_blocks())
+        if not blocks:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return self.to_original(np.concatenate([b[0] for b in blocks]), np.concatenate([b[1] for b in blocks]))
+
+    def pairs_within(self, radius_km=None):
+        """Pares ``(i, j, dist_km)`` a menos de `radius_km` (por defecto `cell_km`),
+        con ``i < j`` y ordenados por ``(i, j)``."""
+        radius_km = self.cell_km if radius_km is None else radius_km
+        if radius_km > self.cell_km:
+            raise ValueError("radius_km no puede exceder el tamaño de celda")
+        found_i, found_j, found_d = [], [], []
+        for a, b in self.candidate_blocks():
+            dist = haversine_many(self.lats[a], self.lons[a], self.lats[b], self.lons[b])
+            keep = dist < radius_km
+            i, j = self.to_original(a[keep], b[keep])
+            found_i.append(i)
+            found_j.append(j)
+            found_d.append(dist[keep])
+        if not found_i:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0)
+        i, j, dist = np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_d)
+        order = np.lexsort((j, i))
+        return i[order], j[order], dist[order]
@@ -0,0 +1,393 @@
+"""
+Almacén histórico de posiciones en disco (vectores de estado y trayectorias).
+Archivo: services/track_store.py
+
+Solo se agregan datos (append-only): las filas se acumulan en un búfer en
+memoria y se vuelcan en chunks inmutables, uno por directorio, con una
+columna por archivo ``.npy`` que se lee con ``np.load(mmap_mode="r")``.
+
+Dentro de cada chunk las filas van ordenadas por (icao24, tiempo) y se
+codifican así:
+
+* icao24: una sola vez por aeronave (``ids`` + ``offsets``, estilo CSR);
+* tiempo y lat/lon (cuantizadas a 1e-5 grados ≈ 1 m): valor inicial por
+  aeronave y deltas dentro de su serie, con el entero más angosto que quepa
+  (int8/int16/int32) elegido por chunk;
+* altitud, velocidad y rumbo en ``float32``; ``on_ground`` como ``bool``.
+
+El ``meta.json`` de cada chunk guarda su rango de tiempo, de modo que una
+consulta por ventana de tiempo y/o aeronave solo abre los chunks que se
+solapan y, dentro de ellos, solo decodifica las series pedidas.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Filas por chunk al volcar el búfer
+CHUNK_ROWS = 1 << 16
+# Ventana (s, tiempo de los datos) en la que se recuerda el último instante de cada aeronave
+DEDUPE_WINDOW_S = 24 * 3600
+# Cuantización de lat/lon (1e-5 grados ≈ 1 m)
+COORD_SCALE = 100000
+
+COLUMNS = ("icao24", "time", "lat", "lon", "alt", "velocity", "heading", "on_ground")
+_DELTA_COLUMNS = ("time", "lat", "lon")
+_FLOAT_COLUMNS = ("alt", "velocity", "heading")
+# Bytes por fila de las mismas columnas sin codificar (int64/float64 y 6 caracteres de icao24)
+_RAW_BYTES_PER_ROW = 6 + 8 * 6 + 1
+
+
+def icao_id(icao24):
+    """Entero de 24 bits de un icao24 hexadecimal; None si no es válido."""
+    icao24 = str(icao24).strip()
+    if not 0 < len(icao24) <= 6:
+        return None
+    try:
+        return int(icao24, 16)
+    except ValueError:
+        return None
+
+
+def _narrowest(values):
+    """``values`` (int64) en el entero con signo más angosto que los contiene."""
+    if not len(values):
+        return values.astype(np.int8)
+    low, high = int(values.min()), int(values.max())
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values
+
+
+def _decode_runs(base, deltas, counts):
+    """Reconstruye series codificadas como valor inicial + deltas (el primero de cada serie es 0)."""
+    if not len(deltas):
+        return np.empty(0, dtype=np.int64)
+    cs = np.cumsum(deltas, dtype=np.int64)
+    starts = np.cumsum(counts) - counts
+    return cs + np.repeat(base - cs[starts], counts)
+
+
+class QueryTooLarge(Exception):
+    """La consulta devolvería más de ``limit`` filas (se corta antes de decodificarla entera)."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        super().__init__(f"La consulta devuelve más de {limit} posiciones")
+
+
+class _Chunk:
+    """Chunk inmutable en disco; las columnas se mapean en memoria al primer uso."""
+
+    def __init__(self, path):
+        self.path = path
+        meta = json.loads((path / "meta.json").read_text())
+        self.rows = meta["rows"]
+        self.t_min = meta["t_min"]
+        self.t_max = meta["t_max"]
+        # Inmutable: el tamaño en disco se mide una sola vez
+        self.nbytes = sum(f.stat().st_size for f in path.iterdir())
+        self._arrays = {}
+
+    def array(self, name):
+        arr = self._arrays.get(name)
+        if arr is None:
+            arr = self._arrays[name] = np.load(self.path / f"{name}.npy", mmap_mode="r")
+        return arr
+
+    def read(self, wanted=None):
+        """Columnas decodificadas de todas las aeronaves o solo de los ids ``wanted`` (ordenados)."""
+        ids = self.array("ids")
+        offsets = self.array("offsets")
+        if wanted is None:
+            runs = np.arange(len(ids))
+        else:
+            # `ids` está ordenado: búsqueda binaria de cada aeronave pedida
+            pos = np.searchsorted(ids, wanted)
+            hit = pos < len(ids)
+            hit[hit] = ids[pos[hit]] == wanted[hit]
+            runs = pos[hit]
+        starts = np.asarray(offsets[runs], dtype=np.int64)
+        counts = np.asarray(offsets[runs + 1], dtype=np.int64) - starts
+        if wanted is None:
+            rows = slice(None)
+        else:
+            rows = np.empty(0, dtype=np.int64)
+            if len(runs):
+                rows = np.concatenate([np.arange(s, s + c) for s, c in zip(starts, counts)])
+
+        out = {"icao24": np.repeat(np.asarray(ids[runs], dtype=np.uint32), counts)}
+        for name in _DELTA_COLUMNS:
+            base = np.asarray(self.array(f"{name}_base")[runs], dtype=np.int64)
+            out[name] = _decode_runs(base, np.asarray(self.array(f"{name}_delta")[rows]), counts)
+        out["lat"] = out["lat"] / COORD_SCALE
+        out["lon"] = out["lon"] / COORD_SCALE
+        for name in _FLOAT_COLUMNS + ("on_ground",):
+            out[name] = np.asarray(self.array(name)[rows])
+        return out
+
+
+def _encode(cols):
+    """Columnas ordenadas por (icao24, tiempo) -> arrays a escribir en un chunk."""
+    icao = cols["icao24"]
+    n = len(icao)
+    starts = np.flatnonzero(np.r_[True, icao[1:] != icao[:-1]])
+    arrays = {
+        "ids": icao[starts].astype(np.uint32),
+        "offsets": np.r_[starts, n].astype(np.int64),
+    }
+    quantized = {
+        "time": cols["time"].astype(np.int64),
+        "lat": np.round(cols["lat"] * COORD_SCALE).astype(np.int64),
+        "lon": np.round(cols["lon"] * COORD_SCALE).astype(np.int64),
+    }
+    for name, values in quantized.items():
+        deltas = np.diff(values, prepend=values[:1])
+        deltas[starts] = 0
+        arrays[f"{name}_base"] = _narrowest(values[starts]) if name != "time" else values[starts]
+        arrays[f"{name}_delta"] = _narrowest(deltas)
+    for name in _FLOAT_COLUMNS:
+        arrays[name] = cols[name].astype(np.float32)
+    arrays["on_ground"] = cols["on_ground"].astype(bool)
+    return arrays
+
+
+def _sort_dedupe(cols):
+    """Ordena por (icao24, tiempo) y elimina filas repetidas de la misma aeronave e instante."""
+    order = np.lexsort((cols["time"], cols["icao24"]))
+    cols = {name: arr[order] for name, arr in cols.items()}
+    icao, t = cols["icao24"], cols["time"]
+    keep = np.r_[True, (icao[1:] != icao[:-1]) | (t[1:] != t[:-1])]
+    if keep.all():
+        return cols
+    return {name: arr[keep] for name, arr in cols.items()}
+
+
+class TrackStore:
+    """Serie histórica de posiciones por aeronave, en chunks columnares en disco.
+
+    :param path: directorio del almacén (se crea si no existe).
+    :param int chunk_rows: filas del búfer que disparan un volcado a disco (un chunk por volcado).
+    :param float flush_interval_s: antigüedad máxima del búfer antes de volcarlo
+        aunque no esté lleno (se revisa en cada ``append``).
+    :param float dedupe_window_s: las aeronaves cuyo último instante guardado
+        queda más de esta ventana por detrás del dato más reciente se olvidan
+        (acota la memoria; sus filas repetidas las descarta luego ``query``).
+    """
+
+    def __init__(self, path, chunk_rows=CHUNK_ROWS, flush_interval_s=300.0, dedupe_window_s=DEDUPE_WINDOW_S):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.chunk_rows = max(1, chunk_rows)
+        self.flush_interval_s = flush_interval_s
+        self.dedupe_window_s = dedupe_window_s
+        self._lock = threading.Lock()
+        self._chunks = [_Chunk(p) for p in sorted(self.path.glob("chunk-*")) if (p / "meta.json").exists()]
+        self._seq = max((int(c.path.name.split("-")[1]) for c in self._chunks), default=0)
+        self._buffer = []
+        self._buffered_rows = 0
+        self._buffer_since = None
+        # Último instante guardado por aeronave: evita repetir un vector de estado sin cambios
+        # entre sondeos y los waypoints de una trayectoria ingerida dos veces
+        self._last_time = {}
+        self._latest = None
+        self._prune_at = 1024
+
+    def append(self, icao24, times, lats, lons, alts=None, velocities=None, headings=None, on_ground=None):
+        """Agrega posiciones (una por elemento de cada secuencia).
+
+        Se descartan filas sin posición o tiempo, con icao24 no hexadecimal, o
+        que no son posteriores al último instante guardado de su aeronave: cada
+        serie solo avanza en el tiempo (volver a ingerir un intervalo no lo duplica).
+
+        :return: número de filas aceptadas.
+        """
+        n = len(icao24)
+        missing = np.full(n, np.nan)
+        ids = (icao_id(i) for i in icao24)
+        cols = {
+            "icao24": np.array([-1 if i is None else i for i in ids], dtype=np.int64),
+            "time": np.asarray(times, dtype=float),
+            "lat": np.asarray(lats, dtype=float),
+            "lon": np.asarray(lons, dtype=float),
+            "alt": missing if alts is None else np.asarray(alts, dtype=float),
+            "velocity": missing if velocities is None else np.asarray(velocities, dtype=float),
+            "heading": missing if headings is None else np.asarray(headings, dtype=float),
+            "on_ground": np.zeros(n, dtype=bool) if on_ground is None
+            else np.array([bool(v) for v in on_ground], dtype=bool),
+        }
+        valid = (cols["icao24"] >= 0) & np.isfinite(cols["time"]) & np.isfinite(cols["lat"]) & np.isfinite(cols["lon"])
+        cols = {name: arr[valid] for name, arr in cols.items()}
+        cols["time"] = cols["time"].astype(np.int64)
+        if not len(cols["time"]):
+            return 0
+        cols = _sort_dedupe(cols)
+
+        with self._lock:
+            last = self._last_time
+            icao, t = cols["icao24"], cols["time"]
+            keep = np.array([ti > last.get(i, ti - 1) for i, ti in zip(icao.tolist(), t.tolist())], dtype=bool)
+            cols = {name: arr[keep] for name, arr in cols.items()}
+            accepted = len(cols["time"])
+            if accepted:
+                ends = np.flatnonzero(np.r_[cols["icao24"][1:] != cols["icao24"][:-1], True])
+                # Dentro de cada aeronave las filas van ordenadas: la última es la más reciente
+                last.update(zip(cols["icao24"][ends].tolist(), cols["time"][ends].tolist()))
+                newest = int(cols["time"].max())
+                self._latest = newest if self._latest is None else max(self._latest, newest)
+                if len(last) > self._prune_at:
+                    self._prune_last_time_locked()
+                self._buffer.append(cols)
+                self._buffered_rows += accepted
+                if self._buffer_since is None:
+                    self._buffer_since = time.monotonic()
+            due = self._buffered_rows >= self.chunk_rows or (
+                self._buffer_since is not None and time.monotonic() - self._buffer_since >= self.flush_interval_s)
+            if due:
+                self._flush_locked()
+        return accepted
+
+    def _prune_last_time_locked(self):
+        oldest = self._latest - self.dedupe_window_s
+        self._last_time = {i: t for i, t in self._last_time.items() if t >= oldest}
+        # Se vuelve a podar cuando el mapa duplique lo que sobrevivió (costo amortizado O(1))
+        self._prune_at = max(1024, 2 * len(self._last_time))
+
+    def append_track(self, track):
+        """Agrega los waypoints de un `FlightTrack` de OpenSky; retorna las filas aceptadas."""
+        path = getattr(track, "path", None) or []
+        if not path:
+            return 0
+        return self.append(
+            [track.icao24] * len(path),
+            [w.time for w in path],
+            [np.nan if w.latitude is None else w.latitude for w in path],
+            [np.nan if w.longitude is None else w.longitude for w in path],
+            alts=[np.nan if w.baro_altitude is None else w.baro_altitude for w in path],
+            headings=[np.nan if w.true_track is None else w.true_track for w in path],
+            on_ground=[w.on_ground for w in path],
+        )
+
+    def flush(self):
+        """Vuelca el búfer a un chunk nuevo (si hay filas pendientes)."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        self._write_chunk(_sort_dedupe({
+            name: np.concatenate([part[name] for part in self._buffer]) for name in COLUMNS
+        }))
+        self._buffer = []
+        self._buffered_rows = 0
+        self._buffer_since = None
+
+    def _write_chunk(self, cols):
+        self._seq += 1
+        tmp = self.path / f".tmp-{os.getpid()}-{self._seq:08d}"
+        tmp.mkdir(parents=True, exist_ok=True)
+        for name, arr in _encode(cols).items():
+            np.save(tmp / f"{name}.npy", arr)
+        meta = {
+            "rows": int(len(cols["time"])),
+            "t_min": int(cols["time"].min()),
+            "t_max": int(cols["time"].max()),
+            "aircraft": int(len(np.unique(cols["icao24"]))),
+            "created": time.time(),
+        }
+        (tmp / "meta.json").write_text(json.dumps(meta))
+        # El chunk solo aparece completo: el renombrado es atómico. Si otro proceso
+        # que comparte el directorio ya usó ese número, se toma el siguiente
+        while True:
+            final = self.path / f"chunk-{self._seq:08d}"
+            try:
+                os.rename(tmp, final)
+                break
+            except OSError:
+                if not final.exists():
+                    raise
+                self._seq += 1
+        self._chunks.append(_Chunk(final))
+
+    def query(self, begin=None, end=None, icao24=None, max_rows=None):
+        """Posiciones en ``[begin, end]`` (Unix s) de todas las aeronaves o de ``icao24``.
+
+        :param icao24: un icao24 o una lista de ellos (None = todas).
+        :param int max_rows: tope de filas; los chunks se filtran uno a uno y la
+            consulta se corta en cuanto lo supera, sin decodificar el resto.
+        :return: dict de arrays por columna (``icao24`` como cadenas hexadecimales),
+            ordenados por (icao24, tiempo).
+        :raises QueryTooLarge: si el resultado supera ``max_rows``.
+        """
+        wanted = None
+        if icao24 is not None:
+            icao24 = [icao24] if isinstance(icao24, str) else icao24
+            wanted = np.unique(np.array([i for i in map(icao_id, icao24) if i is not None], dtype=np.int64))
+
+        with self._lock:
+            chunks = list(self._chunks)
+            buffered = list(self._buffer)
+
+        def select(part):
+            part = {name: np.asarray(part[name]) for name in COLUMNS}
+            mask = np.ones(len(part["time"]), dtype=bool)
+            if wanted is not None:
+                mask &= np.isin(part["icao24"], wanted)
+            if begin is not None:
+                mask &= part["time"] >= begin
+            if end is not None:
+                mask &= part["time"] <= end
+            return {name: arr[mask] for name, arr in part.items()}
+
+        def loaded():
+            for chunk in chunks:
+                if (begin is not None and chunk.t_max < begin) or (end is not None and chunk.t_min > end):
+                    continue
+                yield chunk.read(wanted)
+            yield from buffered
+
+        parts = []
+        rows = 0
+        for part in loaded():
+            part = select(part)
+            rows += len(part["time"])
+            # Las filas repetidas aún no se descontaron: el tope es conservador
+            if max_rows is not None and rows > max_rows:
+                raise QueryTooLarge(max_rows)
+            parts.append(part)
+
+        cols = {
+            name: np.concatenate([part[name] for part in parts]) if parts else np.empty(0)
+            for name in COLUMNS
+        }
+        cols["icao24"] = cols["icao24"].astype(np.int64)
+        cols["time"] = cols["time"].astype(np.int64)
+        cols = _sort_dedupe(cols)
+        ids, inverse = np.unique(cols["icao24"], return_inverse=True)
+        cols["icao24"] = np.array([f"{i:06x}" for i in ids.tolist()], dtype=object)[inverse]
+        cols["on_ground"] = cols["on_ground"].astype(bool)
+        return cols
+
+    def stats(self):
+        """Tamaño del almacén y bytes por fila frente a las columnas sin codificar."""
+        with self._lock:
+            chunks = list(self._chunks)
+            buffered = self._buffered_rows
+        rows = sum(c.rows for c in chunks)
+        nbytes = sum(c.nbytes for c in chunks)
+        return {
+            "chunks": len(chunks),
+            "rows": rows,
+            "buffered_rows": buffered,
+            "bytes_on_disk": nbytes,
+            "bytes_per_row": round(nbytes / rows, 2) if rows else 0.0,
+            "raw_bytes_per_row": _RAW_BYTES_PER_ROW,
+            "t_min": min((c.t_min for c in chunks), default=None),
+            "t_max": max((c.t_max for c in chunks), default=None),
+        }
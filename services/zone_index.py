@@ -0,0 +1,150 @@
+"""
+Índice de zonas de restricción (círculos y polígonos) sobre una rejilla lat/lon.
+Archivo: services/zone_index.py
+
+Cada zona se reduce a su círculo envolvente y se registra (carga masiva, una
+sola vez) en todas las celdas que toca su caja envolvente. Una consulta ubica
+cada vuelo en su celda y solo prueba las zonas registradas ahí, de modo que el
+costo es vuelos × zonas locales y no vuelos × todas las zonas.
+
+Formatos de zona aceptados::
+
+    {"name": "CDMX Centro", "lat": 19.5, "lon": -99.5, "radius": 15}       # círculo (km)
+    {"name": "Base Aérea", "polygon": [[19.6, -99.1], [19.7, -99.0], ...]}  # polígono [lat, lon]
+
+No contempla el salto del antimeridiano (±180°).
+"""
+import numpy as np
+
+from services.geodesy import haversine_many
+from services.spatial_index import KM_PER_DEG_LAT
+
+# Lado de celda por defecto (km); del orden del radio de una zona típica
+DEFAULT_CELL_KM = 25.0
+
+
+def _points_in_polygon(lats, lons, polygon):
+    """Prueba de cruce de rayos (plano lat/lon) de varios puntos contra un polígono."""
+    ys = polygon[:, 0]
+    xs = polygon[:, 1]
+    inside = np.zeros(len(lats), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for k in range(len(polygon)):
+            ya, xa, yb, xb = ys[k], xs[k], ys[k - 1], xs[k - 1]
+            crosses = (ya > lats) != (yb > lats)
+            x_cross = (xb - xa) * (lats - ya) / (yb - ya) + xa
+            inside ^= crosses & (lons < x_cross)
+    return inside
+
+
+class ZoneIndex:
+    """Índice estático de zonas de restricción.
+
+    :param zones: lista de dicts de zona (ver formatos en el módulo).
+    :param float cell_km: lado de celda de la rejilla en km.
+    :raises ValueError: si alguna zona no es un círculo ni un polígono válido.
+    """
+
+    def __init__(self, zones, cell_km=DEFAULT_CELL_KM):
+        if cell_km <= 0:
+            raise ValueError("cell_km debe ser positivo")
+        self.zones = zones
+        self.cell_deg = cell_km / KM_PER_DEG_LAT
+        self.cols = int(np.ceil(360.0 / self.cell_deg)) + 1
+
+        n = len(zones)
+        self.center_lat = np.empty(n)
+        self.center_lon = np.empty(n)
+        self.radius = np.empty(n)
+        self.polygons = {}
+        for k, zone in enumerate(zones):
+            self._load_zone(k, zone)
+        self._build_cells()
+
+    def _load_zone(self, k, zone):
+        if zone.get('polygon') is not None:
+            polygon = np.asarray(zone['polygon'], dtype=float)
+            if polygon.ndim != 2 or polygon.shape[1] != 2 or len(polygon) < 3:
+                raise ValueError(f"Polígono inválido en la zona '{zone.get('name')}'")
+            lat, lon = polygon.mean(axis=0)
+            radius = float(np.max(haversine_many(lat, lon, polygon[:, 0], polygon[:, 1])))
+            self.polygons[k] = polygon
+        else:
+            try:
+                lat, lon, radius = float(zone['lat']), float(zone['lon']), float(zone['radius'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Zona inválida '{zone.get('name')}': se espera lat/lon/radius o polygon")
+        self.center_lat[k] = lat
+        self.center_lon[k] = lon
+        self.radius[k] = radius
+
+    def _cell_keys(self, lats, lons):
+        rows = np.floor((np.asarray(lats) + 90.0) / self.cell_deg).astype(np.int64)
+        cols = np.floor((np.asarray(lons) + 180.0) / self.cell_deg).astype(np.int64)
+        return rows * self.cols + cols
+
+    def _build_cells(self):
+        """Registra cada zona en las celdas de su caja envolvente (formato CSR)."""
+        keys, owners = [], []
+        for k in range(len(self.zones)):
+            lat, lon, radius = self.center_lat[k], self.center_lon[k], self.radius[k]
+            d_lat = radius / KM_PER_DEG_LAT
+            # Ancho en longitud medido en el borde más cercano al polo
+            d_lon = d_lat / np.cos(np.radians(min(abs(lat) + d_lat, 89.0)))
+            row0, col0 = np.floor((np.array([lat - d_lat, lon - d_lon]) + [90.0, 180.0]) / self.cell_deg)
+            row1, col1 = np.floor((np.array([lat + d_lat, lon + d_lon]) + [90.0, 180.0]) / self.cell_deg)
+            rows, cols = np.meshgrid(np.arange(row0, row1 + 1), np.arange(col0, col1 + 1), indexing="ij")
+            cell_keys = (rows * self.cols + cols).astype(np.int64).ravel()
+            keys.append(cell_keys)
+            owners.append(np.full(len(cell_keys), k, dtype=np.int64))
+
+        keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.int64)
+        owners = np.concatenate(owners) if owners else np.empty(0, dtype=np.int64)
+        order = np.lexsort((owners, keys))
+        keys, self.cell_zones = keys[order], owners[order]
+        self.cell_keys, self.cell_start = np.unique(keys, return_index=True)
+        self.cell_end = np.append(self.cell_start[1:], len(keys))
+
+    def __len__(self):
+        return len(self.zones)
+
+    def candidates(self, lats, lons):
+        """Pares ``(i, k)`` de vuelo y zona cuya celda coincide (ordenados por vuelo, zona)."""
+        lats = np.asarray(lats, dtype=float).ravel()
+        lons = np.asarray(lons, dtype=float).ravel()
+        valid = np.nonzero(np.isfinite(lats) & np.isfinite(lons))[0]
+        empty = np.empty(0, dtype=np.int64)
+        if not len(valid) or not len(self.cell_keys):
+            return empty, empty
+
+        keys = self._cell_keys(lats[valid], lons[valid])
+        slot = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+        hit = self.cell_keys[slot] == keys
+        flights, slot = valid[hit], slot[hit]
+        counts = self.cell_end[slot] - self.cell_start[slot]
+        total = int(counts.sum())
+        if not total:
+            return empty, empty
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(flights, counts), self.cell_zones[np.repeat(self.cell_start[slot], counts) + offsets]
+
+    def query(self, lats, lons):
+        """Vuelos dentro de alguna zona.
+
+        :return: arrays ``(i, k, dist_km)``: índice de vuelo, índice de zona y
+            distancia del vuelo al centro de la zona, ordenados por ``(i, k)``.
+        """
+        lats = np.asarray(lats, dtype=float).ravel()
+        lons = np.asarray(lons, dtype=float).ravel()
+        i, k = self.candidates(lats, lons)
+        dist = haversine_many(lats[i], lons[i], self.center_lat[k], self.center_lon[k])
+        inside = dist < self.radius[k]
+
+        # Los polígonos pasan el filtro del círculo envolvente y luego la prueba exacta
+        if self.polygons:
+            is_polygon = np.isin(k, list(self.polygons))
+            for zone in np.unique(k[inside & is_polygon]):
+                rows = np.nonzero(inside & (k == zone))[0]
+                inside[rows] = _points_in_polygon(lats[i[rows]], lons[i[rows]], self.polygons[zone])
+
+        return i[inside], k[inside], dist[inside]
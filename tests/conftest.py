@@ -0,0 +1,7 @@
+"""
+Configuración de pytest: la raíz del proyecto va en sys.path para importar `services` y `app`.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
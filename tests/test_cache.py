@@ -0,0 +1,92 @@
+"""
+Tests de la caché LRU con TTL (services/cache.py) y de la clave de rutas (app.route_cache_key).
+Ejecutar: pytest tests/test_cache.py -v
+"""
+from app import DEFAULT_TIER, route_cache_key
+from services.cache import TTLCache
+
+ORIGEN = (19.4326, -99.1332)
+DESTINO = (19.4361, -99.0719)
+RESTRICCIONES = [(19.42, -99.10), (19.45, -99.12), (19.41, -99.09)]
+
+
+def test_lru_evicts_least_recently_used():
+    cache = TTLCache(maxsize=3, ttl=60)
+    for key in "abc":
+        cache.set(key, key.upper())
+    # Leer "a" la vuelve la más reciente: el desalojo se lleva a "b"
+    assert cache.get("a") == "A"
+    cache.set("d", "D")
+    assert [cache.get(key) for key in "abcd"] == ["A", None, "C", "D"]
+    # Reescribir también cuenta como uso
+    cache.set("c", "C2")
+    cache.set("e", "E")
+    assert cache.get("a") is None
+    assert [cache.get(key) for key in "cde"] == ["C2", "D", "E"]
+    assert len(cache) == 3
+    assert cache.stats()["evictions"] == 2
+
+
+def test_ttl_expiry():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("vigente", 1)
+    cache.set("vencida", 2, ttl=0)
+    assert cache.get("vencida", "default") == "default"
+    assert cache.get("vigente") == 1
+    # La entrada vencida se elimina al consultarla
+    assert len(cache) == 1
+    assert cache.stats()["expirations"] == 1
+
+
+def test_counters():
+    cache = TTLCache(maxsize=2, ttl=60)
+    assert cache.stats()["hit_rate"] == 0.0
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=0)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+    cache.get("nada")
+    cache.set("c", 3)
+    cache.set("d", 4)
+    stats = cache.stats()
+    assert stats == {
+        "size": 2, "maxsize": 2, "ttl_s": 60, "hits": 2, "misses": 2, "hit_rate": 0.5,
+        "expirations": 1, "evictions": 1,
+    }
+    cache.clear()
+    assert len(cache) == 0
+    # Vaciar no reinicia los contadores
+    assert cache.stats()["hits"] == 2
+
+
+def test_route_key_ignores_restriction_order():
+    key = route_cache_key(ORIGEN, DESTINO, RESTRICCIONES)
+    assert route_cache_key(ORIGEN, DESTINO, RESTRICCIONES[::-1]) == key
+    assert route_cache_key(list(ORIGEN), list(DESTINO), [list(p) for p in RESTRICCIONES]) == key
+    # Origen y destino no son intercambiables
+    assert route_cache_key(DESTINO, ORIGEN, RESTRICCIONES) != key
+
+
+def test_route_key_rounds_coordinates():
+    key = route_cache_key(ORIGEN, DESTINO, RESTRICCIONES)
+    # Menos de medio metro de diferencia cae en la misma clave; 10 m no
+    nudged = (ORIGEN[0] + 4e-6, ORIGEN[1] - 4e-6)
+    assert route_cache_key(nudged, DESTINO, RESTRICCIONES) == key
+    assert route_cache_key(("19.4326", "-99.1332"), DESTINO, RESTRICCIONES) == key
+    assert route_cache_key((ORIGEN[0] + 1e-4, ORIGEN[1]), DESTINO, RESTRICCIONES) != key
+
+
+def test_route_key_includes_solver_options():
+    base = route_cache_key(ORIGEN, DESTINO, RESTRICCIONES)
+    assert route_cache_key(ORIGEN, DESTINO, RESTRICCIONES, DEFAULT_TIER) == base
+    keys = {
+        base,
+        route_cache_key(ORIGEN, DESTINO, RESTRICCIONES, tier="oropt"),
+        route_cache_key(ORIGEN, DESTINO, RESTRICCIONES, tier="lk"),
+        route_cache_key(ORIGEN, DESTINO, RESTRICCIONES, time_budget_ms=100),
+        route_cache_key(ORIGEN, DESTINO, RESTRICCIONES, time_budget_ms=2000),
+        route_cache_key(ORIGEN, DESTINO, RESTRICCIONES, workers=2),
+        route_cache_key(ORIGEN, DESTINO, RESTRICCIONES, workers=4),
+    }
+    assert len(keys) == 7
@@ -0,0 +1,123 @@
+"""
+Tests de la memoria de conflictos (services/conflict_store.py): histéresis y TTL.
+Ejecutar: pytest tests/test_conflict_store.py -v
+"""
+import time
+
+from services.conflict_store import ConflictStore
+
+
+def test_enter_hysteresis():
+    store = ConflictStore(enter_ticks=2, exit_ticks=3)
+    key = store.pair_key("abc123", "def456")
+    now = time.monotonic()
+
+    assert store.update([key], now=now) == set()
+    assert key not in store
+    assert store.update([key], now=now + 1) == {key}
+    assert key in store
+    # Sigue en conflicto: no vuelve a alertar
+    assert store.update([key], now=now + 2) == set()
+
+
+def test_exit_hysteresis_and_realert():
+    store = ConflictStore(exit_ticks=3)
+    key = store.pair_key("abc123", "def456")
+    now = time.monotonic()
+
+    assert store.update([key], now=now) == {key}
+    # Dos ciclos sin observarse y reaparece: sigue activo, sin alerta nueva
+    store.update([], now=now + 1)
+    store.update([], now=now + 2)
+    assert store.update([key], now=now + 3) == set()
+
+    # Tres ciclos seguidos sin observarse: sale, y al reaparecer alerta otra vez
+    for tick in range(4, 7):
+        store.update([], now=now + tick)
+    assert key not in store
+    assert store.update([key], now=now + 7) == {key}
+    assert store.stats()["exited"] == 1
+
+
+def test_pair_key_is_symmetric_and_distinct_from_zone_key():
+    store = ConflictStore()
+    assert store.pair_key("abc123", "def456") == store.pair_key("def456", "abc123")
+    assert store.pair_key("SIM-1", "SIM-2") == store.pair_key("SIM-2", "SIM-1")
+    assert store.zone_key("abc123", 0) != store.pair_key("abc123", "000000")
+
+
+def test_flight_id_only_parses_plain_hex():
+    store = ConflictStore()
+    assert store.flight_id("abc123") == store.flight_id("ABC123") == 0xabc123
+    assert store.flight_id("1f") == 0x1f
+    # int(x, 16) los aceptaría; se internan aparte sin chocar con icao24 hexadecimales
+    odd = ["-1", "0x1f", "a_b", " abc ", "", "abc1234"]
+    ids = [store.flight_id(icao24) for icao24 in odd]
+    assert all(ident > 0xffffff for ident in ids)
+    assert len(set(ids)) == len(odd)
+    assert store.flight_id("0x1f") == ids[1]
+    assert store.pair_key("0x1f", "abc") != store.pair_key("1f", "abc")
+
+
+def test_ttl_expires_entries_without_cycles():
+    store = ConflictStore(ttl=60, exit_ticks=100)
+    key = store.pair_key("abc123", "def456")
+    now = time.monotonic()
+
+    store.update([key], now=now - 120)
+    # Sin más ciclos de sondeo: la entrada vence igual al consultarla
+    assert key not in store
+    assert len(store) == 0
+    assert store.stats()["expirations"] == 1
+
+
+def test_ttl_expires_unobserved_entries_before_exit_ticks():
+    store = ConflictStore(ttl=60, exit_ticks=100)
+    key = store.pair_key("abc123", "def456")
+    now = time.monotonic()
+
+    assert store.update([key], now=now) == {key}
+    store.update([], now=now + 30)
+    assert store.update([], now=now + 61) == set()
+    assert store.stats()["expirations"] == 1
+    # Tras expirar, reaparecer es un conflicto nuevo
+    assert store.update([key], now=now + 62) == {key}
+
+
+def test_persistent_conflict_realerts_every_ttl():
+    store = ConflictStore(ttl=60)
+    key = store.pair_key("abc123", "def456")
+    # Base entera: con una fraccionaria, (now + 60) - 60 puede quedar por debajo de now
+    now = float(int(time.monotonic()))
+
+    assert store.update([key], now=now) == {key}
+    assert store.update([key], now=now + 30) == set()
+    assert store.update([key], now=now + 60) == {key}
+    assert store.update([key], now=now + 90) == set()
+    assert store.update([key], now=now + 120) == {key}
+    assert store.stats()["reminders"] == 2
+
+
+def test_maxsize_evicts_least_recent():
+    store = ConflictStore(maxsize=3, exit_ticks=100)
+    now = time.monotonic()
+    keys = [store.zone_key(f"{k:06x}", 0) for k in range(5)]
+    for k, key in enumerate(keys):
+        store.update([key], now=now + k)
+    assert len(store) == 3
+    assert [key in store for key in keys] == [False, False, True, True, True]
+    assert store.stats()["evictions"] == 2
+
+
+def test_interned_ids_are_pruned_with_their_entries():
+    store = ConflictStore(exit_ticks=1)
+    now = time.monotonic()
+    for k in range(5000):
+        store.update([store.pair_key(f"SIM-{k}", f"SIM-{k}b")], now=now + k)
+    stats = store.stats()
+    assert stats["size"] <= 1
+    assert stats["interned"] <= 2 * stats["size"] + 1024 + 2
+
+    # Un id podado se vuelve a internar sin chocar con los vigentes
+    live = store.pair_key("SIM-4999", "SIM-4999b")
+    assert store.pair_key("SIM-0", "SIM-0b") != live
@@ -0,0 +1,92 @@
+"""
+Tests de la predicción de conflictos por punto de máximo acercamiento (services/cpa.py).
+Ejecutar: pytest tests/test_cpa.py -v
+"""
+import numpy as np
+import pytest
+
+from services.cpa import predict_conflicts
+from services.spatial_index import KM_PER_DEG_LAT
+
+# Dos aeronaves sobre el ecuador a 20 km, de frente a 100 m/s cada una (cierre 0.2 km/s)
+GAP_KM = 20.0
+HEAD_ON = {
+    "lats": [0.0, 0.0],
+    "lons": [0.0, GAP_KM / KM_PER_DEG_LAT],
+    "alts": [10000.0, 10000.0],
+    "velocities": [100.0, 100.0],
+    "headings": [90.0, 270.0],
+}
+
+
+def predict(separation_km=5.0, horizon_s=300.0, **overrides):
+    flights = dict(HEAD_ON, **overrides)
+    return predict_conflicts(flights["lats"], flights["lons"], flights["alts"], flights["velocities"],
+                             flights["headings"], separation_km=separation_km, horizon_s=horizon_s)
+
+
+def test_head_on_closure_timing():
+    found = predict()
+    assert found["i"].tolist() == [0]
+    assert found["j"].tolist() == [1]
+    # Pierden los 5 km de separación tras cerrar 15 km; el acercamiento máximo es al juntarse
+    assert found["t_conflict_s"] == pytest.approx([(GAP_KM - 5.0) / 0.2], abs=0.5)
+    assert found["t_cpa_s"] == pytest.approx([GAP_KM / 0.2], abs=0.5)
+    assert found["d_cpa_km"] == pytest.approx([0.0], abs=0.05)
+
+
+def test_head_on_beyond_horizon_or_diverging():
+    assert len(predict(horizon_s=60.0)["i"]) == 0
+    assert len(predict(headings=[270.0, 90.0])["i"]) == 0
+
+
+def test_already_in_conflict_is_time_zero():
+    found = predict(lons=[0.0, 2.0 / KM_PER_DEG_LAT])
+    assert found["t_conflict_s"].tolist() == [0.0]
+
+
+def test_vertical_separation_suppresses_conflict():
+    assert len(predict(alts=[10000.0, 16000.0])["i"]) == 0
+    # Con 3 km de separación vertical bastan 4 km en horizontal para los 5 km en 3D
+    found = predict(alts=[10000.0, 13000.0])
+    assert found["t_conflict_s"] == pytest.approx([(GAP_KM - 4.0) / 0.2], abs=0.5)
+    assert found["d_cpa_km"] == pytest.approx([3.0], abs=0.05)
+    # Sin altitud no se puede afirmar el conflicto
+    assert len(predict(alts=[10000.0, np.nan])["i"]) == 0
+
+
+def test_nan_positions_are_skipped():
+    found = predict(
+        lats=[np.nan, 0.0, 0.0, 0.0],
+        lons=[0.0, 0.0, np.nan, GAP_KM / KM_PER_DEG_LAT],
+        alts=[10000.0] * 4,
+        velocities=[100.0, 100.0, 100.0, 100.0],
+        headings=[90.0, 90.0, 90.0, 270.0],
+    )
+    # Los índices devueltos son los de la entrada original
+    assert found["i"].tolist() == [1]
+    assert found["j"].tolist() == [3]
+    assert found["t_conflict_s"] == pytest.approx([(GAP_KM - 5.0) / 0.2], abs=0.5)
+
+
+def test_missing_speed_is_treated_as_stationary():
+    found = predict(velocities=[200.0, np.nan], headings=[90.0, np.nan])
+    assert found["t_conflict_s"] == pytest.approx([(GAP_KM - 5.0) / 0.2], abs=0.5)
+
+
+def test_results_sorted_by_time_to_conflict():
+    rng = np.random.default_rng(0)
+    n = 200
+    found = predict_conflicts(
+        rng.uniform(19.0, 19.5, n), rng.uniform(-99.5, -99.0, n), rng.uniform(9000, 11000, n),
+        rng.uniform(100, 250, n), rng.uniform(0, 360, n), separation_km=5.0, horizon_s=300.0,
+    )
+    assert len(found["i"]) > 0
+    assert (np.diff(found["t_conflict_s"]) >= 0).all()
+    assert (found["i"] < found["j"]).all()
+    assert (found["t_conflict_s"] <= found["t_cpa_s"] + 1e-9).all()
+
+
+def test_no_flights():
+    found = predict_conflicts([], [], [], [], [], separation_km=5.0)
+    assert all(len(arr) == 0 for arr in found.values())
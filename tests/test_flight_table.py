@@ -0,0 +1,74 @@
+"""
+Tests de la tabla columnar de vuelos (services/flight_table.py).
+Ejecutar: pytest tests/test_flight_table.py -v
+"""
+import json
+
+import numpy as np
+
+from services.flight_table import COLUMNS, NUMERIC_COLUMNS, TEXT_COLUMNS, FlightTable
+
+RECORDS = [
+    {"icao24": "abc123", "callsign": "AM456", "lat": 19.45, "lon": -99.12, "alt": 3500,
+     "velocity": 180.5, "heading": 90, "type": "pasajeros", "origin": "MEX", "destination": "CUN"},
+    {"icao24": "def456", "callsign": "CARGO1", "lat": 19.5, "lon": -99.2, "alt": 4200.5,
+     "velocity": 200, "heading": 270, "type": "carga", "origin": "MEX", "destination": "MTY"},
+    # Sin altitud ni tipo (y sin ruta): como llegan muchos vectores de OpenSky
+    {"icao24": "0a1b2c", "callsign": "VOI789", "lat": 19.3, "lon": -99.0, "alt": None,
+     "velocity": 150, "heading": 45},
+]
+
+
+def build(records, version=0):
+    """Igual que FlightMonitor._upsert_records: una lista por columna."""
+    table = FlightTable(capacity=2)
+    columns = {name: [r.get(name) for r in records] for name in NUMERIC_COLUMNS + TEXT_COLUMNS}
+    table.upsert_many([r["icao24"] for r in records], version=version, now=0.0, **columns)
+    return table
+
+
+def test_build_from_records_round_trip():
+    table = build(RECORDS)
+    assert len(table) == 3
+    assert "def456" in table and "zzz999" not in table
+    assert table.index == {"abc123": 0, "def456": 1, "0a1b2c": 2}
+
+    expected = [{name: r.get(name) for name in COLUMNS} for r in RECORDS]
+    assert table.to_records() == expected
+    assert json.loads(table.to_json()) == expected
+    assert table.to_records(table.rows_for(["0a1b2c", "missing"])) == expected[2:]
+
+
+def test_column_is_a_view_over_occupied_rows():
+    table = build(RECORDS)
+    assert table.column("icao24").tolist() == ["abc123", "def456", "0a1b2c"]
+    assert table.column("callsign").tolist() == ["AM456", "CARGO1", "VOI789"]
+    np.testing.assert_allclose(table.column("lat"), [19.45, 19.5, 19.3])
+    # Vista sin copia: sigue a la tabla y no incluye la capacidad sobrante
+    assert np.shares_memory(table.column("velocity"), table.numeric["velocity"])
+    assert len(table.column("heading")) == 3 < table._capacity
+
+
+def test_missing_alt_and_type():
+    table = build(RECORDS)
+    alts = table.column("alt")
+    assert alts.dtype == np.float64
+    assert np.isnan(alts[2]) and np.isfinite(alts[:2]).all()
+    assert np.nanmean(alts) == (3500 + 4200.5) / 2
+
+    types = table.column("type")
+    assert types.tolist() == ["pasajeros", "carga", None]
+    assert int(np.count_nonzero(types == "carga")) == 1
+    # Ausentes salen como null en el JSON
+    flight = json.loads(table.to_json([2]))[0]
+    assert flight["alt"] is None and flight["type"] is None
+
+
+def test_upsert_tracks_changed_versions():
+    table = build(RECORDS, version=1)
+    table.upsert_many(["abc123", "def456"], version=2, now=5.0, alt=[3500, 4300], type=["pasajeros", "carga"])
+    assert table.version[:len(table)].tolist() == [1, 2, 1]
+    # Las columnas omitidas conservan su valor
+    assert table.column("callsign")[1] == "CARGO1"
+    assert table.drop_stale(1.0) == ["0a1b2c"]
+    assert table.column("icao24").tolist() == ["abc123", "def456"]
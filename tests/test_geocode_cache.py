@@ -0,0 +1,77 @@
+"""
+Tests de la caché persistente de geocodificación (services/geocode_cache.py).
+Ejecutar: pytest tests/test_geocode_cache.py -v
+"""
+import unicodedata
+from types import SimpleNamespace
+
+import pytest
+
+from services import geocode_cache
+from services.geocode_cache import NEGATIVE, GeocodeCache, normalize_address
+
+ZOCALO = (19.4326, -99.1332)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Reloj controlado para services.geocode_cache (solo usa time.time)."""
+    clock = SimpleNamespace(now=1_700_000_000.0)
+    monkeypatch.setattr(geocode_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_address_normalization():
+    key = normalize_address("Plaza de la Constitución, Ciudad de México")
+    assert key == "plaza de la constitucion, ciudad de mexico"
+    assert normalize_address("  PLAZA DE LA CONSTITUCIÓN,\tCiudad   de\nMéxico ") == key
+    # Acento compuesto (NFD) y precompuesto (NFC) dan la misma clave
+    assert normalize_address("Mexicó") == normalize_address("Méxicó") == "mexico"
+    assert normalize_address("Straße") == "strasse"
+
+
+def test_lookup_uses_normalized_key(tmp_path):
+    cache = GeocodeCache(tmp_path / "geo.sqlite3")
+    cache.set("Zócalo, CDMX", ZOCALO)
+    assert cache.get("  zocalo,   cdmx") == ZOCALO
+    assert cache.get("ZÓCALO, CDMX") == ZOCALO
+    assert cache.get("Zócalo, Puebla") is None
+    stats = cache.stats()
+    assert (stats["size"], stats["hits"], stats["misses"]) == (1, 2, 1)
+
+
+def test_negative_entries_expire_before_positive(tmp_path, clock):
+    cache = GeocodeCache(tmp_path / "geo.sqlite3", ttl=3600, negative_ttl=60)
+    cache.set("Zócalo, CDMX", ZOCALO)
+    cache.set("Calle Inexistente 123", None)
+    assert cache.get("calle inexistente 123") is NEGATIVE
+
+    clock.now += 61
+    # El fallo ya venció (se puede reintentar); el resultado exitoso sigue vigente
+    assert cache.get("calle inexistente 123") is None
+    assert cache.get("zocalo, cdmx") == ZOCALO
+
+    clock.now += 3600
+    assert cache.get("zocalo, cdmx") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["negative_hits"], stats["misses"], stats["size"]) == (1, 1, 2, 0)
+
+
+def test_persists_across_instances(tmp_path, clock):
+    path = tmp_path / "sub" / "geo.sqlite3"
+    first = GeocodeCache(path, ttl=3600, negative_ttl=60)
+    first.set("Zócalo, CDMX", ZOCALO)
+    first.set("Calle Inexistente 123", None)
+    first.set("Bellas Artes", (19.4352, -99.1412))
+
+    second = GeocodeCache(path, ttl=3600, negative_ttl=60)
+    assert second.stats()["size"] == 3
+    assert second.get("zocalo, cdmx") == ZOCALO
+    assert second.get("Calle Inexistente 123") is NEGATIVE
+
+    # Al abrir se purgan del archivo las entradas vencidas
+    clock.now += 61
+    third = GeocodeCache(path, ttl=3600, negative_ttl=60)
+    assert third.stats()["size"] == 2
+    assert third.get("Calle Inexistente 123") is None
+    assert third.get("bellas artes") == (19.4352, -99.1412)
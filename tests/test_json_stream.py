@@ -0,0 +1,90 @@
+"""
+Tests del parser incremental de arreglos JSON (services/json_stream.py).
+Ejecutar: pytest tests/test_json_stream.py -v
+"""
+import json
+
+import pytest
+
+from services.json_stream import iter_array
+
+STATES = {
+    "time": 1700000000,
+    "states": [
+        ["4b1805", "SWR1   ", "Switzerland", 1700000000, 1700000001, 8.55, 47.45, 1234.56, False, 210.5,
+         91.3, -0.33, None, 1250.0, "1000", False, 0],
+        ["e8027d", None, "Perú — Ñandú \"quoted\" \\ é", None, 1700000001, -77.1, -12.0, None, True, 0.0,
+         None, None, None, None, None, False, 0],
+        [],
+        {"nested": [1, 2.5e-3, -7, {"deep": [True, None]}]},
+        123456789012345678901234567890,
+        -0.0001,
+        "última",
+    ],
+    "extra": "después",
+}
+
+
+def chunked(data, size):
+    return [data[k:k + size] for k in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64, 1 << 20])
+def test_every_chunk_boundary_bytes(size):
+    data = json.dumps(STATES, ensure_ascii=False).encode("utf-8")
+    header = {}
+    assert list(iter_array(chunked(data, size), key="states", header=header)) == STATES["states"]
+    assert header == {"time": STATES["time"], "extra": STATES["extra"]}
+
+
+def test_split_at_every_offset():
+    # Cortes en todas las posiciones posibles, incluido dentro de caracteres UTF-8 multibyte y números
+    data = json.dumps(STATES["states"], ensure_ascii=False).encode("utf-8")
+    for cut in range(len(data) + 1):
+        assert list(iter_array([data[:cut], data[cut:]])) == STATES["states"], cut
+
+
+def test_number_split_at_chunk_end():
+    # "12" + "34" no debe entregarse como dos números
+    assert list(iter_array([b"[12", b"34, 5", b"6]"])) == [1234, 56]
+    assert list(iter_array(["[1.", "5e", "2]"])) == [150.0]
+
+
+def test_str_chunks_and_whitespace():
+    text = ' \n[ 1 ,\t"a" , null ,\r\n{"b": [ ]} ] '
+    assert list(iter_array(chunked(text, 2))) == [1, "a", None, {"b": []}]
+
+
+@pytest.mark.parametrize("document,expected", [
+    (b"[]", []),
+    (b"  [ ]  ", []),
+])
+def test_empty_array(document, expected):
+    for size in (1, 2, len(document)):
+        assert list(iter_array(chunked(document, size))) == expected
+
+
+def test_key_null_or_missing():
+    header = {}
+    assert list(iter_array([b'{"time": 5, "states": null}'], key="states", header=header)) == []
+    assert header == {"time": 5}
+    assert list(iter_array([b'{"time": 5}'], key="states")) == []
+    assert list(iter_array([b"{}"], key="states")) == []
+
+
+def test_lazy_consumption():
+    def chunks():
+        yield b"[1, 2, "
+        yield b"3"
+        raise AssertionError("no debe leerse más de lo necesario")
+
+    rows = iter_array(chunks())
+    assert next(rows) == 1
+    assert next(rows) == 2
+
+
+@pytest.mark.parametrize("document", [b"[1 2]", b"[1,", b'{"states" [1]}', b"[1,]", b"x"])
+def test_invalid_json_raises(document):
+    with pytest.raises(ValueError):
+        for size in (1, len(document)):
+            list(iter_array(chunked(document, size), key="states" if document.startswith(b"{") else None))
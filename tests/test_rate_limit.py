@@ -0,0 +1,147 @@
+"""
+Tests del limitador de tasa (services/rate_limit.py) y de su uso en OpenSkyApi ante 429.
+Ejecutar: pytest tests/test_rate_limit.py -v
+"""
+import time
+
+import pytest
+
+from services.opensky_api import RATE_LIMITED_ATTEMPTS, OpenSkyApi
+from services.rate_limit import RateLimiter, RateLimitExceeded, TokenBucket
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """Sesión que devuelve las respuestas dadas en orden y registra cada petición."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        return self.responses.pop(0)
+
+
+def test_bucket_debt_and_refill():
+    bucket = TokenBucket(rate=2, capacity=4)
+    now = bucket._updated
+    bucket.take(4, now)
+    assert bucket.wait_time(1, now) == pytest.approx(0.5)
+    bucket.take(1, now)
+    assert bucket.level(now) == pytest.approx(-1)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    # La recarga nunca supera la capacidad
+    assert bucket.level(now + 100) == pytest.approx(4)
+
+
+def test_set_level_keeps_queued_debt():
+    bucket = TokenBucket(rate=1, capacity=10)
+    now = bucket._updated
+    bucket.take(10, now)
+    bucket.take(3, now)
+    bucket.set_level(8, now)
+    assert bucket.level(now) == pytest.approx(5)
+    # Sin deuda pendiente el saldo es el reportado (acotado a la capacidad)
+    idle = TokenBucket(rate=1, capacity=10)
+    idle.set_level(50, idle._updated)
+    assert idle.level(idle._updated) == pytest.approx(10)
+
+
+def test_acquire_queues_in_order():
+    limiter = RateLimiter()
+    bucket = limiter.bucket("k", rate=20, capacity=1)
+    assert limiter.acquire([(bucket, 1)]) == 0.0
+    started = time.monotonic()
+    wait = limiter.acquire([(bucket, 1)])
+    assert wait == pytest.approx(0.05, abs=0.02)
+    assert time.monotonic() - started >= wait - 0.005
+    assert limiter.stats()["queued"] == 1
+
+
+def test_acquire_rejects_without_reserving():
+    limiter = RateLimiter(max_wait=0.5)
+    bucket = limiter.bucket("k", rate=1, capacity=1)
+    limiter.acquire([(bucket, 1)])
+    level = limiter.level(bucket)
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        limiter.acquire([(bucket, 1)], scope="cred")
+    assert excinfo.value.wait_s == pytest.approx(1.0, abs=0.05)
+    assert excinfo.value.key == "cred"
+    assert limiter.level(bucket) == pytest.approx(level, abs=0.05)
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_penalize_blocks_only_its_scope():
+    limiter = RateLimiter(max_wait=1)
+    limiter.penalize("a", 30)
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire([], scope="a")
+    assert limiter.acquire([], scope="b") == 0.0
+    assert limiter.stats()["blocked_s"]["a"] == pytest.approx(30, abs=1)
+
+
+def test_429_is_retried_after_the_penalty():
+    limiter = RateLimiter(max_wait=5)
+    session = FakeSession(
+        FakeResponse(429, {"X-Rate-Limit-Retry-After-Seconds": "0"}),
+        FakeResponse(200, {"X-Rate-Limit-Remaining": "350"}),
+    )
+    api = OpenSkyApi(session=session, limiter=limiter)
+    credits = api._credits
+
+    r = api._request("/states/all", ("states", ()), {}, min_interval=(0.01, 0.01), cost=4)
+    assert r.status_code == 200
+    assert len(session.calls) == 2
+    assert limiter.stats()["penalties"] == 1
+    # El reintento no vuelve a reservar: el saldo es el que reporta el servidor
+    assert limiter.level(credits) == pytest.approx(350, abs=0.1)
+
+
+def test_429_gives_up_after_max_attempts():
+    limiter = RateLimiter(max_wait=5)
+    responses = [FakeResponse(429, {"Retry-After": "0"}) for _ in range(RATE_LIMITED_ATTEMPTS)]
+    session = FakeSession(*responses)
+    api = OpenSkyApi(session=session, limiter=limiter)
+
+    with pytest.raises(RateLimitExceeded):
+        api._request("/states/all", ("states", ()), {})
+    assert len(session.calls) == RATE_LIMITED_ATTEMPTS
+    assert all(r.closed for r in responses)
+    assert limiter.stats()["penalties"] == RATE_LIMITED_ATTEMPTS
+
+
+def test_long_retry_after_is_not_waited_beyond_max_wait():
+    limiter = RateLimiter(max_wait=1)
+    rejected = FakeResponse(429, {"X-Rate-Limit-Retry-After-Seconds": "120"})
+    session = FakeSession(rejected, FakeResponse(200))
+    api = OpenSkyApi(session=session, limiter=limiter)
+
+    started = time.monotonic()
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        api._request("/states/all", ("states", ()), {})
+    assert time.monotonic() - started < 1
+    assert excinfo.value.wait_s == pytest.approx(120, abs=1)
+    assert len(session.calls) == 1
+    assert rejected.closed
+    # Mientras dure el bloqueo, las demás peticiones de la credencial también se rechazan
+    with pytest.raises(RateLimitExceeded):
+        api._request("/flights/all", ("flights/all",), {})
+    assert len(session.calls) == 1
+
+
+def test_remaining_header_syncs_credits():
+    limiter = RateLimiter()
+    session = FakeSession(FakeResponse(200, {"X-Rate-Limit-Remaining": "7"}))
+    api = OpenSkyApi(session=session, limiter=limiter)
+    api._request("/states/all", ("states", ()), {}, cost=1)
+    assert api.rate_limit_status()["remaining_credits"] == 7
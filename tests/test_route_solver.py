@@ -0,0 +1,105 @@
+"""
+Tests del motor de rutas (services/route_solver.py) contra fuerza bruta.
+Ejecutar: pytest tests/test_route_solver.py -v
+"""
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from services.route_solver import MULTISTART_FALLBACK_MS, TIERS, RouteSolver, solve_multistart
+
+
+def random_points(n, seed):
+    rng = np.random.default_rng(seed)
+    return rng.uniform([19.0, -100.0], [20.0, -99.0], size=(n, 2)).tolist()
+
+
+def brute_force(solver):
+    """Longitud óptima probando todas las permutaciones de los puntos intermedios."""
+    n = solver.n
+    inner = range(1, n - 1) if solver.fixed_end else range(1, n)
+    tail = [n - 1] if solver.fixed_end else []
+    return min(solver.path_length([0, *perm, *tail]) for perm in itertools.permutations(inner))
+
+
+def assert_valid_tour(solver, tour):
+    assert sorted(tour) == list(range(solver.n))
+    assert tour[0] == 0
+    if solver.fixed_end:
+        assert tour[-1] == solver.n - 1
+
+
+@pytest.mark.parametrize("fixed_end", [False, True])
+@pytest.mark.parametrize("n", range(3, 9))
+def test_exact_matches_brute_force(n, fixed_end):
+    for seed in range(3):
+        solver = RouteSolver(random_points(n, seed), fixed_end=fixed_end)
+        tour = solver.solve_exact()
+        assert_valid_tour(solver, tour)
+        assert solver.path_length(tour) == pytest.approx(brute_force(solver))
+
+
+@pytest.mark.parametrize("tier", list(TIERS))
+@pytest.mark.parametrize("fixed_end", [False, True])
+@pytest.mark.parametrize("n", [5, 8])
+def test_heuristics_are_valid_and_never_beat_the_optimum(n, fixed_end, tier):
+    for seed in range(3):
+        solver = RouteSolver(random_points(n, seed), fixed_end=fixed_end)
+        tour = solver.solve(tier=tier)
+        assert_valid_tour(solver, tour)
+        length = solver.path_length(tour)
+        assert length >= brute_force(solver) - 1e-9
+        # La búsqueda local nunca empeora la construcción greedy de la que parte
+        assert length <= solver.path_length(solver.nearest_neighbor_tour(0)) + 1e-9
+
+
+@pytest.mark.parametrize("fixed_end", [False, True])
+def test_multistart_finds_the_optimum_of_a_small_instance(fixed_end):
+    points = random_points(8, seed=7)
+    solver = RouteSolver(points, fixed_end=fixed_end)
+    length, tour = solve_multistart(points, workers=2, time_budget_ms=200, fixed_end=fixed_end, seed=1)
+    assert_valid_tour(solver, tour)
+    assert length == pytest.approx(solver.path_length(tour))
+    assert length == pytest.approx(brute_force(solver))
+
+
+def test_degenerate_inputs():
+    assert RouteSolver([]).solve() == []
+    assert RouteSolver([[19.0, -99.0]]).solve() == [0]
+    assert RouteSolver([[19.0, -99.0], [19.5, -99.5]], fixed_end=True).solve_exact() == [0, 1]
+    with pytest.raises(ValueError):
+        RouteSolver(random_points(4, 0)).solve(tier="desconocido")
+
+
+@pytest.mark.parametrize("fixed_end", [False, True])
+def test_multistart_returns_a_valid_tour_on_a_larger_instance(fixed_end):
+    points = random_points(40, seed=11)
+    solver = RouteSolver(points, fixed_end=fixed_end)
+    length, tour = solve_multistart(points, workers=2, time_budget_ms=300, fixed_end=fixed_end, seed=3)
+    assert_valid_tour(solver, tour)
+    assert length == pytest.approx(solver.path_length(tour))
+    assert length <= solver.path_length(solver.nearest_neighbor_tour(0)) + 1e-9
+
+
+def test_multistart_budget_counts_queue_time():
+    points = random_points(60, seed=5)
+    solver = RouteSolver(points, fixed_end=True)
+    budget_ms = 300
+    with ThreadPoolExecutor(max_workers=3) as callers:
+        started = time.perf_counter()
+        futures = [
+            callers.submit(solve_multistart, points, workers=1, time_budget_ms=budget_ms, fixed_end=True, seed=k)
+            for k in range(3)
+        ]
+        results = [f.result() for f in futures]
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    # Las tareas encoladas en el pool no reinician el reloj: nadie pasa del presupuesto
+    # más la búsqueda mínima en proceso (holgura para el arranque de procesos)
+    assert elapsed_ms < budget_ms + MULTISTART_FALLBACK_MS + 1000
+    for length, tour in results:
+        assert_valid_tour(solver, tour)
+        # Aun sin resultado del pool, hay búsqueda local sobre el greedy
+        assert length <= solver.path_length(solver.nearest_neighbor_tour(0)) + 1e-9
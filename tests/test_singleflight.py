@@ -0,0 +1,85 @@
+"""
+Tests de la coalescencia de llamadas concurrentes (services/singleflight.py).
+Ejecutar: pytest tests/test_singleflight.py -v
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+N = 8
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "tiempo de espera agotado"
+        time.sleep(0.001)
+
+
+def run_concurrently(group, key, fn):
+    """Lanza N llamadas a ``group.do(key, fn)``; ``fn`` se bloquea hasta que todas esperan."""
+    release = threading.Event()
+
+    def blocking():
+        release.wait(5.0)
+        return fn()
+
+    with ThreadPoolExecutor(max_workers=N) as pool:
+        futures = [pool.submit(group.do, key, blocking) for _ in range(N)]
+        # Una en curso y las demás absorbidas antes de soltar al líder
+        wait_until(lambda: group.stats()["coalesced"] == N - 1)
+        release.set()
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result(timeout=5.0))
+            except Exception as e:
+                outcomes.append(e)
+    return outcomes
+
+
+def test_concurrent_callers_share_one_call():
+    group = SingleFlight()
+    executions = []
+
+    def fetch():
+        executions.append(threading.get_ident())
+        return {"vuelos": [1, 2, 3]}
+
+    results = run_concurrently(group, ("opensky", "bbox"), fetch)
+    assert len(executions) == 1
+    assert all(result is results[0] for result in results)
+    assert group.stats() == {"calls": 1, "coalesced": N - 1, "in_flight": 0, "coalesced_rate": round((N - 1) / N, 4)}
+
+
+def test_exception_reaches_every_waiter_and_releases_the_key():
+    group = SingleFlight()
+    executions = []
+
+    def failing():
+        executions.append(1)
+        raise ConnectionError("OpenSky no responde")
+
+    errors = run_concurrently(group, "opensky", failing)
+    assert len(executions) == 1
+    assert all(isinstance(e, ConnectionError) for e in errors)
+    assert all(e is errors[0] for e in errors)
+    assert group.stats()["in_flight"] == 0
+
+    # La clave quedó libre: la siguiente llamada vuelve a ejecutarse
+    assert group.do("opensky", lambda: "ok") == "ok"
+    assert group.stats()["calls"] == 2
+
+
+def test_sequential_calls_are_not_cached():
+    group = SingleFlight()
+    counter = iter(range(10))
+    assert [group.do("k", next, counter) for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(ZeroDivisionError):
+        group.do("k", lambda: 1 / 0)
+    stats = group.stats()
+    assert (stats["calls"], stats["coalesced"], stats["in_flight"]) == (4, 0, 0)
@@ -0,0 +1,62 @@
+"""
+Tests del índice de rejilla (services/spatial_index.py) contra fuerza bruta.
+Ejecutar: pytest tests/test_spatial_index.py -v
+"""
+import numpy as np
+import pytest
+
+from services.geodesy import haversine_many
+from services.spatial_index import GridIndex
+
+
+def brute_force_pairs(lats, lons, radius_km):
+    pairs = {}
+    for i in range(len(lats)):
+        for j in range(i + 1, len(lats)):
+            d = float(haversine_many(lats[i], lons[i], lats[j], lons[j]))
+            if d < radius_km:
+                pairs[(i, j)] = d
+    return pairs
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("center_lat", [19.4, 60.0, -45.0])
+def test_pairs_within_matches_brute_force(seed, center_lat):
+    rng = np.random.default_rng(seed)
+    n = 300
+    lats = center_lat + rng.uniform(-0.5, 0.5, n)
+    lons = -99.1 + rng.uniform(-0.5, 0.5, n)
+    # Algunos vuelos sin posición
+    lats[rng.choice(n, 10, replace=False)] = np.nan
+
+    i, j, dist = GridIndex(lats, lons, 5.0).pairs_within()
+    expected = brute_force_pairs(lats, lons, 5.0)
+
+    assert list(zip(i.tolist(), j.tolist())) == sorted(expected)
+    assert dist == pytest.approx([expected[pair] for pair in sorted(expected)])
+
+
+def test_smaller_radius_and_block_boundaries():
+    rng = np.random.default_rng(3)
+    lats = 19.4 + rng.uniform(-0.05, 0.05, 400)
+    lons = -99.1 + rng.uniform(-0.05, 0.05, 400)
+    index = GridIndex(lats, lons, 5.0)
+
+    i, j, _ = index.pairs_within(2.0)
+    assert set(zip(i.tolist(), j.tolist())) == set(brute_force_pairs(lats, lons, 2.0))
+
+    # Bloques diminutos: mismos candidatos que con el bloque por defecto
+    blocks = [index.to_original(a, b) for a, b in index.candidate_blocks(block_size=7)]
+    small = {pair for bi, bj in blocks for pair in zip(bi.tolist(), bj.tolist())}
+    ci, cj = index.candidate_pairs()
+    assert small == set(zip(ci.tolist(), cj.tolist()))
+
+
+def test_empty_and_invalid_inputs():
+    i, j, dist = GridIndex([], [], 5.0).pairs_within()
+    assert len(i) == len(j) == len(dist) == 0
+    assert len(GridIndex([np.nan], [1.0], 5.0)) == 0
+    with pytest.raises(ValueError):
+        GridIndex([19.0], [-99.0], 0)
+    with pytest.raises(ValueError):
+        GridIndex([19.0], [-99.0], 5.0).pairs_within(10.0)
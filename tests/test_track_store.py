@@ -0,0 +1,193 @@
+"""
+Tests del almacén histórico de posiciones (services/track_store.py).
+Ejecutar: pytest tests/test_track_store.py -v
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services.track_store import QueryTooLarge, TrackStore
+
+T0 = 1_700_000_000
+
+
+def make_rows(seed, aircraft=20, ticks=30):
+    rng = np.random.default_rng(seed)
+    icao24 = np.repeat([f"{0xa00000 + k:06x}" for k in range(aircraft)], ticks)
+    times = T0 + np.tile(np.arange(ticks) * 10, aircraft) + rng.integers(0, 5, aircraft * ticks)
+    rows = {
+        "icao24": icao24,
+        "time": times,
+        "lat": rng.uniform(-60, 60, aircraft * ticks),
+        "lon": rng.uniform(-179, 179, aircraft * ticks),
+        "alt": rng.uniform(0, 12000, aircraft * ticks),
+        "velocity": rng.uniform(0, 300, aircraft * ticks),
+        "heading": rng.uniform(0, 360, aircraft * ticks),
+        "on_ground": rng.random(aircraft * ticks) < 0.1,
+    }
+    rows["alt"][::7] = np.nan
+    # Dentro de cada aeronave los instantes deben ser distintos
+    order = np.lexsort((rows["time"], rows["icao24"]))
+    rows = {name: arr[order] for name, arr in rows.items()}
+    keep = np.r_[True, (rows["icao24"][1:] != rows["icao24"][:-1]) | (rows["time"][1:] != rows["time"][:-1])]
+    return {name: arr[keep] for name, arr in rows.items()}
+
+
+def append_rows(store, rows, mask=slice(None)):
+    return store.append(
+        rows["icao24"][mask], rows["time"][mask], rows["lat"][mask], rows["lon"][mask],
+        alts=rows["alt"][mask], velocities=rows["velocity"][mask], headings=rows["heading"][mask],
+        on_ground=rows["on_ground"][mask],
+    )
+
+
+def assert_same(cols, rows):
+    assert cols["icao24"].tolist() == rows["icao24"].tolist()
+    assert cols["time"].tolist() == rows["time"].tolist()
+    np.testing.assert_allclose(cols["lat"], rows["lat"], atol=1e-5)
+    np.testing.assert_allclose(cols["lon"], rows["lon"], atol=1e-5)
+    for name in ("alt", "velocity", "heading"):
+        np.testing.assert_allclose(cols[name], rows[name], rtol=1e-6, equal_nan=True)
+    assert cols["on_ground"].tolist() == rows["on_ground"].tolist()
+
+
+def test_append_flush_reopen_query_round_trip(tmp_path):
+    rows = make_rows(0)
+    store = TrackStore(tmp_path, chunk_rows=10 ** 9, flush_interval_s=float("inf"))
+    # En desorden dentro de cada tanda: el almacén ordena por (icao24, tiempo). Entre
+    # tandas el tiempo avanza, porque lo anterior al último instante guardado se descarta
+    rng = np.random.default_rng(1)
+    early = np.flatnonzero(rows["time"] < T0 + 150)
+    late = np.flatnonzero(rows["time"] >= T0 + 150)
+    assert append_rows(store, rows, rng.permutation(early)) + append_rows(store, rows, rng.permutation(late)) == len(rows["time"])
+
+    # Las filas en el búfer ya se pueden consultar
+    assert store.stats()["buffered_rows"] == len(rows["time"])
+    assert_same(store.query(begin=0), rows)
+
+    store.flush()
+    assert store.stats()["chunks"] == 1
+    assert store.stats()["buffered_rows"] == 0
+
+    reopened = TrackStore(tmp_path)
+    assert reopened.stats()["rows"] == len(rows["time"])
+    assert_same(reopened.query(begin=0), rows)
+
+
+def test_auto_flush_creates_one_chunk_per_flush(tmp_path):
+    rows = make_rows(2, aircraft=10, ticks=20)
+    store = TrackStore(tmp_path, chunk_rows=50, flush_interval_s=float("inf"))
+    for k in range(0, len(rows["time"]), 30):
+        append_rows(store, rows, slice(k, k + 30))
+    stats = store.stats()
+    assert stats["chunks"] >= 3
+    assert stats["rows"] + stats["buffered_rows"] == len(rows["time"])
+    store.flush()
+    assert_same(TrackStore(tmp_path).query(begin=0), rows)
+
+
+def test_query_filters_by_aircraft_and_window(tmp_path):
+    rows = make_rows(3)
+    store = TrackStore(tmp_path, chunk_rows=100, flush_interval_s=float("inf"))
+    append_rows(store, rows)
+    store.flush()
+
+    one = rows["icao24"][0]
+    mask = rows["icao24"] == one
+    assert_same(store.query(icao24=one), {name: arr[mask] for name, arr in rows.items()})
+
+    pair = [rows["icao24"][0], rows["icao24"][-1].upper(), "zzzzzz"]
+    mask = np.isin(rows["icao24"], [pair[0], pair[1].lower()])
+    assert_same(store.query(icao24=pair), {name: arr[mask] for name, arr in rows.items()})
+
+    begin, end = T0 + 50, T0 + 120
+    mask = (rows["time"] >= begin) & (rows["time"] <= end)
+    assert_same(store.query(begin=begin, end=end), {name: arr[mask] for name, arr in rows.items()})
+
+    assert len(store.query(begin=T0 + 10 ** 6)["time"]) == 0
+    assert len(store.query(icao24="ffffff")["time"]) == 0
+
+
+def test_duplicates_and_invalid_rows_are_dropped(tmp_path):
+    store = TrackStore(tmp_path, flush_interval_s=float("inf"))
+    assert store.append(["abc123", "abc123", "nothex", "abc124"], [T0, T0, T0, T0],
+                        [19.4, 19.4, 19.4, np.nan], [-99.1, -99.1, -99.1, -99.1]) == 1
+    # Un sondeo que repite el último instante de la aeronave no agrega nada
+    assert store.append(["abc123"], [T0], [19.5], [-99.2]) == 0
+    store.flush()
+
+    # Otra instancia (sin memoria del último instante) repite la fila: la consulta la deduplica
+    other = TrackStore(tmp_path, flush_interval_s=float("inf"))
+    assert other.append(["abc123"], [T0], [19.4], [-99.1]) == 1
+    other.flush()
+    reopened = TrackStore(tmp_path)
+    assert reopened.stats()["chunks"] == 2
+    assert reopened.query(icao24="abc123")["time"].tolist() == [T0]
+
+
+def test_reingesting_an_interval_adds_nothing(tmp_path):
+    rows = make_rows(3, aircraft=5, ticks=10)
+    store = TrackStore(tmp_path, flush_interval_s=float("inf"))
+    assert append_rows(store, rows) == len(rows["time"])
+    # Misma trayectoria otra vez, y una tanda que mezcla waypoints viejos con uno nuevo
+    assert append_rows(store, rows) == 0
+    assert store.append(["a00000"] * 3, [T0, T0 + 10, T0 + 10_000], [1.0] * 3, [2.0] * 3) == 1
+    store.flush()
+    assert TrackStore(tmp_path).stats()["rows"] == len(rows["time"]) + 1
+
+
+def test_last_time_memory_is_bounded(tmp_path):
+    store = TrackStore(tmp_path, flush_interval_s=float("inf"), dedupe_window_s=60)
+    for k in range(3000):
+        store.append([f"{k:06x}"], [T0 + k], [0.0], [0.0])
+    # Solo se recuerdan aeronaves vistas dentro de la ventana (más el margen hasta la próxima poda)
+    assert len(store._last_time) <= 2048
+    assert all(t >= T0 + 3000 - 1 - 60 - 2048 for t in store._last_time.values())
+    assert store._last_time[2999] == T0 + 2999
+
+
+def test_wide_deltas_round_trip(tmp_path):
+    # Saltos que no caben en int8/int16 obligan a enteros más anchos
+    store = TrackStore(tmp_path)
+    times = [T0, T0 + 1, T0 + 40_000, T0 + 5_000_000]
+    lats = [0.0, 0.00001, 45.0, -89.99999]
+    lons = [-179.99999, 179.99999, 0.0, 12.34567]
+    store.append(["000001"] * 4, times, lats, lons)
+    store.flush()
+    cols = TrackStore(tmp_path).query(icao24="000001")
+    assert cols["time"].tolist() == times
+    np.testing.assert_allclose(cols["lat"], lats, atol=1e-5)
+    np.testing.assert_allclose(cols["lon"], lons, atol=1e-5)
+
+
+def test_max_rows(tmp_path):
+    rows = make_rows(4, aircraft=5, ticks=10)
+    store = TrackStore(tmp_path, chunk_rows=20, flush_interval_s=float("inf"))
+    append_rows(store, rows)
+    total = len(rows["time"])
+    assert len(store.query(begin=0, max_rows=total)["time"]) == total
+    with pytest.raises(QueryTooLarge):
+        store.query(begin=0, max_rows=total - 1)
+    # El tope aplica a las filas que pasan el filtro, no a las leídas
+    assert len(store.query(icao24=rows["icao24"][0], max_rows=10)["time"]) == 10
+
+
+def test_append_track(tmp_path):
+    waypoint = lambda t, lat: SimpleNamespace(time=t, latitude=lat, longitude=-99.0, baro_altitude=None,
+                                              true_track=90.0, on_ground=False)
+    track = SimpleNamespace(icao24="abc123", path=[waypoint(T0, 19.0), waypoint(T0 + 60, None), waypoint(T0 + 120, 19.1)])
+    store = TrackStore(tmp_path)
+    assert store.append_track(track) == 2
+    assert store.append_track(SimpleNamespace(icao24="abc124", path=[])) == 0
+    cols = store.query(icao24="abc123")
+    assert cols["time"].tolist() == [T0, T0 + 120]
+    assert np.isnan(cols["alt"]).all()
+    assert cols["velocity"].tolist() == pytest.approx([np.nan, np.nan], nan_ok=True)
+
+
+def test_empty_store(tmp_path):
+    store = TrackStore(tmp_path / "nuevo")
+    cols = store.query(begin=0)
+    assert all(len(cols[name]) == 0 for name in cols)
+    assert store.stats()["rows"] == 0
@@ -0,0 +1,127 @@
+"""
+Tests de /api/vuelos: ETag/304 y deltas con `?since=` (FlightMonitor.delta_since).
+Ejecutar: pytest tests/test_vuelos_api.py -v
+"""
+import pytest
+
+import app as app_module
+from app import FLIGHT_DELTA_HISTORY, FLIGHT_VERSION_EPOCH, FlightMonitor
+from services.flight_table import FlightTable
+
+
+def flight(icao24, lat, lon=-99.0):
+    # Separados varios km entre sí y fuera de zonas: sin conflictos que cambien la versión
+    return {"icao24": icao24, "callsign": icao24.upper(), "lat": lat, "lon": lon, "alt": 3000,
+            "velocity": 0, "heading": 0, "type": "pasajero", "origin": "MEX", "destination": "CUN"}
+
+
+class ScriptedMonitor(FlightMonitor):
+    """Monitor cuyo sondeo aplica los cambios preparados en `pending` (sin OpenSky ni mock)."""
+
+    def __init__(self):
+        super().__init__(poll_interval=3600)
+        self.table = FlightTable()
+        self.set_conflict_zones([])
+        self.pending = [flight("aaa001", 19.0), flight("aaa002", 19.5), flight("aaa003", 20.0)]
+        self.drop = []
+
+    def fetch_opensky_data(self, version=None):
+        if self.pending:
+            self._upsert_records(self.pending, version=version)
+        if self.drop:
+            # drop_stale por last_seen: se marcan como no vistos los que se retiran
+            self.table.last_seen[self.table.rows_for(self.drop)] = -1.0
+            self.table.drop_stale(0.0)
+        self.pending, self.drop = [], []
+        return self.table
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    monitor = ScriptedMonitor()
+    monkeypatch.setattr(app_module, "flight_monitor", monitor)
+    app_module.vuelos_response_cache.clear()
+    yield monitor
+    monitor.stop_polling()
+    app_module.vuelos_response_cache.clear()
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def get(client, since=None, etag=None):
+    headers = {"If-None-Match": f'"{etag}"'} if etag else {}
+    return client.get("/api/vuelos", query_string={"since": since} if since else {}, headers=headers)
+
+
+def test_full_state_and_304_on_matching_etag(monitor, client):
+    response = get(client)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["delta"] is False
+    assert sorted(f["icao24"] for f in body["vuelos"]) == ["aaa001", "aaa002", "aaa003"]
+    assert body["version"] == f"{FLIGHT_VERSION_EPOCH}-1"
+    assert response.headers["ETag"] == f'"{body["version"]}"'
+
+    not_modified = get(client, etag=body["version"])
+    assert not_modified.status_code == 304
+    assert not_modified.data == b""
+    assert not_modified.headers["ETag"] == response.headers["ETag"]
+
+
+def test_since_lists_changed_added_and_removed(monitor, client):
+    version = get(client).get_json()["version"]
+    monitor.pending = [flight("aaa001", 19.1), flight("aaa004", 20.5)]
+    monitor.drop = ["aaa003"]
+    monitor.poll_once()
+
+    response = get(client, since=version, etag=version)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["delta"] is True
+    assert body["since"] == version
+    assert sorted(f["icao24"] for f in body["vuelos"]) == ["aaa001", "aaa004"]
+    assert body["eliminados"] == ["aaa003"]
+    assert body["total_vuelos"] == 3
+
+    rows, removed = monitor.delta_since(1)
+    assert sorted(monitor.snapshot()["table"].icao24[rows].tolist()) == ["aaa001", "aaa004"]
+    assert removed == ["aaa003"]
+    # Al día: delta vacío
+    assert get(client, since=body["version"]).get_json()["vuelos"] == []
+
+
+def test_since_older_than_history_returns_full_state(monitor, client):
+    first = get(client).get_json()["version"]
+    for k in range(FLIGHT_DELTA_HISTORY + 1):
+        monitor.pending = [flight("aaa001", 19.0 + 0.001 * (k + 1))]
+        monitor.poll_once()
+    assert monitor.snapshot()["version"] == FLIGHT_DELTA_HISTORY + 2
+    assert monitor.delta_since(1) is None
+
+    body = get(client, since=first).get_json()
+    assert body["delta"] is False
+    assert len(body["vuelos"]) == 3
+
+
+def test_since_from_another_epoch_returns_full_state(monitor, client):
+    get(client)
+    body = get(client, since="0123456789ab-1").get_json()
+    assert body["delta"] is False
+    assert len(body["vuelos"]) == 3
+    # Un ETag de otra ejecución con el mismo contador no produce 304
+    assert get(client, etag="0123456789ab-1").status_code == 200
+    assert get(client, since="no-es-version").status_code == 400
+
+
+def test_version_does_not_advance_without_changes(monitor, client):
+    response = get(client)
+    before = monitor.snapshot()
+    after = monitor.poll_once()
+    assert after["tick"] == before["tick"] + 1
+    assert after["version"] == before["version"]
+    rows, removed = monitor.delta_since(before["version"])
+    assert len(rows) == 0 and removed == []
+    assert get(client, etag=response.get_json()["version"]).status_code == 304
@@ -0,0 +1,74 @@
+"""
+Tests del índice de zonas de restricción (services/zone_index.py) contra fuerza bruta.
+Ejecutar: pytest tests/test_zone_index.py -v
+"""
+import numpy as np
+import pytest
+
+from services.geodesy import haversine_many
+from services.zone_index import ZoneIndex
+
+
+def point_in_polygon(lat, lon, polygon):
+    """Cruce de rayos escalar, independiente de la versión vectorizada."""
+    inside = False
+    for k in range(len(polygon)):
+        (ya, xa), (yb, xb) = polygon[k], polygon[k - 1]
+        if (ya > lat) != (yb > lat) and lon < (xb - xa) * (lat - ya) / (yb - ya) + xa:
+            inside = not inside
+    return inside
+
+
+def brute_force(zones, lats, lons):
+    hits = set()
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        if not (np.isfinite(lat) and np.isfinite(lon)):
+            continue
+        for k, zone in enumerate(zones):
+            if "polygon" in zone:
+                if point_in_polygon(lat, lon, zone["polygon"]):
+                    hits.add((i, k))
+            elif float(haversine_many(lat, lon, zone["lat"], zone["lon"])) < zone["radius"]:
+                hits.add((i, k))
+    return hits
+
+
+def random_zones(rng, count):
+    zones = []
+    for k in range(count):
+        lat, lon = rng.uniform(18.5, 20.5), rng.uniform(-100.5, -98.5)
+        if k % 3 == 0:
+            # Polígono convexo alrededor de (lat, lon)
+            angles = np.sort(rng.uniform(0, 2 * np.pi, 6))
+            radii = rng.uniform(0.05, 0.3, 6)
+            polygon = np.column_stack([lat + radii * np.sin(angles), lon + radii * np.cos(angles)])
+            zones.append({"name": f"P{k}", "polygon": polygon.tolist()})
+        else:
+            zones.append({"name": f"C{k}", "lat": lat, "lon": lon, "radius": rng.uniform(2, 40)})
+    return zones
+
+
+@pytest.mark.parametrize("cell_km", [5.0, 25.0, 100.0])
+@pytest.mark.parametrize("seed", range(3))
+def test_query_matches_brute_force(seed, cell_km):
+    rng = np.random.default_rng(seed)
+    zones = random_zones(rng, 30)
+    lats = rng.uniform(18.5, 20.5, 500)
+    lons = rng.uniform(-100.5, -98.5, 500)
+    lats[:5] = np.nan
+
+    index = ZoneIndex(zones, cell_km=cell_km)
+    i, k, dist = index.query(lats, lons)
+
+    assert set(zip(i.tolist(), k.tolist())) == brute_force(zones, lats, lons)
+    assert list(zip(i.tolist(), k.tolist())) == sorted(zip(i.tolist(), k.tolist()))
+    assert dist == pytest.approx(haversine_many(lats[i], lons[i], index.center_lat[k], index.center_lon[k]))
+
+
+def test_no_zones_and_invalid_zones():
+    i, k, dist = ZoneIndex([]).query([19.4], [-99.1])
+    assert len(i) == len(k) == len(dist) == 0
+    with pytest.raises(ValueError):
+        ZoneIndex([{"name": "sin radio", "lat": 19.4, "lon": -99.1}])
+    with pytest.raises(ValueError):
+        ZoneIndex([{"name": "línea", "polygon": [[19.4, -99.1], [19.5, -99.2]]}])